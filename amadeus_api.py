@@ -1,117 +1,411 @@
 import requests
 import logging
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 import config
+from hotel_index import hotel_index
+from http_transport import transport
+from rate_limiter import TokenBucket
+from response_cache import ResponseCache
+
+# Shared by every AmadeusAPI instance so that web threads, background searches
+# and the scheduler together stay under AMADEUS_REQUESTS_PER_MINUTE
+_rate_limiter = TokenBucket(config.AMADEUS_REQUESTS_PER_MINUTE, config.AMADEUS_BURST)
+
+# Raw offer responses, shared across briefs and users. Deals are formatted
+# per brief after the lookup, so one cached response serves every brief.
+_flight_cache = ResponseCache('flight-offers', config.AMADEUS_CACHE_TTL_SECONDS,
+                              config.AMADEUS_CACHE_MAX_ENTRIES, config.AMADEUS_CACHE_PERSISTENT)
+_hotel_cache = ResponseCache('hotel-offers', config.AMADEUS_CACHE_TTL_SECONDS,
+                             config.AMADEUS_CACHE_MAX_ENTRIES, config.AMADEUS_CACHE_PERSISTENT)
+
+class AmadeusTokenManager:
+    """Process-wide OAuth token cache shared by every AmadeusAPI instance
+    
+    A daemon thread refreshes the bearer token AMADEUS_TOKEN_REFRESH_MARGIN
+    seconds before it expires, so request-path code only ever reads the
+    cached token. All state changes happen under a lock, which keeps it safe
+    under gunicorn threads; the refresher is restarted after a fork.
+    """
+    
+    def __init__(self, base_url):
+        self.token_url = f"{base_url}/v1/security/oauth2/token"
+        self.access_token = None
+        self.token_expires_at = None
+        self.refreshed_at = None
+        self.token_lifetime = None
+        self.last_error = None
+        self.margin_clamped = False
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.RLock()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.pid = None
+    
+    def has_valid_token(self):
+        return bool(self.access_token and self.token_expires_at and datetime.now() < self.token_expires_at)
+    
+    def refresh(self):
+        """Fetch a new token from Amadeus; raises on failure"""
+        with self.refresh_lock:
+            try:
+                data = {
+                    'grant_type': 'client_credentials',
+                    'client_id': config.AMADEUS_CLIENT_ID,
+                    'client_secret': config.AMADEUS_CLIENT_SECRET
+                }
+                
+                response = transport.post(self.token_url, data=data)
+                response.raise_for_status()
+                
+                token_data = response.json()
+                expires_in = token_data.get('expires_in', 3600)
+                with self.lock:
+                    self.access_token = token_data['access_token']
+                    self.token_lifetime = max(0, expires_in - 60)
+                    self.token_expires_at = datetime.now() + timedelta(seconds=self.token_lifetime)
+                    self.refreshed_at = datetime.now()
+                    self.last_error = None
+                
+                logging.info("Amadeus access token obtained successfully")
+                
+            except Exception as e:
+                with self.lock:
+                    self.last_error = str(e)
+                logging.error(f"Failed to get Amadeus access token: {e}")
+                raise
+    
+    def get_token(self):
+        """Return a valid token, fetching one only if none has been obtained yet"""
+        self.start()
+        if not self.has_valid_token():
+            with self.refresh_lock:
+                if not self.has_valid_token():
+                    self.refresh()
+        return self.access_token
+    
+    def start(self):
+        """Start the background refresher once per process"""
+        if self.thread and self.thread.is_alive() and self.pid == os.getpid():
+            return
+        
+        with self.lock:
+            if self.thread and self.thread.is_alive() and self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self._run, name='amadeus-token-refresher', daemon=True)
+            self.thread.start()
+    
+    def _refresh_margin(self):
+        """AMADEUS_TOKEN_REFRESH_MARGIN, clamped to half the current token's lifetime"""
+        margin = config.AMADEUS_TOKEN_REFRESH_MARGIN
+        lifetime = self.token_lifetime
+        if lifetime is not None:
+            if margin > lifetime // 2:
+                if not self.margin_clamped:
+                    logging.warning(f"AMADEUS_TOKEN_REFRESH_MARGIN={margin}s exceeds half the {lifetime}s token lifetime; "
+                                    f"refreshing {lifetime // 2}s before expiry instead")
+                    self.margin_clamped = True
+                margin = lifetime // 2
+        return timedelta(seconds=margin)
+    
+    def _run(self):
+        retry_delay = 5
+        while True:
+            margin = self._refresh_margin()
+            if not self.token_expires_at or datetime.now() >= self.token_expires_at - margin:
+                try:
+                    self.refresh()
+                    retry_delay = 5
+                except Exception:
+                    # Back off before retrying; searches fall back to fetching on demand
+                    self.wakeup.wait(retry_delay)
+                    self.wakeup.clear()
+                    retry_delay = min(retry_delay * 2, 300)
+                    continue
+            
+            margin = self._refresh_margin()
+            sleep_for = (self.token_expires_at - margin - datetime.now()).total_seconds()
+            self.wakeup.wait(max(1, sleep_for))
+            self.wakeup.clear()
+    
+    def status(self):
+        """Snapshot of the token state, without touching the network"""
+        with self.lock:
+            return {
+                'has_token': self.has_valid_token(),
+                'token_expires_at': self.token_expires_at.isoformat() if self.token_expires_at else None,
+                'refreshed_at': self.refreshed_at.isoformat() if self.refreshed_at else None,
+                'refresher_running': bool(self.thread and self.thread.is_alive()),
+                'last_error': self.last_error
+            }
+
+
+# Global token manager instance
+token_manager = AmadeusTokenManager("https://api.amadeus.com")
+
 
 class AmadeusAPI:
     def __init__(self):
-        """Initialize Amadeus API client"""
+        """Initialize Amadeus API client
+        
+        The token is fetched by the shared token manager in the background, so
+        constructing a client never blocks on OAuth.
+        """
+        if not config.AMADEUS_CLIENT_ID or not config.AMADEUS_CLIENT_SECRET:
+            raise ValueError("Amadeus credentials not configured")
+        
         self.base_url = "https://api.amadeus.com"
-        self.access_token = None
-        self.token_expires_at = None
-        self.last_request_time = 0
-        self.get_access_token()
+        token_manager.start()
+    
+    @property
+    def access_token(self):
+        return token_manager.access_token
+    
+    @property
+    def token_expires_at(self):
+        return token_manager.token_expires_at
     
     def get_access_token(self):
-        """Get OAuth token for Amadeus API"""
+        """Force a token refresh for Amadeus API"""
+        token_manager.refresh()
+    
+    def ensure_valid_token(self):
+        """Ensure we have a valid access token"""
+        token_manager.get_token()
+    
+    def rate_limit(self):
+        """Wait for a slot in the process-wide Amadeus request budget"""
+        _rate_limiter.acquire()
+    
+    def search_flights(self, brief, route_timings=None, prefetched=None):
+        """Search for flights based on brief criteria
+        
+        The origin/destination/date queries are fanned out over a bounded worker
+        pool. If ``route_timings`` is a list, one timing record per query is
+        appended to it so callers can report per-route latency.
+        """
+        self.ensure_valid_token()
+        
         try:
-            url = f"{self.base_url}/v1/security/oauth2/token"
-            data = {
-                'grant_type': 'client_credentials',
-                'client_id': config.AMADEUS_CLIENT_ID,
-                'client_secret': config.AMADEUS_CLIENT_SECRET
-            }
-            
-            response = requests.post(url, data=data, timeout=30)
-            response.raise_for_status()
+            queries = self.build_flight_queries(brief)
+            deals = []
             
-            token_data = response.json()
-            self.access_token = token_data['access_token']
-            expires_in = token_data.get('expires_in', 3600)
-            self.token_expires_at = datetime.now() + timedelta(seconds=expires_in - 60)
+            for params, flight_data, timing in self.run_flight_queries(queries, prefetched):
+                if route_timings is not None:
+                    route_timings.append(timing)
+                
+                if flight_data is None:
+                    continue
+                
+                flight_deals = self.format_flight_deals(flight_data, brief)
+                deals.extend(flight_deals)
+                logging.info(f"Found {len(flight_deals)} flights for {params['originLocationCode']}->{params['destinationLocationCode']}")
             
-            logging.info("Amadeus access token obtained successfully")
+            return deals[:config.MAX_DEALS_PER_SEARCH]  # Limit total deals
             
         except Exception as e:
-            logging.error(f"Failed to get Amadeus access token: {e}")
-            raise
+            logging.error(f"Error searching flights: {e}")
+            return []
     
-    def ensure_valid_token(self):
-        """Ensure we have a valid access token"""
-        if not self.access_token or (self.token_expires_at and datetime.now() >= self.token_expires_at):
-            self.get_access_token()
+    def build_flight_queries(self, brief):
+        """Expand a brief into the flight-offers query parameters to send"""
+        destinations = self.parse_destinations(brief.get('Destinations', ''))
+        departure_codes = config.FAMILY_PROFILE['home_airports']
+        travel_dates = self.parse_travel_dates(brief.get('Travel_Dates', ''))
+        travelers = self.parse_travelers(brief.get('Travelers', ''))
+        
+        queries = []
+        for dest_code in destinations:
+            for departure_code in departure_codes:
+                for departure_date in travel_dates[:2]:  # Limit to 2 date options
+                    params = {
+                        'originLocationCode': departure_code,
+                        'destinationLocationCode': dest_code,
+                        'departureDate': departure_date.strftime('%Y-%m-%d'),
+                        'adults': travelers['adults'],
+                        'children': travelers['children'],
+                        'max': 5,  # Limit results per search
+                        'currencyCode': 'GBP'
+                    }
+                    
+                    # Add return date if specified
+                    if len(travel_dates) > 1:
+                        params['returnDate'] = travel_dates[1].strftime('%Y-%m-%d')
+                    
+                    queries.append(params)
+        
+        return queries
     
-    def rate_limit(self):
-        """Implement rate limiting"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        min_interval = 60.0 / config.AMADEUS_REQUESTS_PER_MINUTE
+    def run_flight_queries(self, queries, prefetched=None):
+        """Run flight-offers queries concurrently, preserving query order
+        
+        Queries already answered in ``prefetched`` (see prefetch_flight_queries)
+        are not sent again. Returns a list of (params, flight_data, timing)
+        tuples; flight_data is None when the query failed.
+        """
+        prefetched = prefetched or {}
+        keys = [self.flight_cache_key(params) for params in queries]
+        pending = [params for params, key in zip(queries, keys) if key not in prefetched]
+        
+        workers = max(1, min(config.AMADEUS_MAX_WORKERS, len(pending)))
+        if workers == 1:
+            fetched = [self.fetch_flight_offers(params) for params in pending]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='amadeus') as executor:
+                fetched = list(executor.map(self.fetch_flight_offers, pending))
+        fetched = iter(fetched)
         
-        if time_since_last < min_interval:
-            sleep_time = min_interval - time_since_last
-            time.sleep(sleep_time)
+        results = []
+        for params, key in zip(queries, keys):
+            if key in prefetched:
+                flight_data, timing = prefetched[key]
+                timing = dict(timing, coalesced=True)
+            else:
+                flight_data, timing = next(fetched)
+            results.append((params, flight_data, timing))
         
-        self.last_request_time = time.time()
+        return results
     
-    def search_flights(self, brief):
-        """Search for flights based on brief criteria"""
+    def plan_flight_queries(self, briefs):
+        """Collect the unique flight-offers queries needed by a set of briefs
+        
+        Returns ({query_key: params}, number_of_queries_requested).
+        """
+        unique = {}
+        requested = 0
+        for brief in briefs:
+            try:
+                for params in self.build_flight_queries(brief):
+                    requested += 1
+                    unique.setdefault(self.flight_cache_key(params), params)
+            except Exception as e:
+                logging.error(f"Error planning searches for brief {brief.get('Brief_ID', 'Unknown')}: {e}")
+        
+        return unique, requested
+    
+    def prefetch_flight_queries(self, briefs):
+        """Run each unique query needed by ``briefs`` exactly once
+        
+        The result is passed back into search_flights/create_travel_packages as
+        ``prefetched`` so every matching brief reuses the same response.
+        """
+        self.ensure_valid_token()
+        
+        unique, requested = self.plan_flight_queries(briefs)
+        logging.info(f"Search plan: {len(unique)} unique flight queries for {requested} requested across {len(briefs)} briefs")
+        
+        prefetched = {}
+        for params, flight_data, timing in self.run_flight_queries(list(unique.values())):
+            prefetched[self.flight_cache_key(params)] = (flight_data, timing)
+        
+        return prefetched
+    
+    def fetch_flight_offers(self, params):
+        """Run a single flight-offers query, returning (flight_data, timing)"""
+        origin = params['originLocationCode']
+        destination = params['destinationLocationCode']
+        timing = {
+            'origin': origin,
+            'destination': destination,
+            'departure_date': params['departureDate'],
+            'status': None,
+            'offers': 0,
+            'cached': False,
+            'latency': None
+        }
+        
+        cache_key = self.flight_cache_key(params)
+        flight_data = _flight_cache.get(cache_key)
+        if flight_data is not None:
+            timing.update(status=200, offers=len(flight_data.get('data', [])), cached=True, latency=0.0)
+            return flight_data, timing
+        
+        self.rate_limit()
+        started = time.monotonic()
+        
+        try:
+            headers = {
+                'Authorization': f'Bearer {self.access_token}',
+                'Content-Type': 'application/json'
+            }
+            url = f"{self.base_url}/v2/shopping/flight-offers"
+            response = transport.get(url, headers=headers, params=params)
+            timing['status'] = response.status_code
+            
+            if response.status_code == 200:
+                flight_data = response.json()
+                timing['offers'] = len(flight_data.get('data', []))
+                _flight_cache.set(cache_key, flight_data)
+            else:
+                logging.warning(f"Amadeus API error {response.status_code}: {response.text}")
+                
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Request error for {origin}->{destination}: {e}")
+            timing['status'] = 'error'
+        finally:
+            timing['latency'] = round(time.monotonic() - started, 3)
+        
+        return flight_data, timing
+    
+    def flight_cache_key(self, params):
+        """Cache key for a flight-offers query: route, dates, pax and currency"""
+        return ResponseCache.make_key(
+            params['originLocationCode'].upper(),
+            params['destinationLocationCode'].upper(),
+            params['departureDate'],
+            params.get('returnDate'),
+            int(params.get('adults', 0)),
+            int(params.get('children', 0)),
+            params.get('currencyCode', 'GBP'),
+            params.get('max')
+        )
+    
+    @staticmethod
+    def get_cache_stats():
+        """Hit/miss counters for the shared response caches"""
+        return {
+            'flight_offers': _flight_cache.get_stats(),
+            'hotel_offers': _hotel_cache.get_stats(),
+            'hotel_index': hotel_index.get_stats()
+        }
+    
+    def lookup_hotels_by_city(self, city_code):
+        """Fetch the Amadeus by-city hotel list, or None if the call failed"""
         self.ensure_valid_token()
         
         headers = {
             'Authorization': f'Bearer {self.access_token}',
             'Content-Type': 'application/json'
         }
+        params = {
+            'cityCode': city_code,
+            'radius': 20,
+            'radiusUnit': 'KM',
+            'hotelSource': 'ALL'
+        }
         
         try:
-            # Parse brief data
-            destinations = self.parse_destinations(brief.get('Destinations', ''))
-            departure_codes = config.FAMILY_PROFILE['home_airports']
-            travel_dates = self.parse_travel_dates(brief.get('Travel_Dates', ''))
-            travelers = self.parse_travelers(brief.get('Travelers', ''))
-            
-            deals = []
+            self.rate_limit()
+            url = f"{self.base_url}/v1/reference-data/locations/hotels/by-city"
+            response = transport.get(url, headers=headers, params=params)
             
-            for dest_code in destinations:
-                for departure_code in departure_codes:
-                    for departure_date in travel_dates[:2]:  # Limit to 2 date options
-                        self.rate_limit()
-                        
-                        params = {
-                            'originLocationCode': departure_code,
-                            'destinationLocationCode': dest_code,
-                            'departureDate': departure_date.strftime('%Y-%m-%d'),
-                            'adults': travelers['adults'],
-                            'children': travelers['children'],
-                            'max': 5,  # Limit results per search
-                            'currencyCode': 'GBP'
-                        }
-                        
-                        # Add return date if specified
-                        if len(travel_dates) > 1:
-                            params['returnDate'] = travel_dates[1].strftime('%Y-%m-%d')
-                        
-                        try:
-                            url = f"{self.base_url}/v2/shopping/flight-offers"
-                            response = requests.get(url, headers=headers, params=params, timeout=30)
-                            
-                            if response.status_code == 200:
-                                flight_data = response.json()
-                                flight_deals = self.format_flight_deals(flight_data, brief)
-                                deals.extend(flight_deals)
-                                logging.info(f"Found {len(flight_deals)} flights for {departure_code}->{dest_code}")
-                            else:
-                                logging.warning(f"Amadeus API error {response.status_code}: {response.text}")
-                                
-                        except requests.exceptions.RequestException as e:
-                            logging.error(f"Request error for {departure_code}->{dest_code}: {e}")
-                            continue
+            if response.status_code != 200:
+                logging.warning(f"Hotel search by city failed: {response.text}")
+                return None
             
-            return deals[:config.MAX_DEALS_PER_SEARCH]  # Limit total deals
+            return response.json().get('data', [])
             
         except Exception as e:
-            logging.error(f"Error searching flights: {e}")
-            return []
+            logging.error(f"Error looking up hotels for {city_code}: {e}")
+            return None
+    
+    def refresh_hotel_index(self):
+        """Re-fetch stale cities in the hotel reference index"""
+        return hotel_index.refresh_stale(self.lookup_hotels_by_city)
     
     def search_hotels(self, brief, destination_code, check_in_date, check_out_date):
         """Search for hotels using Amadeus Hotel API"""
@@ -122,25 +416,23 @@ class AmadeusAPI:
             'Content-Type': 'application/json'
         }
         
+        # Whole-search cache: a hit skips both the by-city and the offers call
+        cache_key = ResponseCache.make_key(
+            destination_code.upper(),
+            check_in_date.strftime('%Y-%m-%d'),
+            check_out_date.strftime('%Y-%m-%d'),
+            2,  # adults
+            1,  # rooms
+            'GBP'
+        )
+        hotel_data = _hotel_cache.get(cache_key)
+        if hotel_data is not None:
+            return self.format_hotel_deals(hotel_data, brief, destination_code)
+        
         try:
-            # First, search for hotels by city
-            search_params = {
-                'cityCode': destination_code,
-                'radius': 20,
-                'radiusUnit': 'KM',
-                'hotelSource': 'ALL'
-            }
-            
-            self.rate_limit()
-            search_url = f"{self.base_url}/v1/reference-data/locations/hotels/by-city"
-            search_response = requests.get(search_url, headers=headers, params=search_params, timeout=30)
-            
-            if search_response.status_code != 200:
-                logging.warning(f"Hotel search by city failed: {search_response.text}")
-                return []
-            
-            hotel_search_data = search_response.json()
-            hotel_ids = [hotel['hotelId'] for hotel in hotel_search_data.get('data', [])[:10]]  # Get top 10 hotels
+            # Hotel IDs come from the local reference index; Amadeus is only
+            # asked for the by-city list when the city is new or stale
+            hotel_ids = hotel_index.get_hotel_ids(destination_code, self.lookup_hotels_by_city)
             
             if not hotel_ids:
                 logging.info(f"No hotels found in {destination_code}")
@@ -159,10 +451,11 @@ class AmadeusAPI:
             
             self.rate_limit()
             url = f"{self.base_url}/v3/shopping/hotel-offers"
-            response = requests.get(url, headers=headers, params=params, timeout=30)
+            response = transport.get(url, headers=headers, params=params)
             
             if response.status_code == 200:
                 hotel_data = response.json()
+                _hotel_cache.set(cache_key, hotel_data)
                 return self.format_hotel_deals(hotel_data, brief, destination_code)
             else:
                 logging.warning(f"Hotel API error {response.status_code}: {response.text}")
@@ -172,79 +465,119 @@ class AmadeusAPI:
             logging.error(f"Error searching hotels for {destination_code}: {e}")
             return []
     
-    def create_travel_packages(self, brief):
+    def create_travel_packages(self, brief, route_timings=None, prefetched=None):
         """Create complete travel packages combining flights and hotels"""
+        return list(self.iter_travel_packages(brief, route_timings, prefetched))
+    
+    def iter_travel_packages(self, brief, route_timings=None, prefetched=None):
+        """Yield travel packages as soon as both legs for a destination are ready
+        
+        The hotel search for every destination starts straight away and runs
+        alongside the flight searches, so a package is not held back by the
+        slowest destination.
+        """
         try:
-            # Get flight deals
-            flight_deals = self.search_flights(brief)
-            
-            if not flight_deals:
-                logging.info("No flights found, cannot create packages")
-                return []
+            self.ensure_valid_token()
             
-            packages = []
             travel_dates = self.parse_travel_dates(brief.get('Travel_Dates', ''))
+            check_in = travel_dates[0] if travel_dates else datetime.now() + timedelta(days=30)
+            check_out = travel_dates[1] if len(travel_dates) > 1 else check_in + timedelta(days=5)
             
-            # Group flights by destination
-            flights_by_destination = {}
-            for flight in flight_deals:
-                dest = flight['destination']
-                if dest not in flights_by_destination:
-                    flights_by_destination[dest] = []
-                flights_by_destination[dest].append(flight)
-            
-            # Create packages for each destination
-            for destination, destination_flights in flights_by_destination.items():
-                # Get best flight for this destination
-                best_flight = min(destination_flights, key=lambda x: x['total_price'])
-                
-                # Search for hotels
-                check_in = travel_dates[0] if travel_dates else datetime.now() + timedelta(days=30)
-                check_out = travel_dates[1] if len(travel_dates) > 1 else check_in + timedelta(days=5)
+            # Group flight queries by destination
+            queries_by_destination = {}
+            for params in self.build_flight_queries(brief):
+                queries_by_destination.setdefault(params['destinationLocationCode'], []).append(params)
+            
+            if not queries_by_destination:
+                logging.info("No flights found, cannot create packages")
+                return
+            
+            workers = min(2 * len(queries_by_destination), 2 * max(1, config.AMADEUS_MAX_WORKERS))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='amadeus-packages') as executor:
+                futures = {}
+                hotel_futures = {}
+                for destination, queries in queries_by_destination.items():
+                    futures[executor.submit(self.run_flight_queries, queries, prefetched)] = ('flights', destination)
+                    hotel_future = executor.submit(self.search_hotels, brief, destination, check_in, check_out)
+                    futures[hotel_future] = ('hotels', destination)
+                    hotel_futures[destination] = hotel_future
                 
-                hotel_deals = self.search_hotels(brief, destination, check_in, check_out)
+                legs = {destination: {} for destination in queries_by_destination}
                 
-                if hotel_deals:
-                    best_hotel = min(hotel_deals, key=lambda x: x['total_price'])
+                for future in as_completed(futures):
+                    if future.cancelled():
+                        continue
                     
-                    # Create package combining flight + hotel
-                    package = {
-                        'id': f"PKG-{destination}-{best_flight['id'][:8]}",
-                        'type': 'package',
-                        'destination': destination,
-                        'destination_name': self.get_destination_name(destination),
-                        'departure_date': best_flight['departure_date'],
-                        'return_date': best_flight['return_date'],
-                        'duration_nights': (check_out - check_in).days,
-                        
-                        # Flight details
-                        'flight': best_flight,
-                        'flight_price': best_flight['total_price'],
-                        
-                        # Hotel details  
-                        'hotel': best_hotel,
-                        'hotel_name': best_hotel.get('name', 'Premium Hotel'),
-                        'hotel_rating': best_hotel.get('rating', '4+'),
-                        'hotel_price': best_hotel['total_price'],
-                        'room_type': best_hotel.get('room_type', 'Family Room'),
-                        'hotel_amenities': best_hotel.get('amenities', []),
-                        
-                        # Package totals
-                        'total_price': best_flight['total_price'] + best_hotel['total_price'],
-                        'currency': best_flight['currency'],
-                        'savings': self.calculate_savings(best_flight, best_hotel),
+                    leg, destination = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logging.error(f"Error searching {leg} for {destination}: {e}")
+                        result = []
+                    
+                    if leg == 'flights':
+                        flight_deals = []
+                        for params, flight_data, timing in result:
+                            if route_timings is not None:
+                                route_timings.append(timing)
+                            if flight_data is not None:
+                                flight_deals.extend(self.format_flight_deals(flight_data, brief))
+                        result = flight_deals
                         
-                        'brief_id': brief.get('Brief_ID', ''),
-                        'found_at': datetime.now().isoformat()
-                    }
-                    packages.append(package)
+                        # No flights means no package, so skip the hotel search if it hasn't started
+                        if not flight_deals:
+                            hotel_futures[destination].cancel()
+                    
+                    legs[destination][leg] = result
+                    if len(legs[destination]) < 2:
+                        continue
+                    
+                    flight_deals = legs[destination]['flights']
+                    hotel_deals = legs[destination]['hotels']
+                    if not flight_deals or not hotel_deals:
+                        logging.info(f"No package for {destination}: {len(flight_deals)} flights, {len(hotel_deals)} hotels")
+                        continue
+                    
+                    best_flight = min(flight_deals, key=lambda x: x['total_price'])
+                    best_hotel = min(hotel_deals, key=lambda x: x['total_price'])
+                    package = self.build_package(brief, destination, best_flight, best_hotel, check_in, check_out)
                     logging.info(f"Created package for {destination}: £{package['total_price']}")
-            
-            return packages
+                    yield package
             
         except Exception as e:
             logging.error(f"Error creating travel packages: {e}")
-            return []
+    
+    def build_package(self, brief, destination, best_flight, best_hotel, check_in, check_out):
+        """Combine the best flight and hotel for a destination into a package"""
+        return {
+            'id': f"PKG-{destination}-{best_flight['id'][:8]}",
+            'type': 'package',
+            'destination': destination,
+            'destination_name': self.get_destination_name(destination),
+            'departure_date': best_flight['departure_date'],
+            'return_date': best_flight['return_date'],
+            'duration_nights': (check_out - check_in).days,
+            
+            # Flight details
+            'flight': best_flight,
+            'flight_price': best_flight['total_price'],
+            
+            # Hotel details  
+            'hotel': best_hotel,
+            'hotel_name': best_hotel.get('name', 'Premium Hotel'),
+            'hotel_rating': best_hotel.get('rating', '4+'),
+            'hotel_price': best_hotel['total_price'],
+            'room_type': best_hotel.get('room_type', 'Family Room'),
+            'hotel_amenities': best_hotel.get('amenities', []),
+            
+            # Package totals
+            'total_price': best_flight['total_price'] + best_hotel['total_price'],
+            'currency': best_flight['currency'],
+            'savings': self.calculate_savings(best_flight, best_hotel),
+            
+            'brief_id': brief.get('Brief_ID', ''),
+            'found_at': datetime.now().isoformat()
+        }
     
     def format_hotel_deals(self, hotel_data, brief, destination_code):
         """Format hotel API response into standardized format"""
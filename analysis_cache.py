@@ -0,0 +1,58 @@
+import config
+from response_cache import ResponseCache
+
+# Brief fields that change how a deal is scored (Brief_ID deliberately excluded,
+# so briefs with the same preferences share analyses)
+BRIEF_SCORING_FIELDS = ('Destinations', 'Budget_Max', 'Travel_Dates', 'Trip_Duration',
+                        'Travelers', 'AI_Instructions', 'Notes')
+
+# Fallback analyses returned by the analyzers on errors; never cached
+FAILED_ASSESSMENTS = ('Analysis failed', 'Parse error')
+
+_analysis_cache = ResponseCache(
+    'analysis',
+    config.AI_ANALYSIS_CACHE_TTL_SECONDS,
+    config.AI_ANALYSIS_CACHE_MAX_ENTRIES,
+    persistent=True
+)
+
+
+def analysis_cache_key(deal, brief):
+    """Content hash of the offer and the brief context used to score it"""
+    flight = deal.get('flight') or deal
+    price = deal.get('total_price')
+
+    return ResponseCache.make_key(
+        deal.get('type', 'flight'),
+        flight.get('origin'),
+        deal.get('destination'),
+        deal.get('departure_date'),
+        deal.get('return_date'),
+        flight.get('departure_time'),
+        flight.get('return_time'),
+        flight.get('airline'),
+        flight.get('stops'),
+        flight.get('duration'),
+        round(float(price), 2) if price is not None else None,
+        deal.get('currency'),
+        deal.get('hotel_name'),
+        deal.get('hotel_price'),
+        [str(brief.get(field, '')).strip().lower() for field in BRIEF_SCORING_FIELDS]
+    )
+
+
+def get_cached_analysis(deal, brief):
+    """Return a previously stored analysis for this deal and brief, or None"""
+    return _analysis_cache.get(analysis_cache_key(deal, brief))
+
+
+def store_analysis(deal, brief, analysis):
+    """Cache a successful analysis"""
+    if analysis.get('value_assessment') in FAILED_ASSESSMENTS:
+        return
+    _analysis_cache.set(analysis_cache_key(deal, brief), analysis)
+
+
+def get_analysis_cache_stats():
+    """Hit/miss counters for the analysis cache"""
+    return _analysis_cache.get_stats()
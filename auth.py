@@ -1,12 +1,13 @@
 """Secure authentication system for Travel AiGent with GDPR compliance."""
 import os
 import secrets
+import threading
 import time
 import logging
 from typing import Optional
 from datetime import datetime, timedelta
 
-from flask import session, request, jsonify, redirect, url_for
+from flask import g, session, request, jsonify, redirect, url_for
 from functools import wraps
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
@@ -18,6 +19,11 @@ class SimpleAuth:
     def __init__(self, app=None):
         self.app = app
         self.ph = PasswordHasher()
+        
+        # Optional process-wide cache of user rows (user_id -> (expires_at, column values))
+        self.user_cache = {}
+        self.user_cache_lock = threading.Lock()
+        self.user_cache_ttl = int(os.environ.get("AUTH_USER_CACHE_TTL_SECONDS", "0"))
         if app is not None:
             self.init_app(app)
     
@@ -42,6 +48,13 @@ class SimpleAuth:
         app.config.setdefault("SESSION_COOKIE_SECURE", True)  # HTTPS only
         app.config.setdefault("SESSION_COOKIE_HTTPONLY", True)  # No JS access
         app.config.setdefault("SESSION_COOKIE_SAMESITE", "Lax")  # CSRF protection
+        
+        # Drop cached users as soon as this process changes or deletes them
+        from sqlalchemy import event
+        from travel_aigent.models import User
+        for event_name in ('after_update', 'after_delete'):
+            if not event.contains(User, event_name, self._on_user_changed):
+                event.listen(User, event_name, self._on_user_changed)
     
     def _hash_password(self, password: str) -> str:
         """Hash password with Argon2."""
@@ -87,10 +100,12 @@ class SimpleAuth:
         session['login_time'] = time.time()
         if user_id:
             session['user_id'] = user_id
+        g.pop('current_user', None)
     
     def logout(self) -> None:
         """Log out user and clear session."""
         session.clear()
+        g.pop('current_user', None)
     
     def is_authenticated(self) -> bool:
         """Check if current user is authenticated."""
@@ -106,10 +121,20 @@ class SimpleAuth:
         return True
     
     def get_current_user(self):
-        """Get current user object, creating placeholder if needed."""
+        """Get current user object, creating placeholder if needed.
+        
+        The user is loaded at most once per request and kept on ``flask.g``,
+        so routes can call this freely.
+        """
         if not self.is_authenticated():
             return None
-            
+        
+        if 'current_user' not in g:
+            g.current_user = self._load_current_user()
+        return g.current_user
+    
+    def _load_current_user(self):
+        """Look up the session's user, by primary key when the session has it."""
         username = session.get('username')
         if not username:
             return None
@@ -117,7 +142,16 @@ class SimpleAuth:
         # Try to get user from database
         try:
             from travel_aigent.models import User, db
-            user = User.query.filter_by(username=username).first()
+            user_id = session.get('user_id')
+            user = self._get_cached_user(user_id, username)
+            if user is not None:
+                return user
+            
+            user = db.session.get(User, user_id) if user_id else None
+            if user is not None and user.username != username:
+                user = None
+            if user is None:
+                user = User.query.filter_by(username=username).first()
             
             # If no user found, try to create admin user if it's the admin
             if not user and username == 'admin':
@@ -166,12 +200,50 @@ class SimpleAuth:
             if not user:
                 logging.warning(f"User {username} not found in database")
                 return None
+            
+            if isinstance(user, User):
+                # Later requests of this session look the user up by primary key
+                if session.get('user_id') != user.id:
+                    session['user_id'] = user.id
+                self._cache_user(user)
                 
             return user
         except Exception as e:
             logging.error(f"Error getting current user: {e}")
             return None
     
+    def _get_cached_user(self, user_id, username):
+        """User from the process cache, attached to this request's session without a query."""
+        if self.user_cache_ttl <= 0 or not user_id:
+            return None
+        
+        with self.user_cache_lock:
+            entry = self.user_cache.get(user_id)
+        if not entry or entry[0] < time.time() or entry[1].get('username') != username:
+            return None
+        
+        from sqlalchemy.orm import make_transient_to_detached
+        from travel_aigent.models import User, db
+        user = User(**entry[1])
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+    
+    def _cache_user(self, user):
+        if self.user_cache_ttl <= 0:
+            return
+        
+        values = {column.key: getattr(user, column.key) for column in user.__table__.columns}
+        with self.user_cache_lock:
+            self.user_cache[user.id] = (time.time() + self.user_cache_ttl, values)
+    
+    def invalidate_user(self, user_id) -> None:
+        """Forget a cached user, e.g. after a profile update."""
+        with self.user_cache_lock:
+            self.user_cache.pop(user_id, None)
+    
+    def _on_user_changed(self, mapper, connection, user):
+        self.invalidate_user(user.id)
+    
     def require_auth(self, f):
         """Decorator to require authentication for routes."""
         @wraps(f)
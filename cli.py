@@ -18,7 +18,8 @@ ROOT = Path(__file__).resolve().parent
 sys.path.append(str(ROOT))
 
 from travel_aigent import create_app  # noqa: E402  pylint: disable=wrong-import-position
-from travel_agent import TravelAgent  # noqa: E402  pylint: disable=wrong-import-position
+from provider_health import provider_health  # noqa: E402  pylint: disable=wrong-import-position
+from service_registry import get_agent, services  # noqa: E402  pylint: disable=wrong-import-position
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
 
@@ -35,6 +36,8 @@ def cli() -> None:
 def web(host: str, port: int, debug: bool) -> None:  # noqa: D401
     """Start the Flask web server."""
     app = create_app()
+    services.warmup()
+    provider_health.start(app=app)
     app.run(host=host, port=port, debug=debug)
 
 
@@ -42,11 +45,12 @@ def web(host: str, port: int, debug: bool) -> None:  # noqa: D401
 @click.option("--loop", default=False, is_flag=True, help="Run deal search loop forever.")
 def scheduler(loop: bool) -> None:  # noqa: D401
     """Run the deal-search scheduler once or continuously."""
-    agent = TravelAgent()
+    agent = get_agent()
     if loop:
         import schedule, time  # local import to avoid startup cost if unused
 
         schedule.every().hours.at(":00").do(agent.run_deal_search)
+        schedule.every().day.at("03:00").do(agent.refresh_reference_data)
         logging.info("Scheduler started; press Ctrl-C to exit.")
         while True:  # noqa: PLW0127
             schedule.run_pending()
@@ -29,5 +29,83 @@ FAMILY_PROFILE = {
 }
 
 # Rate Limiting
-AMADEUS_REQUESTS_PER_MINUTE = 10
+AMADEUS_REQUESTS_PER_MINUTE = int(os.getenv("AMADEUS_REQUESTS_PER_MINUTE", "10"))
+AMADEUS_BURST = int(os.getenv("AMADEUS_BURST", "2"))
+AMADEUS_TOKEN_REFRESH_MARGIN = int(os.getenv("AMADEUS_TOKEN_REFRESH_MARGIN", "300"))
 OPENAI_REQUESTS_PER_MINUTE = 20
+
+# Concurrent Amadeus searches (set AMADEUS_MAX_WORKERS=1 for the old sequential behaviour)
+AMADEUS_MAX_WORKERS = int(os.getenv("AMADEUS_MAX_WORKERS", "4"))
+
+# Outbound HTTP transport (shared keep-alive sessions for provider APIs)
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.5"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+
+# Per-host overrides of the defaults above
+HTTP_HOST_POLICIES = {
+    "api.amadeus.com": {"read_timeout": 30, "pool_maxsize": max(HTTP_POOL_MAXSIZE, AMADEUS_MAX_WORKERS)},
+    "api.telegram.org": {"read_timeout": 15},
+    "www.gov.uk": {"read_timeout": 10, "pool_maxsize": 2},
+}
+
+# Amadeus response cache (shared across briefs and users)
+AMADEUS_CACHE_TTL_SECONDS = int(os.getenv("AMADEUS_CACHE_TTL_SECONDS", "900"))
+AMADEUS_CACHE_MAX_ENTRIES = int(os.getenv("AMADEUS_CACHE_MAX_ENTRIES", "500"))
+AMADEUS_CACHE_PERSISTENT = os.getenv("AMADEUS_CACHE_PERSISTENT", "false").lower() == "true"
+CACHE_PERSISTENT_MAX_ENTRIES = int(os.getenv("CACHE_PERSISTENT_MAX_ENTRIES", "5000"))
+
+# Hotel reference index (cityCode -> hotel IDs), refreshed on a slow schedule
+HOTEL_INDEX_MAX_AGE_DAYS = int(os.getenv("HOTEL_INDEX_MAX_AGE_DAYS", "7"))
+HOTEL_INDEX_HOTELS_PER_CITY = int(os.getenv("HOTEL_INDEX_HOTELS_PER_CITY", "10"))
+
+# Deal pipeline (fetch -> dedup -> analyze -> persist -> notify)
+# Persist saves all of a brief's deals in one transaction after analysis
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "20"))
+PIPELINE_ANALYZE_WORKERS = int(os.getenv("PIPELINE_ANALYZE_WORKERS", "4"))
+PIPELINE_NOTIFY_WORKERS = int(os.getenv("PIPELINE_NOTIFY_WORKERS", "2"))
+
+# AI analysis: deals for the same brief scored per LLM request
+AI_BATCH_SIZE = int(os.getenv("AI_BATCH_SIZE", "5"))
+
+# AI analysis cache: identical deal + brief context is not re-scored within the TTL
+AI_ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("AI_ANALYSIS_CACHE_TTL_SECONDS", "86400"))
+AI_ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("AI_ANALYSIS_CACHE_MAX_ENTRIES", "1000"))
+
+# Rule-based pre-scoring: only the top K deals per brief go to the LLM (0 sends all)
+AI_PRESCORE_TOP_K = int(os.getenv("AI_PRESCORE_TOP_K", "5"))
+AI_PRESCORE_MAX_STOPS = int(os.getenv("AI_PRESCORE_MAX_STOPS", "2"))
+AI_PRESCORE_DATE_TOLERANCE_DAYS = int(os.getenv("AI_PRESCORE_DATE_TOLERANCE_DAYS", "3"))
+
+# LLM client shared by both analyzers (process-wide limits, retry and failover)
+AI_ANTHROPIC_MODEL = os.getenv("AI_ANTHROPIC_MODEL", "claude-3-sonnet-20240229")
+AI_OPENAI_MODEL = os.getenv("AI_OPENAI_MODEL", "gpt-4o")
+AI_REQUESTS_PER_MINUTE = int(os.getenv("AI_REQUESTS_PER_MINUTE", str(OPENAI_REQUESTS_PER_MINUTE)))
+AI_TOKENS_PER_MINUTE = int(os.getenv("AI_TOKENS_PER_MINUTE", "40000"))
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "3"))
+AI_RETRY_BACKOFF = float(os.getenv("AI_RETRY_BACKOFF", "2.0"))
+# Anthropic and OpenAI only cache prompt prefixes of at least this many tokens
+AI_PROMPT_CACHE_MIN_TOKENS = int(os.getenv("AI_PROMPT_CACHE_MIN_TOKENS", "1024"))
+
+# Deals logged within this window are treated as duplicates
+DEDUP_WINDOW_HOURS = int(os.getenv("DEDUP_WINDOW_HOURS", "24"))
+
+# Buffered Google Sheets writes (flushed at cycle end or when a threshold is hit)
+SHEETS_FLUSH_ROWS = int(os.getenv("SHEETS_FLUSH_ROWS", "50"))
+SHEETS_FLUSH_SECONDS = int(os.getenv("SHEETS_FLUSH_SECONDS", "60"))
+SHEETS_MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "3"))
+SHEETS_RETRY_BACKOFF = float(os.getenv("SHEETS_RETRY_BACKOFF", "5"))
+SHEETS_METADATA_TTL_SECONDS = int(os.getenv("SHEETS_METADATA_TTL_SECONDS", "3600"))
+
+# Background export of new database deals to the Sheets deal history
+SHEETS_MIRROR_INTERVAL_SECONDS = int(os.getenv("SHEETS_MIRROR_INTERVAL_SECONDS", "300"))
+SHEETS_MIRROR_BATCH_SIZE = int(os.getenv("SHEETS_MIRROR_BATCH_SIZE", "200"))
+# Deals younger than this aren't exported yet, so lower ids still committing aren't skipped
+SHEETS_MIRROR_SETTLE_SECONDS = int(os.getenv("SHEETS_MIRROR_SETTLE_SECONDS", "60"))
+
+# Background provider health probes served by the dashboard and /api/status
+HEALTH_PROBE_INTERVAL_SECONDS = int(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", "60"))
+HEALTH_PROBE_TIMEOUT_SECONDS = int(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", "5"))
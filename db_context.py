@@ -0,0 +1,19 @@
+from contextlib import contextmanager
+
+
+@contextmanager
+def app_context():
+    """Run database work inside a Flask app context, pushing one if needed
+
+    Web requests already have a context; scheduler and background threads
+    do not, so they borrow the global app from app.py.
+    """
+    from flask import has_app_context
+
+    if has_app_context():
+        yield
+        return
+
+    import app
+    with app.app.app_context():
+        yield
@@ -0,0 +1,206 @@
+import json
+import logging
+
+# Columns of the compact deal table sent to the model
+DEAL_TABLE_COLUMNS = ('#', 'type', 'route', 'depart', 'return', 'price', 'pp', 'airline', 'stops',
+                      'duration', 'class', 'seats', 'hotel')
+
+
+class DealAnalyzer:
+    """Prompt builders and response parsing shared by the Claude and OpenAI analyzers"""
+    
+    def build_system_prompt(self, brief):
+        """Static family and brief context, sent as the system prefix
+        
+        It is identical for every deal of a brief, but at around 500 tokens it
+        is below the providers' 1024-token prompt caching minimum, so it is
+        billed in full on every call.
+        """
+        return f"""You analyze travel deals for the Lefley family and provide a detailed assessment of each.
+{self.build_family_context(brief)}
+{self.build_brief_context(brief)}
+
+Rate each deal from 1-10 considering:
+1. Value for money compared to typical prices for this route
+2. Family suitability (considering children ages 13 and 10)
+3. Alignment with stated preferences and requirements
+4. Practical considerations (flight times, connections, total travel time)
+5. Seasonal timing and destination appeal
+6. Budget alignment
+
+Deals are given as a pipe-separated table, one row per deal, with columns:
+{'|'.join(DEAL_TABLE_COLUMNS)}
+Prices are in GBP; pp is the price per person; "-" means not available."""
+    
+    def build_family_context(self, brief):
+        """Build comprehensive family context for AI analysis"""
+        travelers = self.parse_travelers(brief.get('Travelers', ''))
+        
+        context = f"""
+Family Profile: The Lefley Family from Wimbledon Park, London
+- Parents: Jonathan (53) and Belinda (46) - experienced travelers
+- Children: Martha (13) and Margot (10) - both always travel with family
+- Optional: Tabitha (17) - rarely joins family holidays
+- Current trip configuration: {travelers['total']} people total
+
+Travel Preferences:
+- Home airports: Heathrow (preferred), Gatwick, Stansted
+- Previous successful trips: Dubai (loved), Rome city break (enjoyed)
+- School constraints: Must work around Ricards Lodge High School holidays
+- Family priorities: Educational value, reasonable travel times, child-friendly activities
+
+Practical Considerations:
+- Budget-conscious but willing to pay for quality family experiences
+- Prefer direct flights or minimal connections when traveling with children
+- Need family-friendly accommodations and activities
+- Consider meal times and children's schedules
+- Value destinations with mix of culture, history, and fun activities
+"""
+        return context
+    
+    def build_brief_context(self, brief):
+        """Build travel brief context for analysis"""
+        return f"""Travel Brief Context:
+- Brief ID: {brief.get('Brief_ID', 'N/A')}
+- Preferred destinations: {brief.get('Destinations', 'N/A')}
+- Budget limit: £{brief.get('Budget_Max', 'N/A')}
+- Travel dates: {brief.get('Travel_Dates', 'N/A')}
+- Trip duration: {brief.get('Trip_Duration', 'N/A')}
+- Travelers: {brief.get('Travelers', 'N/A')}
+- Special requirements: {brief.get('AI_Instructions', 'None specified')}
+- Additional notes: {brief.get('Notes', 'None')}"""
+    
+    def build_deals_table(self, deals, brief):
+        """Encode deals as compact pipe-separated rows instead of prose"""
+        rows = ['|'.join(DEAL_TABLE_COLUMNS)]
+        travelers = self.parse_travelers(brief.get('Travelers', ''))['total']
+        
+        for index, deal in enumerate(deals, start=1):
+            flight = deal.get('flight') or deal
+            price = deal.get('total_price')
+            values = [
+                index,
+                deal.get('type', 'flight'),
+                f"{flight.get('origin', '?')}-{deal.get('destination', '?')}",
+                f"{deal.get('departure_date', '-')} {flight.get('departure_time', '')}".strip(),
+                f"{deal.get('return_date', '-')} {flight.get('return_time', '')}".strip(),
+                price,
+                round(price / travelers) if price and travelers else None,
+                flight.get('airline'),
+                flight.get('stops'),
+                flight.get('duration'),
+                flight.get('booking_class'),
+                flight.get('seats_available'),
+                deal.get('hotel_name')
+            ]
+            rows.append('|'.join('-' if value is None or value == '' else str(value) for value in values))
+        
+        return '\n'.join(rows)
+    
+    def failed_analysis(self):
+        """Low-score placeholder used when a deal couldn't be analyzed"""
+        return {
+            'score': 1,
+            'recommendation': 'IGNORE',
+            'value_assessment': 'Analysis failed',
+            'family_suitability': 'Unable to assess',
+            'key_pros': ['Analysis unavailable'],
+            'key_cons': ['Technical error occurred'],
+            'action_summary': 'Deal analysis failed - manual review required'
+        }
+    
+    def log_usage(self, response, deal_count):
+        """Log token counts per call so cost per deal can be tracked"""
+        logging.info(
+            f"{response['provider']} usage for {deal_count} deal(s): "
+            f"input={response['input_tokens']} (cached={response.get('cached_input_tokens', 0)}) "
+            f"output={response['output_tokens']}"
+        )
+    
+    def parse_batch_response(self, response_content, expected):
+        """Parse a batch response into one analysis dict per deal, or None"""
+        try:
+            start = response_content.find('[')
+            end = response_content.rfind(']') + 1
+            items = json.loads(response_content[start:end] if start >= 0 and end > start else response_content)
+            if isinstance(items, dict):
+                items = items.get('analyses')
+        except json.JSONDecodeError as e:
+            logging.error(f"Failed to parse batch response as JSON: {e}")
+            return None
+        
+        if not isinstance(items, list) or len(items) != expected or not all(isinstance(item, dict) for item in items):
+            logging.error(f"Batch response has {len(items) if isinstance(items, list) else 'no'} analyses, expected {expected}")
+            return None
+        
+        # Order by deal_index when the model provides it
+        if all(isinstance(item.get('deal_index'), int) for item in items):
+            if sorted(item['deal_index'] for item in items) == list(range(1, expected + 1)):
+                items = sorted(items, key=lambda item: item['deal_index'])
+        
+        return items
+    
+    def validate_analysis(self, analysis):
+        """Validate and sanitize analysis results"""
+        # Ensure required fields exist with defaults
+        validated = {
+            'score': max(1, min(10, int(analysis.get('score', 1)))),
+            'recommendation': analysis.get('recommendation', 'IGNORE'),
+            'value_assessment': str(analysis.get('value_assessment', 'Not assessed'))[:200],
+            'family_suitability': str(analysis.get('family_suitability', 'Not assessed'))[:200],
+            'key_pros': analysis.get('key_pros', ['Not specified'])[:5],  # Max 5 pros
+            'key_cons': analysis.get('key_cons', ['Not specified'])[:5],  # Max 5 cons
+            'action_summary': str(analysis.get('action_summary', 'No recommendation'))[:300]
+        }
+        
+        # Validate recommendation values
+        valid_recommendations = ['BOOK_NOW', 'WATCH', 'IGNORE']
+        if validated['recommendation'] not in valid_recommendations:
+            validated['recommendation'] = 'IGNORE'
+        
+        # Ensure lists are actually lists
+        if not isinstance(validated['key_pros'], list):
+            validated['key_pros'] = ['Not specified']
+        if not isinstance(validated['key_cons'], list):
+            validated['key_cons'] = ['Not specified']
+        
+        return validated
+    
+    def parse_travelers(self, travelers_str):
+        """Parse travelers string - reuse from amadeus_api"""
+        try:
+            result = {'adults': 2, 'children': 2, 'total': 4}
+            
+            if not travelers_str:
+                return result
+            
+            travelers_str = travelers_str.lower()
+            
+            if 'adult' in travelers_str:
+                import re
+                adults_match = re.search(r'(\d+)\s*adult', travelers_str)
+                if adults_match:
+                    result['adults'] = int(adults_match.group(1))
+            
+            if 'child' in travelers_str:
+                import re
+                children_match = re.search(r'(\d+)\s*child', travelers_str)
+                if children_match:
+                    result['children'] = int(children_match.group(1))
+            
+            if 'people' in travelers_str:
+                import re
+                people_match = re.search(r'(\d+)\s*people', travelers_str)
+                if people_match:
+                    total = int(people_match.group(1))
+                    if total == 5:
+                        result = {'adults': 2, 'children': 3, 'total': 5}
+                    else:
+                        result['total'] = total
+            
+            result['total'] = result['adults'] + result['children']
+            return result
+            
+        except Exception as e:
+            logging.error(f"Error parsing travelers '{travelers_str}': {e}")
+            return {'adults': 2, 'children': 2, 'total': 4}
@@ -0,0 +1,110 @@
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+
+import config
+from db_context import app_context
+
+
+def deal_fingerprint(deal):
+    """Stable identity of an offer: same route, dates, carrier/hotel and price
+
+    Used with the brief ID as the unique key of a saved Deal, so saving the
+    same offer again (e.g. a retried batch) doesn't insert a second row.
+    """
+    flight = deal.get('flight') or {}
+    try:
+        price = f"{float(deal.get('total_price')):.2f}"
+    except (TypeError, ValueError):
+        price = str(deal.get('total_price'))
+
+    parts = [
+        deal.get('type', ''),
+        deal.get('origin') or flight.get('origin', ''),
+        deal.get('destination', ''),
+        deal.get('departure_date', ''),
+        deal.get('return_date', ''),
+        deal.get('airline') or flight.get('airline', ''),
+        deal.get('hotel_name', ''),
+        price
+    ]
+    return hashlib.sha1('|'.join(str(part or '') for part in parts).encode()).hexdigest()
+
+
+class DealHistory:
+    """Recent deal history served from the Deal table
+
+    The database is the system of record for deals; Google Sheets only gets
+    an asynchronous copy (see sheets_mirror). Dedup checks are answered from
+    an in-memory index, loaded on first use and refreshed each search cycle.
+    Deals of sheet-only briefs have no Deal row, so they live only in the
+    index; a reload merges into it instead of replacing it.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.loaded = False
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def dedup_key(destination, departure_date, total_price):
+        """Normalize a deal's identity so saved rows and deal dicts compare equal"""
+        try:
+            price = round(float(total_price), 2)
+        except (TypeError, ValueError):
+            price = str(total_price)
+        return (str(destination or ''), str(departure_date or ''), price)
+
+    @classmethod
+    def deal_key(cls, deal):
+        """Dedup key for a deal dict"""
+        return cls.dedup_key(deal.get('destination'), deal.get('departure_date'), deal.get('total_price'))
+
+    def load(self):
+        """Merge deals saved within the dedup window from the database into the index"""
+        try:
+            from travel_aigent.models import Deal
+
+            cutoff = datetime.utcnow() - timedelta(hours=config.DEDUP_WINDOW_HOURS)
+            with app_context():
+                rows = Deal.query.with_entities(
+                    Deal.destination, Deal.departure_date, Deal.price, Deal.created_at
+                ).filter(Deal.created_at > cutoff).all()
+
+            with self.lock:
+                # Keep recorded deals that have no row (sheet-only briefs); drop expired ones
+                index = {key: saved_at for key, saved_at in self.index.items() if saved_at > cutoff}
+                for destination, departure_date, price, created_at in rows:
+                    date = departure_date.strftime('%Y-%m-%d') if departure_date else ''
+                    key = self.dedup_key(destination, date, price)
+                    index[key] = max(created_at, index.get(key, created_at))
+                self.index = index
+                self.loaded = True
+
+            logging.info(f"Deal history loaded: {len(index)} deals from the last {config.DEDUP_WINDOW_HOURS}h")
+
+        except Exception as e:
+            logging.error(f"Error loading deal history: {e}")
+
+    def ensure_loaded(self):
+        """Load the index on first use, e.g. for searches started from the web"""
+        if not self.loaded:
+            self.load()
+
+    def record(self, deal, saved_at=None):
+        """Add a just-saved deal to the dedup index"""
+        with self.lock:
+            self.index[self.deal_key(deal)] = saved_at or datetime.utcnow()
+
+    def is_duplicate(self, deal):
+        """True if the same deal was saved within the dedup window"""
+        self.ensure_loaded()
+        cutoff = datetime.utcnow() - timedelta(hours=config.DEDUP_WINDOW_HOURS)
+        with self.lock:
+            saved_at = self.index.get(self.deal_key(deal))
+        return saved_at is not None and saved_at > cutoff
+
+
+# Global deal history instance
+deal_history = DealHistory()
@@ -0,0 +1,168 @@
+import logging
+import queue
+import threading
+import time
+
+# Marks the end of the stream on a stage's inbound queue
+_DONE = object()
+
+
+class Stage:
+    """One step of a DealPipeline
+
+    ``func(item)`` returns the item to pass downstream, or None to drop it
+    (e.g. a duplicate). Each stage runs ``workers`` threads that pull from a
+    bounded inbound queue, so a slow stage fills its queue and makes the
+    stages upstream of it wait instead of sleeping for a fixed time.
+
+    When ``batch_size`` is given, ``func`` receives a list of up to that many
+    items (waiting at most ``batch_wait`` seconds for a batch to fill) and
+    returns a list of the same length, with None for dropped items. If it
+    raises, the items are retried one at a time, so a bad item only costs
+    itself. A ``gather`` stage is a barrier: it receives every item at once
+    after the upstream stage has finished, for decisions that need the whole
+    set. Nothing passes a barrier until the source is exhausted, so the
+    stages after it no longer overlap the fetch.
+    """
+
+    def __init__(self, name, func, workers=1, batch_size=None, batch_wait=0.5, gather=False):
+        self.name = name
+        self.func = func
+        self.workers = 1 if gather else max(1, workers)
+        self.gather = gather
+        self.batched = gather or batch_size is not None
+        self.batch_size = max(1, batch_size or 1)
+        self.batch_wait = batch_wait
+
+
+class DealPipeline:
+    """Streams deals through fetch -> dedup -> prescore -> analyze -> persist -> notify"""
+
+    def __init__(self, stages, queue_size=20):
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.stats_lock = threading.Lock()
+        self.stats = {stage.name: {'processed': 0, 'dropped': 0, 'errors': 0, 'busy_seconds': 0.0}
+                      for stage in stages}
+
+    def run(self, source):
+        """Feed every item of ``source`` through the stages
+
+        ``source`` may be a generator (such as AmadeusAPI.iter_travel_packages)
+        so deals enter the pipeline while later searches are still running.
+        Returns the items that made it out of the last stage.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        results = []
+        results_lock = threading.Lock()
+        threads = []
+
+        for index, stage in enumerate(self.stages):
+            inbound = queues[index]
+            outbound = queues[index + 1] if index + 1 < len(self.stages) else None
+            remaining = [stage.workers]
+            remaining_lock = threading.Lock()
+
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(stage, inbound, outbound, results, results_lock, remaining, remaining_lock),
+                    name=f"pipeline-{stage.name}-{n}",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for item in source:
+                queues[0].put(item)  # Blocks while the first stage is saturated
+        except Exception as e:
+            logging.error(f"Error producing items for deal pipeline: {e}")
+        finally:
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_DONE)
+
+        for thread in threads:
+            thread.join()
+
+        return results
+
+    def _work(self, stage, inbound, outbound, results, results_lock, remaining, remaining_lock):
+        done = False
+        while not done:
+            item = inbound.get()
+            if item is _DONE:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + stage.batch_wait
+            while stage.gather or len(batch) < stage.batch_size:
+                try:
+                    timeout = None if stage.gather else max(0, deadline - time.monotonic())
+                    item = inbound.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+
+            started = time.monotonic()
+            try:
+                if stage.batched:
+                    outputs = stage.func(batch)
+                else:
+                    outputs = [stage.func(batch[0])]
+            except Exception as e:
+                logging.error(f"Error in pipeline stage '{stage.name}': {e}")
+                if not stage.batched or len(batch) == 1:
+                    self._count(stage.name, 'errors', len(batch), started)
+                    continue
+                # One bad item shouldn't cost the rest of the batch
+                outputs = self._retry_items(stage, batch)
+
+            self._count(stage.name, 'dropped', sum(1 for output in outputs if output is None), started)
+            for output in outputs:
+                if output is None:
+                    continue
+
+                self._count(stage.name, 'processed', 1)
+                if outbound is not None:
+                    outbound.put(output)
+                else:
+                    with results_lock:
+                        results.append(output)
+
+        # The last worker of a stage to finish closes the next stage
+        with remaining_lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last and outbound is not None:
+            next_stage = self.stages[self.stages.index(stage) + 1]
+            for _ in range(next_stage.workers):
+                outbound.put(_DONE)
+
+    def _retry_items(self, stage, batch):
+        """Run a failed batch again one item at a time; items that still fail count as errors"""
+        outputs = []
+        for item in batch:
+            try:
+                outputs.extend(stage.func([item]))
+            except Exception as e:
+                logging.error(f"Error in pipeline stage '{stage.name}': {e}")
+                self._count(stage.name, 'errors', 1)
+        return outputs
+
+    def _count(self, stage_name, counter, count, started=None):
+        with self.stats_lock:
+            self.stats[stage_name][counter] += count
+            if started is not None:
+                self.stats[stage_name]['busy_seconds'] += time.monotonic() - started
+
+    def get_stats(self):
+        """Per-stage processed/dropped/error counts and time spent"""
+        with self.stats_lock:
+            stats = {name: dict(counters) for name, counters in self.stats.items()}
+        for counters in stats.values():
+            counters['busy_seconds'] = round(counters['busy_seconds'], 3)
+        return stats
@@ -0,0 +1,158 @@
+import logging
+import re
+
+import pandas as pd
+from dateutil import parser as date_parser
+
+import config
+
+# Heuristic weights; together they map to a 1-10 score
+WEIGHTS = {
+    'price': 0.4,
+    'stops': 0.2,
+    'duration': 0.15,
+    'dates': 0.25
+}
+
+
+def parse_budget(budget):
+    """Budget_Max as a float, or None if the brief has no usable budget"""
+    try:
+        value = float(re.sub(r'[^\d.]', '', str(budget or '')))
+        return value if value > 0 else None
+    except ValueError:
+        return None
+
+
+def parse_date_window(dates_str):
+    """(start, end) timestamps for a brief's Travel_Dates, or (None, None)"""
+    if not dates_str:
+        return None, None
+
+    try:
+        parts = re.split(r'\s+-\s+|\s+to\s+', dates_str.strip())
+        start = date_parser.parse(parts[0])
+        end = start
+        if len(parts) > 1:
+            end_part = parts[1]
+            if not re.search(r'\d{4}', end_part):  # No year in end date
+                end_part += f' {start.year}'
+            end = date_parser.parse(end_part)
+            if not re.search(r'\d{4}', parts[0]):  # "October 25 - November 2 2025"
+                start = start.replace(year=end.year)
+                if start > end:
+                    start = start.replace(year=end.year - 1)
+        return pd.Timestamp(start), pd.Timestamp(end)
+    except (ValueError, OverflowError):
+        return None, None
+
+
+def build_frame(deals):
+    """One row per deal with the numeric columns the scorer needs"""
+    rows = []
+    for deal in deals:
+        flight = deal.get('flight') or deal
+        rows.append({
+            'price': deal.get('total_price'),
+            'stops': flight.get('stops'),
+            'duration': flight.get('duration'),
+            'departure_date': deal.get('departure_date'),
+        })
+
+    frame = pd.DataFrame(rows)
+    frame['price'] = pd.to_numeric(frame['price'], errors='coerce')
+    frame['stops'] = pd.to_numeric(frame['stops'], errors='coerce').fillna(0)
+    frame['departure_date'] = pd.to_datetime(frame['departure_date'], errors='coerce')
+
+    # ISO 8601 durations such as PT2H30M -> hours
+    duration = frame['duration'].astype(str).str.extract(r'PT(?:(\d+)H)?(?:(\d+)M)?').astype(float)
+    frame['duration_hours'] = duration[0].fillna(0) + duration[1].fillna(0) / 60
+    frame.loc[frame['duration_hours'] == 0, 'duration_hours'] = float('nan')
+    return frame
+
+
+def prescore_deals(deals, brief):
+    """Vectorized heuristic score (1-10) and rule violations for every deal"""
+    frame = build_frame(deals)
+    budget = parse_budget(brief.get('Budget_Max'))
+    start, end = parse_date_window(brief.get('Travel_Dates'))
+    tolerance = pd.Timedelta(days=config.AI_PRESCORE_DATE_TOLERANCE_DAYS)
+
+    # Price: full marks at 70% of budget or less, nothing at or over budget
+    if budget:
+        ratio = frame['price'] / budget
+        frame['price_fit'] = ((1.0 - ratio) / 0.3).clip(0, 1).fillna(0.5)
+        frame['over_budget'] = ratio > 1.0
+    else:
+        frame['price_fit'] = 0.5
+        frame['over_budget'] = False
+
+    frame['stops_fit'] = (1.0 - frame['stops'] * 0.4).clip(0, 1)
+    frame['too_many_stops'] = frame['stops'] > config.AI_PRESCORE_MAX_STOPS
+
+    # Short-haul flights score best; fit falls to zero at 15 hours
+    frame['duration_fit'] = (1.0 - (frame['duration_hours'] - 3) / 12).clip(0, 1).fillna(0.5)
+
+    # Dates: full marks inside the brief's window, decaying over a week outside it
+    if start is not None:
+        before = (start - tolerance - frame['departure_date']).dt.days.clip(lower=0)
+        after = (frame['departure_date'] - end - tolerance).dt.days.clip(lower=0)
+        days_outside = before + after
+        frame['dates_fit'] = (1.0 - days_outside / 7).clip(0, 1).fillna(0.5)
+        frame['outside_dates'] = days_outside > 0
+    else:
+        frame['dates_fit'] = 0.5
+        frame['outside_dates'] = False
+
+    fit = sum(frame[f'{name}_fit'] * weight for name, weight in WEIGHTS.items())
+    frame['score'] = (1 + 9 * fit).round(1)
+    frame['eligible'] = ~(frame['over_budget'] | frame['too_many_stops'] | frame['outside_dates'])
+    return frame
+
+
+def heuristic_analysis(row):
+    """Analysis in the analyzer schema for a deal that skipped the LLM"""
+    # Unreviewed deals never trigger an alert on their own
+    score = int(min(round(row['score']), config.MIN_SCORE_FOR_ALERT - 1))
+    if not row['eligible']:
+        score = 1
+
+    cons = []
+    if row['over_budget']:
+        cons.append('Over budget')
+    if row['too_many_stops']:
+        cons.append('Too many stops')
+    if row['outside_dates']:
+        cons.append('Outside travel dates')
+
+    return {
+        'score': max(1, score),
+        'recommendation': 'WATCH' if row['eligible'] and score >= 5 else 'IGNORE',
+        'value_assessment': f"Pre-scored {row['score']}/10 on price, stops, duration and dates",
+        'family_suitability': 'Not assessed by AI',
+        'key_pros': ['Within brief constraints'] if row['eligible'] else ['Not specified'],
+        'key_cons': cons or ['Ranked below the top candidates for this brief'],
+        'action_summary': f"Rule-based score only; not among the top {config.AI_PRESCORE_TOP_K} deals sent for AI review"
+    }
+
+
+def select_for_llm(deals, brief, top_k=None):
+    """Split a brief's candidate deals into LLM work and heuristic analyses
+
+    Returns ``(selected, analyses)``: the indices of the top-K eligible deals
+    to send to the AI analyzer, and a heuristic analysis for every other
+    index. A top_k of 0 or less sends every deal to the LLM.
+    """
+    top_k = config.AI_PRESCORE_TOP_K if top_k is None else top_k
+    if top_k <= 0 or not deals:
+        return list(range(len(deals))), {}
+
+    frame = prescore_deals(deals, brief)
+    ranked = frame[frame['eligible']].sort_values('score', ascending=False, kind='stable')
+    selected = sorted(ranked.index[:top_k].tolist())
+
+    analyses = {index: heuristic_analysis(row)
+                for index, row in frame.iterrows() if index not in set(selected)}
+
+    logging.info(f"Pre-scoring brief {brief.get('Brief_ID', 'Unknown')}: {len(selected)}/{len(deals)} deals sent for AI analysis")
+    return selected, analyses
@@ -0,0 +1,162 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+import config
+from db_context import app_context
+
+
+class HotelReferenceIndex:
+    """Local cityCode -> hotel IDs index backed by the hotel_references table
+
+    The by-city reference data rarely changes, so hotel searches read it from
+    here and only call Amadeus when a city is unknown or its entries are older
+    than HOTEL_INDEX_MAX_AGE_DAYS. refresh_stale() is run on a slow schedule to
+    keep the index current outside the search path.
+    """
+
+    def __init__(self):
+        self.memory = {}  # city_code -> (refreshed_at, hotel_ids)
+        self.lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'lookups': 0
+        }
+
+    def is_fresh(self, refreshed_at):
+        max_age = timedelta(days=config.HOTEL_INDEX_MAX_AGE_DAYS)
+        return bool(refreshed_at and datetime.utcnow() - refreshed_at < max_age)
+
+    def get_hotel_ids(self, city_code, lookup):
+        """Return hotel IDs for a city, calling ``lookup`` only on a miss
+
+        ``lookup(city_code)`` returns the raw by-city hotel list, or None if
+        the API call failed.
+        """
+        city_code = city_code.upper()
+
+        with self.lock:
+            entry = self.memory.get(city_code)
+        if entry and self.is_fresh(entry[0]):
+            with self.lock:
+                self.stats['hits'] += 1
+            return entry[1]
+
+        refreshed_at, hotel_ids = self._load(city_code)
+        if hotel_ids and self.is_fresh(refreshed_at):
+            with self.lock:
+                self.memory[city_code] = (refreshed_at, hotel_ids)
+                self.stats['hits'] += 1
+            return hotel_ids
+
+        fetched = self.refresh_city(city_code, lookup)
+        if fetched is not None:
+            return fetched
+
+        # Lookup failed: stale hotel IDs are better than no hotels at all
+        return hotel_ids
+
+    def refresh_city(self, city_code, lookup):
+        """Fetch a city's hotels from Amadeus and replace its index entries"""
+        city_code = city_code.upper()
+        hotels = lookup(city_code)
+
+        with self.lock:
+            self.stats['lookups'] += 1
+
+        if hotels is None:
+            return None
+
+        hotels = hotels[:config.HOTEL_INDEX_HOTELS_PER_CITY]
+        hotel_ids = [hotel['hotelId'] for hotel in hotels]
+        refreshed_at = datetime.utcnow()
+
+        self._store(city_code, hotels, refreshed_at)
+        with self.lock:
+            self.memory[city_code] = (refreshed_at, hotel_ids)
+
+        return hotel_ids
+
+    def refresh_stale(self, lookup):
+        """Re-fetch every indexed city whose entries have gone stale"""
+        try:
+            from sqlalchemy import func
+            from travel_aigent.models import db, HotelReference
+
+            cutoff = datetime.utcnow() - timedelta(days=config.HOTEL_INDEX_MAX_AGE_DAYS)
+            with app_context():
+                rows = db.session.query(HotelReference.city_code) \
+                    .group_by(HotelReference.city_code) \
+                    .having(func.min(HotelReference.refreshed_at) < cutoff) \
+                    .all()
+                stale_cities = [row[0] for row in rows]
+
+        except Exception as e:
+            logging.error(f"Error finding stale hotel index entries: {e}")
+            return 0
+
+        refreshed = 0
+        for city_code in stale_cities:
+            if self.refresh_city(city_code, lookup) is not None:
+                refreshed += 1
+
+        logging.info(f"Hotel index refresh: {refreshed}/{len(stale_cities)} stale cities updated")
+        return refreshed
+
+    def _load(self, city_code):
+        try:
+            from travel_aigent.models import HotelReference
+
+            with app_context():
+                rows = HotelReference.query.filter_by(city_code=city_code) \
+                    .order_by(HotelReference.rank.asc()).all()
+                if not rows:
+                    return None, []
+                return min(row.refreshed_at for row in rows), [row.hotel_id for row in rows]
+
+        except Exception as e:
+            logging.warning(f"Hotel index read failed for {city_code}: {e}")
+            return None, []
+
+    def _store(self, city_code, hotels, refreshed_at):
+        try:
+            from travel_aigent.models import db, HotelReference
+
+            with app_context():
+                try:
+                    HotelReference.query.filter_by(city_code=city_code).delete(synchronize_session=False)
+
+                    for rank, hotel in enumerate(hotels):
+                        geo = hotel.get('geoCode', {})
+                        db.session.add(HotelReference(
+                            city_code=city_code,
+                            hotel_id=hotel['hotelId'],
+                            rank=rank,
+                            name=hotel.get('name'),
+                            chain_code=hotel.get('chainCode'),
+                            latitude=geo.get('latitude'),
+                            longitude=geo.get('longitude'),
+                            distance_km=hotel.get('distance', {}).get('value'),
+                            refreshed_at=refreshed_at
+                        ))
+
+                    db.session.commit()
+                    logging.info(f"Hotel index updated for {city_code}: {len(hotels)} hotels")
+                except Exception:
+                    # Roll back while the session's app context is still active
+                    db.session.rollback()
+                    raise
+
+        except Exception as e:
+            logging.warning(f"Hotel index write failed for {city_code}: {e}")
+
+    def get_stats(self):
+        """Index hit and lookup counters"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['cities_in_memory'] = len(self.memory)
+        return stats
+
+
+# Global index instance
+hotel_index = HotelReferenceIndex()
@@ -0,0 +1,137 @@
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import config
+
+
+class ProviderRetry(Retry):
+    """Retry policy for provider APIs
+
+    Idempotent requests are retried on 429 and 5xx responses. Non-idempotent
+    requests (e.g. POST) are only retried on 429, because a rate-limited
+    request was rejected before the provider acted on it.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == 429 and self.status_forcelist and status_code in self.status_forcelist:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class HttpTransport:
+    """Shared keep-alive HTTP sessions for all outbound provider calls
+
+    Each host gets its own connection pool, retry policy and timeouts, taken
+    from config.HTTP_HOST_POLICIES with the HTTP_* settings as defaults. The
+    underlying urllib3 pools are thread-safe, so one transport is shared by
+    web threads, background searches and the scheduler.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.adapters = {}
+        self.policies = {}
+        self.lock = threading.Lock()
+
+    def get_policy(self, host):
+        """Return the resolved transport policy for a host"""
+        policy = self.policies.get(host)
+        if policy is None:
+            overrides = config.HTTP_HOST_POLICIES.get(host, {})
+            policy = {
+                'connect_timeout': overrides.get('connect_timeout', config.HTTP_CONNECT_TIMEOUT),
+                'read_timeout': overrides.get('read_timeout', config.HTTP_READ_TIMEOUT),
+                'pool_maxsize': overrides.get('pool_maxsize', config.HTTP_POOL_MAXSIZE),
+                'max_retries': overrides.get('max_retries', config.HTTP_MAX_RETRIES),
+                'backoff_factor': overrides.get('backoff_factor', config.HTTP_RETRY_BACKOFF),
+            }
+            self.policies[host] = policy
+        return policy
+
+    def _ensure_adapter(self, scheme, host):
+        """Mount a dedicated pooled adapter for a host on first use"""
+        prefix = f"{scheme}://{host}/"
+        if prefix in self.adapters:
+            return
+
+        with self.lock:
+            if prefix in self.adapters:
+                return
+
+            policy = self.get_policy(host)
+            retries = ProviderRetry(
+                total=policy['max_retries'],
+                connect=policy['max_retries'],
+                read=policy['max_retries'],
+                status=policy['max_retries'],
+                backoff_factor=policy['backoff_factor'],
+                status_forcelist=self.RETRY_STATUSES,
+                respect_retry_after_header=True,
+                raise_on_status=False  # Hand the final response back to the caller
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=policy['pool_maxsize'],
+                max_retries=retries,
+                pool_block=False
+            )
+            self.session.mount(prefix, adapter)
+            self.adapters[prefix] = adapter
+            logging.debug(f"HTTP transport: pooled adapter mounted for {host} ({policy})")
+
+    def request(self, method, url, **kwargs):
+        """Send a request through the host's pooled session"""
+        parts = urlsplit(url)
+        self._ensure_adapter(parts.scheme, parts.netloc)
+
+        if 'timeout' not in kwargs:
+            policy = self.get_policy(parts.netloc)
+            kwargs['timeout'] = (policy['connect_timeout'], policy['read_timeout'])
+
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def get_metrics(self):
+        """Connection reuse metrics per host
+
+        ``handshakes`` counts new TCP/TLS connections opened by the pool and
+        ``reused_connections`` counts requests served on an existing one.
+        """
+        metrics = {}
+        for prefix, adapter in list(self.adapters.items()):
+            host = urlsplit(prefix).netloc
+            handshakes = 0
+            requests_sent = 0
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                handshakes += pool.num_connections
+                requests_sent += pool.num_requests
+
+            reused = max(0, requests_sent - handshakes)
+            metrics[host] = {
+                'requests': requests_sent,
+                'handshakes': handshakes,
+                'reused_connections': reused,
+                'reuse_ratio': round(reused / requests_sent, 3) if requests_sent else 0.0,
+                'pool_maxsize': self.get_policy(host)['pool_maxsize']
+            }
+        return metrics
+
+
+# Global transport instance
+transport = HttpTransport()
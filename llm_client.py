@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import threading
+import time
+
+import config
+from rate_limiter import TokenBucket
+
+# Status codes worth retrying: rate limited, server errors, Anthropic "overloaded"
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+RETRYABLE_ERRORS = {'APIConnectionError', 'APITimeoutError', 'RateLimitError', 'OverloadedError',
+                    'InternalServerError', 'ServiceUnavailableError'}
+
+
+class LLMError(Exception):
+    """Raised when every configured provider failed"""
+
+
+class LLMClient:
+    """Process-wide LLM client shared by ClaudeAnalyzer and OpenAIAnalyzer
+
+    Every TravelAgent (web requests, background brief searches, scheduler)
+    goes through the same request and token buckets and concurrency cap, so
+    the process as a whole stays under the provider limits. Rate limit and
+    overload errors are retried with backoff, then the call fails over to the
+    other provider when both keys are configured.
+    """
+
+    def __init__(self):
+        self.request_bucket = TokenBucket(config.AI_REQUESTS_PER_MINUTE, capacity=config.AI_MAX_CONCURRENCY)
+        self.token_bucket = TokenBucket(config.AI_TOKENS_PER_MINUTE, capacity=config.AI_TOKENS_PER_MINUTE)
+        self.semaphore = threading.BoundedSemaphore(max(1, config.AI_MAX_CONCURRENCY))
+        self.clients = {}
+        self.clients_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'failovers': 0,
+            'failures': 0,
+            'input_tokens': 0,
+            'cached_input_tokens': 0,
+            'output_tokens': 0
+        }
+
+    def available_providers(self):
+        providers = []
+        if config.ANTHROPIC_API_KEY:
+            providers.append('anthropic')
+        if config.OPENAI_API_KEY:
+            providers.append('openai')
+        return providers
+
+    def get_client(self, provider):
+        """Lazily build one SDK client per provider; retries are handled here"""
+        with self.clients_lock:
+            if provider not in self.clients:
+                if provider == 'anthropic':
+                    import anthropic
+                    self.clients[provider] = anthropic.Anthropic(api_key=config.ANTHROPIC_API_KEY, max_retries=0)
+                else:
+                    from openai import OpenAI
+                    self.clients[provider] = OpenAI(api_key=config.OPENAI_API_KEY, max_retries=0)
+            return self.clients[provider]
+
+    def complete(self, prompt, system=None, max_tokens=800, temperature=0.3, json_mode=False, preferred='anthropic'):
+        """Send ``prompt`` and return a dict with text, provider and token usage
+
+        ``system`` is a static prefix shared by many calls (family and brief
+        context), sent ahead of the prompt. Providers only cache prefixes of
+        AI_PROMPT_CACHE_MIN_TOKENS or more, so it is marked for caching on
+        Anthropic only when it is that long; the analyzers' prefix is around
+        500 tokens, so their calls are not cached. ``preferred`` is tried
+        first; the other configured provider is the fallback. Raises LLMError
+        if no provider produced a response.
+        """
+        providers = self.available_providers()
+        if preferred in providers:
+            providers.remove(preferred)
+            providers.insert(0, preferred)
+        if not providers:
+            raise LLMError("No AI API key configured")
+
+        last_error = None
+        for index, provider in enumerate(providers):
+            if index > 0:
+                self._count('failovers')
+                logging.warning(f"Failing over to {provider} after error: {last_error}")
+            try:
+                return self._complete_with_retry(provider, prompt, system, max_tokens, temperature, json_mode)
+            except Exception as e:
+                last_error = e
+
+        self._count('failures')
+        raise LLMError(f"All AI providers failed: {last_error}")
+
+    async def acomplete(self, prompt, **kwargs):
+        """Async wrapper around complete(); limits are shared with sync callers"""
+        return await asyncio.to_thread(self.complete, prompt, **kwargs)
+
+    def _complete_with_retry(self, provider, prompt, system, max_tokens, temperature, json_mode):
+        # Rough input estimate (~4 characters per token) reserved up front
+        estimated_input = (len(prompt) + len(system or '')) // 4
+
+        for attempt in range(config.AI_MAX_RETRIES + 1):
+            self.request_bucket.acquire()
+            self.token_bucket.acquire(estimated_input)
+
+            try:
+                with self.semaphore:
+                    self._count('requests')
+                    result = self._send(provider, prompt, system, max_tokens, temperature, json_mode)
+
+                # Charge what the call really cost beyond the reservation
+                used = result['input_tokens'] + result['output_tokens']
+                self.token_bucket.consume(max(0, used - estimated_input))
+                self._record_usage(result)
+                return result
+
+            except Exception as e:
+                if not self.is_retryable(e) or attempt == config.AI_MAX_RETRIES:
+                    raise
+
+                delay = self.retry_after(e) or config.AI_RETRY_BACKOFF * (2 ** attempt)
+                self._count('retries')
+                logging.warning(f"{provider} request failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _send(self, provider, prompt, system, max_tokens, temperature, json_mode):
+        client = self.get_client(provider)
+
+        if provider == 'anthropic':
+            kwargs = {}
+            if system and len(system) // 4 >= config.AI_PROMPT_CACHE_MIN_TOKENS:
+                kwargs['system'] = [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+            elif system:
+                kwargs['system'] = system
+            message = client.messages.create(
+                model=config.AI_ANTHROPIC_MODEL,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                messages=[{"role": "user", "content": prompt}],
+                **kwargs
+            )
+            usage = message.usage
+            cache_read = getattr(usage, 'cache_read_input_tokens', 0) or 0
+            cache_write = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+            return {
+                'text': message.content[0].text,
+                'provider': provider,
+                # Anthropic reports cached prefix tokens separately from input_tokens
+                'input_tokens': (getattr(usage, 'input_tokens', 0) or 0) + cache_read + cache_write,
+                'cached_input_tokens': cache_read,
+                'output_tokens': getattr(usage, 'output_tokens', 0) or 0
+            }
+
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        kwargs = {'response_format': {"type": "json_object"}} if json_mode else {}
+        response = client.chat.completions.create(
+            model=config.AI_OPENAI_MODEL,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs
+        )
+        usage = response.usage
+        details = getattr(usage, 'prompt_tokens_details', None)
+        return {
+            'text': response.choices[0].message.content,
+            'provider': provider,
+            'input_tokens': getattr(usage, 'prompt_tokens', 0) or 0,
+            'cached_input_tokens': getattr(details, 'cached_tokens', 0) or 0,
+            'output_tokens': getattr(usage, 'completion_tokens', 0) or 0
+        }
+
+    @staticmethod
+    def is_retryable(error):
+        status = getattr(error, 'status_code', None)
+        return status in RETRYABLE_STATUS or type(error).__name__ in RETRYABLE_ERRORS
+
+    @staticmethod
+    def retry_after(error):
+        """Seconds from a Retry-After header, if the provider sent one"""
+        try:
+            return float(error.response.headers.get('retry-after'))
+        except (AttributeError, TypeError, ValueError):
+            return None
+
+    def _record_usage(self, result):
+        with self.stats_lock:
+            for name in ('input_tokens', 'cached_input_tokens', 'output_tokens'):
+                self.stats[name] += result.get(name, 0)
+
+    def _count(self, name):
+        with self.stats_lock:
+            self.stats[name] += 1
+
+    def get_stats(self):
+        """Request, retry, failover and token usage counters"""
+        with self.stats_lock:
+            return dict(self.stats)
+
+
+# Global client instance
+llm_client = LLMClient()
@@ -2,7 +2,7 @@ import schedule
 import time
 import logging
 import threading
-from travel_agent import TravelAgent
+from service_registry import get_agent, services
 from logger import setup_logging
 
 def main():
@@ -10,11 +10,15 @@ def main():
     setup_logging()
     logging.info("Starting Travel AiGent system...")
     
-    agent = TravelAgent()
+    agent = get_agent()
+    services.warmup()
     
     # Schedule checks every 6 hours between 9 AM and 9 PM
     schedule.every(6).hours.do(agent.run_deal_search)
     
+    # Refresh stale hotel reference data once a day, off the search path
+    schedule.every().day.at("03:00").do(agent.refresh_reference_data)
+    
     # Run an initial check after startup (delayed by 1 minute to allow web server to start)
     schedule.every(1).minutes.do(agent.run_initial_check).tag('initial')
     
@@ -0,0 +1,40 @@
+"""Add analysis column to deals table."""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from travel_aigent import create_app
+from travel_aigent.models import db
+from sqlalchemy import inspect, text
+
+def upgrade():
+    """Add analysis column to deals table."""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            # Check if column already exists
+            columns = [col['name'] for col in inspect(db.engine).get_columns('deals')]
+
+            if 'analysis' in columns:
+                print("✅ analysis column already exists in deals table")
+                return
+
+            with db.engine.connect() as conn:
+                conn.execute(text("""
+                    ALTER TABLE deals
+                    ADD COLUMN analysis TEXT
+                """))
+                conn.commit()
+
+            print("✅ Successfully added analysis column to deals table")
+
+        except Exception as e:
+            print(f"❌ Error adding analysis column: {e}")
+            if "duplicate column" in str(e).lower():
+                print("✅ analysis column already exists")
+            else:
+                raise
+
+if __name__ == "__main__":
+    upgrade()
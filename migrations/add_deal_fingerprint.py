@@ -0,0 +1,45 @@
+"""Add fingerprint column and (brief_id, fingerprint) unique index to deals table."""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from travel_aigent import create_app
+from travel_aigent.models import db
+from sqlalchemy import inspect, text
+
+def upgrade():
+    """Add fingerprint column and unique index to deals table."""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            # Check if column already exists
+            columns = [col['name'] for col in inspect(db.engine).get_columns('deals')]
+
+            with db.engine.connect() as conn:
+                if 'fingerprint' in columns:
+                    print("✅ fingerprint column already exists in deals table")
+                else:
+                    conn.execute(text("""
+                        ALTER TABLE deals
+                        ADD COLUMN fingerprint VARCHAR(40)
+                    """))
+
+                # Existing rows keep a NULL fingerprint, which the index allows
+                conn.execute(text("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS uq_deals_brief_fingerprint
+                    ON deals (brief_id, fingerprint)
+                """))
+                conn.commit()
+
+            print("✅ Successfully added fingerprint column and index to deals table")
+
+        except Exception as e:
+            print(f"❌ Error adding fingerprint column: {e}")
+            if "duplicate column" in str(e).lower():
+                print("✅ fingerprint column already exists")
+            else:
+                raise
+
+if __name__ == "__main__":
+    upgrade()
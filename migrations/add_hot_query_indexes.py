@@ -0,0 +1,43 @@
+"""Add composite indexes for the hot Deal, TravelBrief and SearchActivity queries."""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from travel_aigent import create_app
+from travel_aigent.models import db, Deal, TravelBrief, SearchActivity
+from sqlalchemy import inspect
+
+# Models whose __table_args__ declare the indexes; create_all skips existing tables
+MODELS = [Deal, TravelBrief, SearchActivity]
+
+def upgrade():
+    """Create any index declared on the models that the database is missing."""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            inspector = inspect(db.engine)
+
+            for model in MODELS:
+                table = model.__table__
+                existing = {index['name'] for index in inspector.get_indexes(table.name)}
+
+                for index in table.indexes:
+                    if index.name in existing:
+                        print(f"✅ {index.name} already exists on {table.name}")
+                        continue
+
+                    index.create(bind=db.engine)
+                    print(f"✅ Created {index.name} on {table.name}")
+
+            print("✅ Successfully added hot query indexes")
+
+        except Exception as e:
+            print(f"❌ Error adding indexes: {e}")
+            if "already exists" in str(e).lower():
+                print("✅ Index already exists")
+            else:
+                raise
+
+if __name__ == "__main__":
+    upgrade()
@@ -0,0 +1,40 @@
+"""Add route_timings column to search_activities table."""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from travel_aigent import create_app
+from travel_aigent.models import db
+from sqlalchemy import inspect, text
+
+def upgrade():
+    """Add route_timings column to search_activities table."""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            # Check if column already exists
+            columns = [col['name'] for col in inspect(db.engine).get_columns('search_activities')]
+
+            if 'route_timings' in columns:
+                print("✅ route_timings column already exists in search_activities table")
+                return
+
+            with db.engine.connect() as conn:
+                conn.execute(text("""
+                    ALTER TABLE search_activities
+                    ADD COLUMN route_timings TEXT
+                """))
+                conn.commit()
+
+            print("✅ Successfully added route_timings column to search_activities table")
+
+        except Exception as e:
+            print(f"❌ Error adding route_timings column: {e}")
+            if "duplicate column" in str(e).lower():
+                print("✅ route_timings column already exists")
+            else:
+                raise
+
+if __name__ == "__main__":
+    upgrade()
@@ -0,0 +1,185 @@
+import logging
+import smtplib
+import threading
+import time
+from datetime import datetime
+
+import config
+from db_context import app_context
+
+
+class ProviderHealth:
+    """Background prober behind the dashboard and status endpoints
+
+    Checking providers inline meant a full Sheets read and Amadeus
+    credential checks on every status poll. This thread probes Amadeus, the
+    AI analyzer, Telegram, SMTP, Sheets and the database every
+    HEALTH_PROBE_INTERVAL_SECONDS and keeps the latest results, so request
+    handlers only copy a dict.
+    """
+
+    PROVIDERS = ('amadeus', 'analyzer', 'telegram', 'smtp', 'sheets', 'database')
+
+    def __init__(self):
+        self.agent = None
+        self.app = None
+        self.thread = None
+        self.wake_event = threading.Event()
+        self.lock = threading.Lock()
+        self.results = {}
+        self.active_briefs = 0
+        self.checked_at = None
+
+    def start(self, agent=None, app=None):
+        """Start the prober thread once per process
+
+        Called at startup with just the app; without an agent the prober
+        uses the shared one from the service registry.
+        """
+        from flask import current_app, has_app_context
+
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.agent = agent
+            # Probe the database of the app that started us, not a fresh one
+            if app is None and has_app_context():
+                app = current_app._get_current_object()
+            self.app = app
+            self.thread = threading.Thread(target=self._run, name='provider-health', daemon=True)
+            self.thread.start()
+            logging.info("Provider health prober started")
+
+    def wake(self):
+        """Probe now instead of waiting for the next interval"""
+        self.wake_event.set()
+
+    def _run(self):
+        while True:
+            try:
+                self.probe_all()
+            except Exception as e:
+                logging.error(f"Provider health probe error: {e}")
+            self.wake_event.wait(config.HEALTH_PROBE_INTERVAL_SECONDS)
+            self.wake_event.clear()
+
+    def probe_all(self):
+        """Run every probe and publish the results"""
+        if self.agent is None:
+            from service_registry import get_agent
+            self.agent = get_agent()
+
+        results = {}
+        for name in self.PROVIDERS:
+            started = time.monotonic()
+            try:
+                healthy, detail = getattr(self, f'_probe_{name}')()
+            except Exception as e:
+                healthy, detail = False, str(e)
+            results[name] = {
+                'healthy': healthy,
+                'detail': detail,
+                'latency_ms': round((time.monotonic() - started) * 1000, 1),
+                'checked_at': datetime.now().isoformat()
+            }
+
+        active_briefs = self._count_active_briefs()
+        with self.lock:
+            self.results = results
+            self.active_briefs = active_briefs
+            self.checked_at = datetime.now().isoformat()
+
+    def _probe_amadeus(self):
+        from amadeus_api import token_manager
+
+        if not self.agent or not self.agent.amadeus:
+            return False, "API not initialized"
+        # Reuses the shared token; only fetches one if the refresher has none
+        token_manager.get_token()
+        return True, None
+
+    def _probe_analyzer(self):
+        from llm_client import llm_client
+
+        if not self.agent or not self.agent.ai_analyzer:
+            return False, "Analyzer not initialized"
+        providers = llm_client.available_providers()
+        if not providers:
+            return False, "No LLM API key configured"
+        return True, ', '.join(providers)
+
+    def _probe_telegram(self):
+        if not self.agent or not self.agent.telegram:
+            return False, "Not configured"
+        if not self.agent.telegram.test_connection():
+            return False, "getMe failed"
+        return True, None
+
+    def _probe_smtp(self):
+        from travel_aigent.services.notifications import notification_service
+
+        if not notification_service.smtp_username or not notification_service.smtp_password:
+            return False, "Not configured"
+        with smtplib.SMTP(notification_service.smtp_host, notification_service.smtp_port,
+                          timeout=config.HEALTH_PROBE_TIMEOUT_SECONDS) as server:
+            server.ehlo()
+        return True, notification_service.smtp_host
+
+    def _probe_sheets(self):
+        if not self.agent or not self.agent.sheets or not self.agent.sheets.sheet:
+            return False, "Not connected"
+        # One small uncached metadata read; the worksheet handles are cached
+        self.agent.sheets.sheet.fetch_sheet_metadata({'fields': 'spreadsheetId'})
+        return True, None
+
+    def _context(self):
+        """The app context of the app that started us, if none is active"""
+        from flask import has_app_context
+
+        return self.app.app_context() if self.app and not has_app_context() else app_context()
+
+    def _probe_database(self):
+        from sqlalchemy import text
+        from travel_aigent.models import db
+
+        with self._context():
+            db.session.execute(text("SELECT 1"))
+        return True, None
+
+    def check_database(self):
+        """Probe the database now; for callers that can't wait for the thread"""
+        try:
+            return self._probe_database()[0]
+        except Exception as e:
+            logging.error(f"Database health check failed: {e}")
+            return False
+
+    def _count_active_briefs(self):
+        try:
+            if not self.agent:
+                return 0
+            # Before the first search cycle the agent counts briefs in the database
+            with self._context():
+                return self.agent.get_active_briefs_count()
+        except Exception as e:
+            logging.error(f"Error counting active briefs: {e}")
+            return 0
+
+    def snapshot(self):
+        """Latest probe results; never touches the network or the database"""
+        with self.lock:
+            return {
+                'checked_at': self.checked_at,
+                'active_briefs': self.active_briefs,
+                'providers': {name: dict(result) for name, result in self.results.items()}
+            }
+
+    def is_healthy(self, name):
+        """True/False from the last probe, None before the first one finishes"""
+        with self.lock:
+            result = self.results.get(name)
+        return result['healthy'] if result else None
+
+
+# Global prober instance
+provider_health = ProviderHealth()
@@ -55,6 +55,90 @@ def run_migration():
                 else:
                     print(f"ℹ️  Column exists: {col_name}")
         
+        # Check and add missing columns to deals
+        if 'deals' in tables:
+            columns = [col['name'] for col in inspector.get_columns('deals')]
+            
+            required_columns = {
+                'analysis': "ALTER TABLE deals ADD COLUMN analysis TEXT",
+                'fingerprint': "ALTER TABLE deals ADD COLUMN fingerprint VARCHAR(40)"
+            }
+            
+            for col_name, sql in required_columns.items():
+                if col_name not in columns:
+                    try:
+                        db.session.execute(text(sql))
+                        db.session.commit()
+                        print(f"✅ Added column: {col_name}")
+                    except Exception as e:
+                        db.session.rollback()
+                        error_msg = str(e).lower()
+                        if "duplicate" in error_msg or "already exists" in error_msg:
+                            print(f"ℹ️  Column already exists: {col_name}")
+                        else:
+                            print(f"❌ Error adding {col_name}: {e}")
+                else:
+                    print(f"ℹ️  Column exists: {col_name}")
+
+        # Check and add missing columns to search_activities
+        if 'search_activities' in tables:
+            columns = [col['name'] for col in inspector.get_columns('search_activities')]
+            
+            required_columns = {
+                'route_timings': "ALTER TABLE search_activities ADD COLUMN route_timings TEXT"
+            }
+            
+            for col_name, sql in required_columns.items():
+                if col_name not in columns:
+                    try:
+                        db.session.execute(text(sql))
+                        db.session.commit()
+                        print(f"✅ Added column: {col_name}")
+                    except Exception as e:
+                        db.session.rollback()
+                        error_msg = str(e).lower()
+                        if "duplicate" in error_msg or "already exists" in error_msg:
+                            print(f"ℹ️  Column already exists: {col_name}")
+                        else:
+                            print(f"❌ Error adding {col_name}: {e}")
+                else:
+                    print(f"ℹ️  Column exists: {col_name}")
+        
+        # Indexes declared on the models that create_all won't add to existing tables
+        from travel_aigent.models import Deal, TravelBrief, SearchActivity
+        
+        for model in (Deal, TravelBrief, SearchActivity):
+            table = model.__table__
+            if table.name not in tables:
+                continue
+            
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            existing.update(constraint['name'] for constraint in inspector.get_unique_constraints(table.name))
+            
+            required_indexes = {index.name: index for index in table.indexes}
+            if table.name == 'deals':
+                # Added as an index on existing tables; new tables get the constraint
+                required_indexes['uq_deals_brief_fingerprint'] = "CREATE UNIQUE INDEX IF NOT EXISTS uq_deals_brief_fingerprint ON deals (brief_id, fingerprint)"
+            
+            for index_name, index in required_indexes.items():
+                if index_name in existing:
+                    print(f"ℹ️  Index exists: {index_name}")
+                    continue
+                try:
+                    if isinstance(index, str):
+                        db.session.execute(text(index))
+                        db.session.commit()
+                    else:
+                        index.create(bind=db.engine)
+                    print(f"✅ Added index: {index_name}")
+                except Exception as e:
+                    db.session.rollback()
+                    error_msg = str(e).lower()
+                    if "duplicate" in error_msg or "already exists" in error_msg:
+                        print(f"ℹ️  Index already exists: {index_name}")
+                    else:
+                        print(f"❌ Error adding {index_name}: {e}")
+        
         print("\n✅ Migration completed successfully!")
         return True
 
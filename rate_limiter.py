@@ -0,0 +1,61 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every caller of a rate-limited API.
+
+    ``rate_per_minute`` tokens are added continuously; at most ``capacity``
+    tokens can accumulate, which bounds the size of a burst after idle time.
+    """
+
+    def __init__(self, rate_per_minute, capacity=1):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_second)
+        self.last_refill = now
+
+    def acquire(self, tokens=1):
+        """Block until ``tokens`` are available, then consume them.
+
+        Returns the number of seconds spent waiting.
+        """
+        tokens = min(float(tokens), self.capacity)
+        waited = 0.0
+
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                sleep_time = (tokens - self.tokens) / self.rate_per_second
+
+            time.sleep(sleep_time)
+            waited += sleep_time
+
+    def try_acquire(self, tokens=1):
+        """Consume ``tokens`` if they are available right now, without blocking"""
+        with self.lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def consume(self, tokens):
+        """Charge ``tokens`` without waiting; the balance may go negative
+
+        Used when the real cost is only known after a call, so later callers
+        wait for the overrun instead of the caller that caused it.
+        """
+        with self.lock:
+            self._refill()
+            self.tokens -= tokens
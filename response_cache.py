@@ -0,0 +1,162 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import config
+from db_context import app_context
+
+
+class ResponseCache:
+    """TTL + LRU cache for provider responses, with an optional database tier
+
+    The in-memory tier is bounded to ``max_entries`` and evicts the least
+    recently used entry. When ``persistent`` is set, entries are also written
+    to the ``cache_entries`` table (SQLite or Postgres, whichever the app is
+    using) so they survive restarts and are shared between processes.
+    """
+
+    def __init__(self, namespace, ttl_seconds, max_entries, persistent=False):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.persistent = persistent
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'persistent_hits': 0,
+            'misses': 0,
+            'evictions': 0
+        }
+
+    @staticmethod
+    def make_key(*parts):
+        """Hash a normalized search tuple into a fixed-size cache key"""
+        raw = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached value for ``key`` or None"""
+        if self.ttl_seconds <= 0:
+            return None
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.time():
+                    self.entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return value
+                del self.entries[key]
+
+        if self.persistent:
+            value, expires_at = self._load_persistent(key)
+            if value is not None:
+                with self.lock:
+                    self._store_memory(key, value, expires_at)
+                    self.stats['hits'] += 1
+                    self.stats['persistent_hits'] += 1
+                return value
+
+        with self.lock:
+            self.stats['misses'] += 1
+        return None
+
+    def set(self, key, value):
+        """Store ``value`` under ``key`` for the configured TTL"""
+        if self.ttl_seconds <= 0:
+            return
+
+        expires_at = time.time() + self.ttl_seconds
+        with self.lock:
+            self._store_memory(key, value, expires_at)
+
+        if self.persistent:
+            self._save_persistent(key, value)
+
+    def _store_memory(self, key, value, expires_at):
+        self.entries[key] = (expires_at, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _load_persistent(self, key):
+        try:
+            from travel_aigent.models import CacheEntry
+
+            with app_context():
+                entry = CacheEntry.query.filter_by(namespace=self.namespace, cache_key=key).first()
+                if not entry or entry.expires_at <= datetime.utcnow():
+                    return None, None
+
+                remaining = (entry.expires_at - datetime.utcnow()).total_seconds()
+                return json.loads(entry.payload), time.time() + remaining
+
+        except Exception as e:
+            logging.warning(f"Persistent cache read failed for {self.namespace}: {e}")
+            return None, None
+
+    def _save_persistent(self, key, value):
+        try:
+            from travel_aigent.models import db, CacheEntry
+
+            with app_context():
+                try:
+                    now = datetime.utcnow()
+                    entry = CacheEntry.query.filter_by(namespace=self.namespace, cache_key=key).first()
+                    if not entry:
+                        entry = CacheEntry(namespace=self.namespace, cache_key=key)
+                        db.session.add(entry)
+
+                    entry.payload = json.dumps(value)
+                    entry.created_at = now
+                    entry.expires_at = now + timedelta(seconds=self.ttl_seconds)
+                    db.session.commit()
+
+                    self._evict_persistent()
+                except Exception:
+                    # Roll back while the session's app context is still active
+                    db.session.rollback()
+                    raise
+
+        except Exception as e:
+            logging.warning(f"Persistent cache write failed for {self.namespace}: {e}")
+
+    def _evict_persistent(self):
+        """Drop expired rows and trim the namespace to its size bound"""
+        from travel_aigent.models import db, CacheEntry
+
+        CacheEntry.query.filter(
+            CacheEntry.namespace == self.namespace,
+            CacheEntry.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+
+        limit = config.CACHE_PERSISTENT_MAX_ENTRIES
+        overflow = CacheEntry.query.filter_by(namespace=self.namespace).count() - limit
+        if overflow > 0:
+            oldest = [row.id for row in CacheEntry.query.filter_by(namespace=self.namespace)
+                      .order_by(CacheEntry.created_at.asc()).limit(overflow).all()]
+            CacheEntry.query.filter(CacheEntry.id.in_(oldest)).delete(synchronize_session=False)
+
+        db.session.commit()
+
+    def clear(self):
+        """Empty the in-memory tier"""
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self):
+        """Hit/miss counters and current size"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['size'] = len(self.entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['persistent'] = self.persistent
+        return stats
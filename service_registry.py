@@ -0,0 +1,150 @@
+import logging
+import threading
+import time
+
+import config
+
+
+class ServiceRegistry:
+    """Process-wide container of lazily built, shared clients
+
+    Sheets, Amadeus, the AI analyzer, Telegram and the TravelAgent itself
+    are each built once, on first use, and then shared by every web thread
+    and the scheduler. A client whose setup fails is stored as None so
+    callers fall back to mock data instead of retrying on each request.
+    """
+
+    def __init__(self):
+        self.factories = {}
+        self.instances = {}
+        self.build_seconds = {}
+        # Reentrant so a factory can resolve other services
+        self.lock = threading.RLock()
+
+    def register(self, name, factory):
+        """Register how to build a service; replaces any built instance"""
+        with self.lock:
+            self.factories[name] = factory
+            self.instances.pop(name, None)
+
+    def get(self, name):
+        """The shared instance, building it on first use"""
+        try:
+            return self.instances[name]
+        except KeyError:
+            pass
+
+        with self.lock:
+            if name not in self.instances:
+                started = time.monotonic()
+                self.instances[name] = self.factories[name]()
+                self.build_seconds[name] = round(time.monotonic() - started, 3)
+                logging.info(f"Service '{name}' ready in {self.build_seconds[name]}s")
+            return self.instances[name]
+
+    def warmup(self, names=None, background=True):
+        """Build services ahead of the first request that needs them"""
+        names = list(names or self.factories)
+
+        def build_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    logging.error(f"Service warmup failed for '{name}': {e}")
+
+        if not background:
+            build_all()
+            return None
+
+        thread = threading.Thread(target=build_all, name='service-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def reset(self, name=None):
+        """Drop built instances so the next get() rebuilds them"""
+        with self.lock:
+            if name is None:
+                self.instances.clear()
+            else:
+                self.instances.pop(name, None)
+
+    def get_stats(self):
+        """Seconds each built service took to construct"""
+        with self.lock:
+            return dict(self.build_seconds)
+
+
+class SharedService:
+    """Class attribute that resolves to a registry service on first access
+
+    Only defines __get__, so assigning the attribute on an instance (a stub
+    in tests, None to force mock data) overrides the shared client.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return services.get(self.name)
+
+
+def _build_sheets():
+    from sheets_handler import SheetsHandler
+    return SheetsHandler()
+
+
+def _build_amadeus():
+    from amadeus_api import AmadeusAPI
+    try:
+        return AmadeusAPI()
+    except Exception as e:
+        logging.warning(f"Amadeus API initialization failed: {e}. Will use mock data.")
+        return None
+
+
+def _build_ai_analyzer():
+    try:
+        # Try Claude first, fall back to OpenAI if needed
+        if config.ANTHROPIC_API_KEY:
+            from claude_analyzer import ClaudeAnalyzer
+            logging.info("Using Claude for AI analysis")
+            return ClaudeAnalyzer()
+        if config.OPENAI_API_KEY:
+            from openai_analyzer import OpenAIAnalyzer
+            logging.info("Using OpenAI for AI analysis")
+            return OpenAIAnalyzer()
+        raise Exception("No AI API key configured")
+    except Exception as e:
+        logging.warning(f"AI analyzer initialization failed: {e}. Will use mock analysis.")
+        return None
+
+
+def _build_telegram():
+    from telegram_notifier import TelegramNotifier
+    try:
+        return TelegramNotifier()
+    except Exception as e:
+        logging.warning(f"Telegram notifier initialization failed: {e}. Will log notifications.")
+        return None
+
+
+def _build_agent():
+    from travel_agent import TravelAgent
+    return TravelAgent()
+
+
+# Global registry instance
+services = ServiceRegistry()
+services.register('sheets', _build_sheets)
+services.register('amadeus', _build_amadeus)
+services.register('ai_analyzer', _build_ai_analyzer)
+services.register('telegram', _build_telegram)
+services.register('agent', _build_agent)
+
+
+def get_agent():
+    """The process-wide TravelAgent"""
+    return services.get('agent')
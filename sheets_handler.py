@@ -1,7 +1,9 @@
 import gspread
 import logging
 import json
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import datetime
 from oauth2client.service_account import ServiceAccountCredentials
 import config
 import pandas as pd
@@ -11,6 +13,22 @@ class SheetsHandler:
         """Initialize Google Sheets handler"""
         self.client = None
         self.sheet = None
+        
+        # Writes buffered until flush(): deal rows and Brief_ID -> Last_Checked
+        self.pending_rows = []
+        self.pending_timestamps = {}
+        self.buffer_lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.last_flush = time.monotonic()
+        
+        # Sheet metadata cache: worksheet handles, header -> column maps and
+        # Brief_ID -> row, dropped after SHEETS_METADATA_TTL_SECONDS
+        self.worksheets = {}
+        self.header_maps = {}
+        self.brief_rows = {}
+        self.metadata_lock = threading.Lock()
+        self.metadata_loaded_at = time.monotonic()
+        
         self.connect_to_sheets()
     
     def connect_to_sheets(self):
@@ -45,11 +63,21 @@ class SheetsHandler:
                 return self._get_mock_briefs()
             
             # Get the 'ACTIVE TRAVEL BRIEFS' worksheet
-            worksheet = self.sheet.worksheet('ACTIVE TRAVEL BRIEFS')
+            worksheet = self.get_worksheet('ACTIVE TRAVEL BRIEFS')
             
             # Get all records
             records = worksheet.get_all_records()
             
+            # The same read gives the header map and Brief_ID -> row index
+            # (row 1 is the header, so record i lives on row i + 2)
+            if records:
+                with self.metadata_lock:
+                    self.header_maps['ACTIVE TRAVEL BRIEFS'] = {
+                        header: col for col, header in enumerate(records[0].keys(), start=1)
+                    }
+                    self.brief_rows = {str(record.get('Brief_ID', '')): row
+                                       for row, record in enumerate(records, start=2)}
+            
             # Filter for active briefs
             active_briefs = []
             for record in records:
@@ -83,138 +111,221 @@ class SheetsHandler:
         ]
     
     def log_deal(self, deal, analysis, brief):
-        """Log a deal and its analysis to the sheet"""
+        """Queue a deal and its analysis for the sheet; written on the next flush"""
         try:
             if not self.sheet:
                 logging.info(f"Mock: Would log deal to sheet - {deal.get('destination')} - Score: {analysis.get('score')}")
                 return
             
-            # Get or create the 'DEAL HISTORY (HEADERS)' worksheet
-            try:
-                worksheet = self.sheet.worksheet('DEAL HISTORY (HEADERS)')
-            except gspread.WorksheetNotFound:
-                # Create the worksheet if it doesn't exist
-                worksheet = self.sheet.add_worksheet(title='DEAL HISTORY (HEADERS)', rows=1000, cols=20)
-                # Add headers
-                headers = [
-                    'Timestamp', 'Brief_ID', 'Deal_Type', 'Origin', 'Destination',
-                    'Departure_Date', 'Return_Date', 'Total_Price', 'Currency',
-                    'Airline', 'AI_Score', 'Recommendation', 'Value_Assessment',
-                    'Family_Suitability', 'Key_Pros', 'Key_Cons', 'Action_Summary'
-                ]
-                worksheet.append_row(headers)
-            
             # Prepare row data
-            row_data = [
-                datetime.now().isoformat(),
-                brief.get('Brief_ID', ''),
-                deal.get('type', ''),
-                deal.get('origin', ''),
-                deal.get('destination', ''),
-                deal.get('departure_date', ''),
-                deal.get('return_date', ''),
-                deal.get('total_price', ''),
-                deal.get('currency', ''),
-                deal.get('airline', ''),
-                analysis.get('score', ''),
-                analysis.get('recommendation', ''),
-                analysis.get('value_assessment', ''),
-                analysis.get('family_suitability', ''),
-                '; '.join(analysis.get('key_pros', [])),
-                '; '.join(analysis.get('key_cons', [])),
-                analysis.get('action_summary', '')
-            ]
+            logged_at = datetime.now()
+            row_data = self.build_deal_row(deal, analysis, brief.get('Brief_ID', ''), logged_at)
+            
+            with self.buffer_lock:
+                self.pending_rows.append(row_data)
+            logging.info(f"Deal queued for Google Sheets: {deal.get('destination')} - Score: {analysis.get('score')}")
             
-            worksheet.append_row(row_data)
-            logging.info(f"Deal logged to Google Sheets: {deal.get('destination')} - Score: {analysis.get('score')}")
+            self.flush_if_due()
             
         except Exception as e:
             logging.error(f"Error logging deal to sheet: {e}")
     
-    def update_brief_timestamp(self, brief_id):
-        """Update the last checked timestamp for a brief"""
-        try:
-            if not self.sheet:
-                logging.info(f"Mock: Would update timestamp for brief {brief_id}")
-                return
-            
-            worksheet = self.sheet.worksheet('ACTIVE TRAVEL BRIEFS')
-            
-            # Find the row with the matching Brief_ID
-            cell = worksheet.find(brief_id)
-            if cell:
-                # Update the Last_Checked column (assuming it's column with header 'Last_Checked')
-                headers = worksheet.row_values(1)
-                if 'Last_Checked' in headers:
-                    col_index = headers.index('Last_Checked') + 1
-                    worksheet.update_cell(cell.row, col_index, datetime.now().isoformat())
-                    logging.info(f"Updated timestamp for brief {brief_id}")
-            
-        except Exception as e:
-            logging.error(f"Error updating brief timestamp: {e}")
+    @staticmethod
+    def build_deal_row(deal, analysis, brief_id, logged_at):
+        """Row for the 'DEAL HISTORY (HEADERS)' worksheet"""
+        return [
+            logged_at.isoformat(),
+            brief_id,
+            deal.get('type', ''),
+            deal.get('origin', ''),
+            deal.get('destination', ''),
+            deal.get('departure_date', ''),
+            deal.get('return_date', ''),
+            deal.get('total_price', ''),
+            deal.get('currency', ''),
+            deal.get('airline', ''),
+            analysis.get('score', ''),
+            analysis.get('recommendation', ''),
+            analysis.get('value_assessment', ''),
+            analysis.get('family_suitability', ''),
+            '; '.join(analysis.get('key_pros', [])),
+            '; '.join(analysis.get('key_cons', [])),
+            analysis.get('action_summary', '')
+        ]
     
-    def is_duplicate_deal(self, deal):
-        """Check if this deal has been logged recently to avoid duplicates"""
+    def append_deal_rows(self, rows):
+        """Write rows to the deal history straight away (used by the Sheets mirror)
+        
+        Raises on failure so the caller can keep its checkpoint and retry.
+        """
+        if not self.sheet:
+            raise RuntimeError("Google Sheets not connected")
+        
         try:
-            if not self.sheet:
-                # For mock, assume no duplicates
-                return False
-            
-            worksheet = self.sheet.worksheet('DEAL HISTORY (HEADERS)')
-            
-            # Get recent deals (last 24 hours)
-            recent_cutoff = (datetime.now() - timedelta(hours=24)).isoformat()
-            
-            # Simple check - in production you might want more sophisticated logic
-            records = worksheet.get_all_records()
-            
-            for record in records:
-                if (record.get('Destination') == deal.get('destination') and
-                    record.get('Departure_Date') == deal.get('departure_date') and
-                    record.get('Total_Price') == deal.get('total_price') and
-                    record.get('Timestamp', '') > recent_cutoff):
-                    
-                    logging.info(f"Duplicate deal detected: {deal.get('destination')} on {deal.get('departure_date')}")
-                    return True
+            worksheet = self.get_deal_history_worksheet()
+            self.call_with_quota_retry(worksheet.append_rows, rows, value_input_option='RAW')
+        except Exception:
+            self.invalidate_metadata()
+            raise
+    
+    def update_brief_timestamp(self, brief_id):
+        """Queue a Last_Checked update for a brief; written on the next flush"""
+        if not self.sheet:
+            logging.info(f"Mock: Would update timestamp for brief {brief_id}")
+            return
+        
+        with self.buffer_lock:
+            self.pending_timestamps[str(brief_id)] = datetime.now().isoformat()
+        self.flush_if_due()
+    
+    def flush_if_due(self):
+        """Flush when the buffer is large enough or has waited long enough"""
+        with self.buffer_lock:
+            pending = len(self.pending_rows) + len(self.pending_timestamps)
+        
+        if pending and (pending >= config.SHEETS_FLUSH_ROWS or
+                        time.monotonic() - self.last_flush >= config.SHEETS_FLUSH_SECONDS):
+            self.flush()
+    
+    def flush(self):
+        """Write buffered rows with one append_rows and timestamps with one batch_update"""
+        if not self.sheet:
+            return
+        
+        with self.flush_lock:
+            with self.buffer_lock:
+                rows, self.pending_rows = self.pending_rows, []
+                timestamps, self.pending_timestamps = self.pending_timestamps, {}
+            self.last_flush = time.monotonic()
             
-            return False
+            if rows:
+                try:
+                    worksheet = self.get_deal_history_worksheet()
+                    self.call_with_quota_retry(worksheet.append_rows, rows, value_input_option='RAW')
+                    logging.info(f"Flushed {len(rows)} deals to Google Sheets")
+                except Exception as e:
+                    logging.error(f"Error flushing deals to sheet, will retry on next flush: {e}")
+                    self.invalidate_metadata()
+                    with self.buffer_lock:
+                        self.pending_rows = rows + self.pending_rows
             
-        except Exception as e:
-            logging.error(f"Error checking for duplicate deal: {e}")
-            return False
+            if timestamps:
+                try:
+                    self.write_brief_timestamps(timestamps)
+                except Exception as e:
+                    logging.error(f"Error flushing brief timestamps, will retry on next flush: {e}")
+                    self.invalidate_metadata()
+                    with self.buffer_lock:
+                        self.pending_timestamps = {**timestamps, **self.pending_timestamps}
     
-    def get_recent_deals(self, limit=20):
-        """Get recent deals for the web interface"""
+    def get_deal_history_worksheet(self):
+        """Get or create the 'DEAL HISTORY (HEADERS)' worksheet"""
         try:
-            if not self.sheet:
-                # Return mock data
-                return [
-                    {
-                        'timestamp': '2025-06-27T10:30:00',
-                        'destination': 'Paris',
-                        'price': '£450',
-                        'score': 8,
-                        'recommendation': 'BOOK_NOW'
-                    },
-                    {
-                        'timestamp': '2025-06-27T10:25:00',
-                        'destination': 'Rome',
-                        'price': '£520',
-                        'score': 7,
-                        'recommendation': 'WATCH'
-                    }
-                ]
-            
-            worksheet = self.sheet.worksheet('DEAL HISTORY (HEADERS)')
-            records = worksheet.get_all_records()
-            
-            # Sort by timestamp and get latest
-            sorted_records = sorted(records, 
-                                  key=lambda x: x.get('Timestamp', ''), 
-                                  reverse=True)
-            
-            return sorted_records[:limit]
-            
-        except Exception as e:
-            logging.error(f"Error getting recent deals: {e}")
-            return []
+            return self.get_worksheet('DEAL HISTORY (HEADERS)')
+        except gspread.WorksheetNotFound:
+            # Create the worksheet if it doesn't exist
+            worksheet = self.sheet.add_worksheet(title='DEAL HISTORY (HEADERS)', rows=1000, cols=20)
+            # Add headers
+            headers = [
+                'Timestamp', 'Brief_ID', 'Deal_Type', 'Origin', 'Destination',
+                'Departure_Date', 'Return_Date', 'Total_Price', 'Currency',
+                'Airline', 'AI_Score', 'Recommendation', 'Value_Assessment',
+                'Family_Suitability', 'Key_Pros', 'Key_Cons', 'Action_Summary'
+            ]
+            worksheet.append_row(headers)
+            with self.metadata_lock:
+                self.worksheets['DEAL HISTORY (HEADERS)'] = worksheet
+            return worksheet
+    
+    def write_brief_timestamps(self, timestamps):
+        """Update Last_Checked for several briefs in a single batch_update"""
+        worksheet = self.get_worksheet('ACTIVE TRAVEL BRIEFS')
+        headers = self.get_header_map('ACTIVE TRAVEL BRIEFS')
+        if 'Last_Checked' not in headers or 'Brief_ID' not in headers:
+            return
+        
+        col_index = headers['Last_Checked']
+        brief_rows = self.get_brief_rows()
+        if any(brief_id not in brief_rows for brief_id in timestamps):
+            # A brief added since the index was built; re-read the ID column once
+            brief_rows = self.get_brief_rows(refresh=True)
+        
+        updates = []
+        for brief_id, checked_at in timestamps.items():
+            if brief_id in brief_rows:
+                row = brief_rows[brief_id]
+                updates.append({
+                    'range': gspread.utils.rowcol_to_a1(row, col_index),
+                    'values': [[checked_at]]
+                })
+        
+        if updates:
+            self.call_with_quota_retry(worksheet.batch_update, updates)
+            logging.info(f"Updated timestamps for {len(updates)} briefs")
+    
+    def expire_metadata(self):
+        """Drop cached sheet metadata once it is older than the TTL"""
+        with self.metadata_lock:
+            if time.monotonic() - self.metadata_loaded_at >= config.SHEETS_METADATA_TTL_SECONDS:
+                self.worksheets.clear()
+                self.header_maps.clear()
+                self.brief_rows = {}
+                self.metadata_loaded_at = time.monotonic()
+    
+    def invalidate_metadata(self):
+        """Forget all cached sheet metadata, e.g. after the sheet layout changed"""
+        with self.metadata_lock:
+            self.worksheets.clear()
+            self.header_maps.clear()
+            self.brief_rows = {}
+            self.metadata_loaded_at = time.monotonic()
+    
+    def get_worksheet(self, title):
+        """Cached worksheet handle; resolving a title is an API round trip"""
+        self.expire_metadata()
+        with self.metadata_lock:
+            worksheet = self.worksheets.get(title)
+        if worksheet is None:
+            worksheet = self.sheet.worksheet(title)
+            with self.metadata_lock:
+                self.worksheets[title] = worksheet
+        return worksheet
+    
+    def get_header_map(self, title):
+        """Cached header -> 1-based column index for a worksheet"""
+        self.expire_metadata()
+        with self.metadata_lock:
+            headers = self.header_maps.get(title)
+        if headers is None:
+            row = self.get_worksheet(title).row_values(1)
+            headers = {header: col for col, header in enumerate(row, start=1)}
+            with self.metadata_lock:
+                self.header_maps[title] = headers
+        return headers
+    
+    def get_brief_rows(self, refresh=False):
+        """Cached Brief_ID -> row number on the 'ACTIVE TRAVEL BRIEFS' worksheet"""
+        self.expire_metadata()
+        with self.metadata_lock:
+            brief_rows = self.brief_rows
+        if refresh or not brief_rows:
+            headers = self.get_header_map('ACTIVE TRAVEL BRIEFS')
+            column = self.get_worksheet('ACTIVE TRAVEL BRIEFS').col_values(headers['Brief_ID'])
+            brief_rows = {brief_id: row for row, brief_id in enumerate(column, start=1) if row > 1}
+            with self.metadata_lock:
+                self.brief_rows = brief_rows
+        return brief_rows
+    
+    @staticmethod
+    def call_with_quota_retry(func, *args, **kwargs):
+        """Call a Sheets API method, backing off on quota (429) and 5xx errors"""
+        for attempt in range(config.SHEETS_MAX_RETRIES + 1):
+            try:
+                return func(*args, **kwargs)
+            except gspread.exceptions.APIError as e:
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                if status not in (429, 500, 503) or attempt == config.SHEETS_MAX_RETRIES:
+                    raise
+                delay = config.SHEETS_RETRY_BACKOFF * (2 ** attempt)
+                logging.warning(f"Sheets API error {status}; retrying in {delay:.0f}s")
+                time.sleep(delay)
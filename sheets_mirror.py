@@ -0,0 +1,182 @@
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+import config
+from db_context import app_context
+
+CHECKPOINT_NAME = 'sheets_deal_history'
+
+
+class SheetsMirror:
+    """Background exporter that copies new Deal rows to Google Sheets
+
+    Search cycles only write to the database. This thread appends deals with
+    an id above the stored checkpoint to the 'DEAL HISTORY (HEADERS)' sheet,
+    so a Sheets outage just delays the copy; it catches up from the
+    checkpoint once the API is reachable again.
+
+    Concurrent saves can commit ids out of order, so a deal is only exported
+    once it is SHEETS_MIRROR_SETTLE_SECONDS old: by then every lower id has
+    committed and the checkpoint never moves past one still in flight.
+    """
+
+    def __init__(self):
+        self.sheets = None
+        self.app = None
+        self.thread = None
+        self.wake_event = threading.Event()
+        self.lock = threading.Lock()
+        self.stats = {'exported': 0, 'failures': 0, 'last_id': 0}
+
+    def start(self, sheets=None, app=None):
+        """Start the exporter thread once per process
+
+        Called from create_app; without ``sheets`` the mirror uses the shared
+        SheetsHandler from the service registry on its first export.
+        """
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.sheets = sheets
+            self.app = app
+            try:
+                with self._context():
+                    self.ensure_checkpoint()
+            except Exception as e:
+                logging.error(f"Error seeding Sheets mirror checkpoint: {e}")
+            self.thread = threading.Thread(target=self._run, name='sheets-mirror', daemon=True)
+            self.thread.start()
+            logging.info("Sheets mirror started")
+
+    def wake(self):
+        """Export now instead of waiting for the next interval"""
+        self.wake_event.set()
+
+    def _run(self):
+        while True:
+            self.wake_event.wait(config.SHEETS_MIRROR_INTERVAL_SECONDS)
+            self.wake_event.clear()
+            try:
+                # Drain the backlog in batches
+                while True:
+                    with self._context():
+                        if self.sync_once() != config.SHEETS_MIRROR_BATCH_SIZE:
+                            break
+            except Exception as e:
+                logging.error(f"Sheets mirror error: {e}")
+
+    def _context(self):
+        """The app context of the app that started the mirror, if none is active"""
+        from flask import has_app_context
+
+        return self.app.app_context() if self.app and not has_app_context() else app_context()
+
+    def sync_once(self):
+        """Export one batch of deals past the checkpoint; returns rows written"""
+        if self.sheets is None:
+            from service_registry import services
+            self.sheets = services.get('sheets')
+        if not self.sheets or not self.sheets.sheet:
+            return 0
+
+        from travel_aigent.models import db, Deal
+
+        with app_context():
+            start_id = self.ensure_checkpoint().last_id
+
+            # Stop before the first deal that hasn't settled yet
+            settled_before = datetime.utcnow() - timedelta(seconds=config.SHEETS_MIRROR_SETTLE_SECONDS)
+            unsettled_id = db.session.query(db.func.min(Deal.id)).filter(
+                Deal.id > start_id, Deal.created_at > settled_before
+            ).scalar()
+            query = Deal.query.filter(Deal.id > start_id)
+            if unsettled_id is not None:
+                query = query.filter(Deal.id < unsettled_id)
+            deals = query.order_by(Deal.id).limit(config.SHEETS_MIRROR_BATCH_SIZE).all()
+            if not deals:
+                return 0
+
+            end_id = deals[-1].id
+            rows = [self.deal_row(deal) for deal in deals]
+
+            # Claim the batch first so two exporters never append the same rows
+            if not self._move_checkpoint(start_id, end_id):
+                logging.info("Sheets mirror batch already claimed by another exporter")
+                return 0
+
+        try:
+            self.sheets.append_deal_rows(rows)
+        except Exception as e:
+            with app_context():
+                self._move_checkpoint(end_id, start_id)
+            with self.lock:
+                self.stats['failures'] += 1
+            logging.error(f"Sheets mirror append failed, will retry from deal {start_id}: {e}")
+            return 0
+
+        with self.lock:
+            self.stats['exported'] += len(rows)
+            self.stats['last_id'] = end_id
+        logging.info(f"Mirrored {len(rows)} deals to Google Sheets (up to ID {end_id})")
+        return len(rows)
+
+    @staticmethod
+    def ensure_checkpoint():
+        """The export checkpoint, created at the current max deal id if missing
+
+        Called when the app starts, before any search saves deals: deals
+        that already exist then were logged to Sheets directly.
+        """
+        from travel_aigent.models import db, Deal, SyncCheckpoint
+
+        checkpoint = SyncCheckpoint.query.filter_by(name=CHECKPOINT_NAME).first()
+        if not checkpoint:
+            current_max = db.session.query(db.func.max(Deal.id)).scalar() or 0
+            checkpoint = SyncCheckpoint(name=CHECKPOINT_NAME, last_id=current_max)
+            db.session.add(checkpoint)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Another process seeded it first
+                db.session.rollback()
+                checkpoint = SyncCheckpoint.query.filter_by(name=CHECKPOINT_NAME).first()
+        return checkpoint
+
+    @staticmethod
+    def _move_checkpoint(expected_id, new_id):
+        """Compare-and-set the checkpoint; False if someone else moved it"""
+        from travel_aigent.models import db, SyncCheckpoint
+
+        updated = SyncCheckpoint.query.filter_by(name=CHECKPOINT_NAME, last_id=expected_id).update(
+            {'last_id': new_id}, synchronize_session=False
+        )
+        db.session.commit()
+        return updated == 1
+
+    def deal_row(self, deal):
+        """Sheet row for a saved Deal, in the same layout as SheetsHandler.log_deal"""
+        deal_data = {
+            'type': deal.type,
+            'origin': deal.departure_location,
+            'destination': deal.destination,
+            'departure_date': deal.departure_date.strftime('%Y-%m-%d') if deal.departure_date else '',
+            'return_date': deal.return_date.strftime('%Y-%m-%d') if deal.return_date else '',
+            'total_price': deal.price,
+            'currency': deal.currency,
+            'airline': deal.airline or ''
+        }
+        analysis = json.loads(deal.analysis) if deal.analysis else {}
+        return self.sheets.build_deal_row(deal_data, analysis, deal.brief_id, deal.created_at)
+
+    def get_stats(self):
+        """Rows exported, failed appends and the last exported deal id"""
+        with self.lock:
+            return dict(self.stats)
+
+
+# Global mirror instance
+sheets_mirror = SheetsMirror()
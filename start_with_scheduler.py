@@ -13,7 +13,8 @@ import schedule
 # Add the project root to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from travel_agent import TravelAgent
+from provider_health import provider_health
+from service_registry import get_agent, services
 from app import app
 
 # Configure logging
@@ -27,11 +28,14 @@ def run_scheduler():
     logging.info("Starting background scheduler thread...")
     
     try:
-        agent = TravelAgent()
+        agent = get_agent()
         
         # Schedule regular searches every 6 hours as requested
         schedule.every(6).hours.do(agent.run_deal_search)
         
+        # Hotel reference data changes rarely; refresh stale cities once a day
+        schedule.every().day.at("03:00").do(agent.refresh_reference_data)
+        
         # Run an initial check after 2 minutes to catch any new briefs
         def initial_check():
             logging.info("Running initial search check...")
@@ -55,6 +59,11 @@ def run_scheduler():
         logging.error(f"Failed to start scheduler: {e}", exc_info=True)
 
 if __name__ == "__main__":
+    # Build the shared clients before the first request or search needs them
+    services.warmup()
+    # Probe providers from startup so /health and /api/status have results
+    provider_health.start(app=app)
+    
     # Start scheduler in background thread
     scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
     scheduler_thread.start()
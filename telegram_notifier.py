@@ -1,7 +1,7 @@
-import requests
 import logging
 from datetime import datetime
 import config
+from http_transport import transport
 
 class TelegramNotifier:
     def __init__(self):
@@ -22,9 +22,7 @@ class TelegramNotifier:
                 'disable_web_page_preview': False
             }
             
-            response = requests.post(f"{self.base_url}/sendMessage", 
-                                   json=payload, 
-                                   timeout=30)
+            response = transport.post(f"{self.base_url}/sendMessage", json=payload)
             
             if response.status_code == 200:
                 logging.info(f"Telegram alert sent successfully for {deal.get('destination')}")
@@ -111,9 +109,7 @@ class TelegramNotifier:
                 'parse_mode': 'HTML'
             }
             
-            response = requests.post(f"{self.base_url}/sendMessage", 
-                                   json=payload, 
-                                   timeout=30)
+            response = transport.post(f"{self.base_url}/sendMessage", json=payload)
             
             if response.status_code == 200:
                 logging.info("Status update sent via Telegram")
@@ -126,7 +122,7 @@ class TelegramNotifier:
     def test_connection(self):
         """Test Telegram bot connection"""
         try:
-            response = requests.get(f"{self.base_url}/getMe", timeout=30)
+            response = transport.get(f"{self.base_url}/getMe")
             
             if response.status_code == 200:
                 bot_info = response.json()
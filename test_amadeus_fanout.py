@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Test the concurrent flight search fan-out and shared rate limiter."""
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import amadeus_api
+from amadeus_api import AmadeusAPI
+from rate_limiter import TokenBucket
+from response_cache import ResponseCache
+
+
+class FakeResponse:
+    def __init__(self, params):
+        self.status_code = 200
+        self.params = params
+        self.text = ''
+
+    def json(self):
+        origin = self.params['originLocationCode']
+        destination = self.params['destinationLocationCode']
+        departure = self.params['departureDate']
+        return {'data': [{
+            'id': f"{origin}-{destination}-{departure}",
+            'itineraries': [{'duration': 'PT2H', 'segments': [{
+                'departure': {'iataCode': origin, 'at': f"{departure}T08:30:00"},
+                'arrival': {'iataCode': destination, 'at': f"{departure}T11:30:00"},
+                'carrierCode': 'BA'
+            }]}],
+            'price': {'total': '400.00', 'currency': 'GBP'},
+            'travelerPricings': [{'fareDetailsBySegment': [{'class': 'Y'}]}],
+            'numberOfBookableSeats': 9
+        }]}
+
+
+def _make_api(monkeypatch, max_workers):
+    active = {'now': 0, 'peak': 0}
+    lock = threading.Lock()
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        with lock:
+            active['now'] += 1
+            active['peak'] = max(active['peak'], active['now'])
+        time.sleep(0.05)
+        with lock:
+            active['now'] -= 1
+        return FakeResponse(params)
+
+    monkeypatch.setattr(amadeus_api.config, 'AMADEUS_CLIENT_ID', 'test-id')
+    monkeypatch.setattr(amadeus_api.config, 'AMADEUS_CLIENT_SECRET', 'test-secret')
+    monkeypatch.setattr(amadeus_api.token_manager, 'start', lambda: None)
+    monkeypatch.setattr(amadeus_api.token_manager, 'get_token', lambda: 'test-token')
+    monkeypatch.setattr(amadeus_api.transport, 'get', fake_get)
+    monkeypatch.setattr(amadeus_api, '_rate_limiter', TokenBucket(60000, 100))
+    monkeypatch.setattr(amadeus_api, '_flight_cache', ResponseCache('flight-offers', 0, 10))
+    monkeypatch.setattr(amadeus_api.config, 'AMADEUS_MAX_WORKERS', max_workers)
+    return AmadeusAPI(), active
+
+
+BRIEF = {
+    'Brief_ID': '42',
+    'Destinations': 'paris, rome',
+    'Travel_Dates': '2025-10-25 to 2025-11-01',
+    'Travelers': '2 adults, 2 children'
+}
+
+
+def test_concurrent_search_matches_sequential(monkeypatch):
+    sequential_api, sequential_active = _make_api(monkeypatch, 1)
+    sequential = sequential_api.search_flights(BRIEF)
+    assert sequential_active['peak'] == 1
+
+    concurrent_api, concurrent_active = _make_api(monkeypatch, 4)
+    timings = []
+    concurrent = concurrent_api.search_flights(BRIEF, timings)
+    assert concurrent_active['peak'] > 1
+
+    strip = lambda deals: [{k: v for k, v in d.items() if k != 'found_at'} for d in deals]
+    assert strip(concurrent) == strip(sequential)
+
+    # 2 destinations x 3 home airports x 2 dates
+    assert len(timings) == 12
+    assert all(t['status'] == 200 and t['latency'] is not None for t in timings)
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate_per_minute=600, capacity=1)  # one token every 0.1s
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    started = time.monotonic()
+    bucket.acquire()
+    bucket.acquire()
+    assert time.monotonic() - started >= 0.15
+
+
+def test_cross_brief_queries_are_coalesced(monkeypatch):
+    api, _ = _make_api(monkeypatch, 4)
+    calls = []
+    fake_get = amadeus_api.transport.get
+
+    def counting_get(url, **kwargs):
+        calls.append(kwargs['params'])
+        return fake_get(url, **kwargs)
+
+    monkeypatch.setattr(amadeus_api.transport, 'get', counting_get)
+
+    briefs = [
+        dict(BRIEF, Brief_ID='1', Destinations='paris, rome'),
+        dict(BRIEF, Brief_ID='2', Destinations='rome'),
+        dict(BRIEF, Brief_ID='3', Destinations='paris'),
+    ]
+    unique, requested = api.plan_flight_queries(briefs)
+    assert requested == 24 and len(unique) == 12
+
+    prefetched = api.prefetch_flight_queries(briefs)
+    assert len(calls) == 12
+
+    for brief in briefs:
+        timings = []
+        deals = api.search_flights(brief, timings, prefetched)
+        assert deals and all(d['brief_id'] == brief['Brief_ID'] for d in deals)
+        assert all(t['coalesced'] for t in timings)
+    assert len(calls) == 12
+
+
+def test_packages_stream_without_waiting_for_slowest_destination(monkeypatch):
+    api, _ = _make_api(monkeypatch, 4)
+
+    def fake_search_hotels(brief, destination, check_in, check_out):
+        time.sleep(1.0 if destination == 'FCO' else 0.05)
+        return [{'id': f"H-{destination}", 'name': 'Family Hotel', 'total_price': 600.0}]
+
+    monkeypatch.setattr(api, 'search_hotels', fake_search_hotels)
+
+    started = time.monotonic()
+    arrivals = []
+    timings = []
+    for package in api.iter_travel_packages(BRIEF, timings):
+        arrivals.append((package['destination'], time.monotonic() - started))
+
+    assert [destination for destination, _ in arrivals] == ['CDG', 'FCO']
+    assert arrivals[0][1] < 0.8
+    assert arrivals[1][1] >= 1.0
+    assert len(timings) == 12
+    assert all(p['total_price'] == 1000.0 for p in api.create_travel_packages(BRIEF))
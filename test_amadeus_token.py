@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Test the shared Amadeus OAuth token manager."""
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import amadeus_api
+from amadeus_api import AmadeusTokenManager
+
+
+class TokenResponse:
+    def __init__(self, number, expires_in):
+        self.number = number
+        self.expires_in = expires_in
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {'access_token': f"token-{self.number}", 'expires_in': self.expires_in}
+
+
+def _fake_post(calls, expires_in, delay=0.0):
+    lock = threading.Lock()
+
+    def post(url, data=None):
+        time.sleep(delay)
+        with lock:
+            calls.append(url)
+            return TokenResponse(len(calls), expires_in)
+    return post
+
+
+def test_concurrent_callers_share_one_token(monkeypatch):
+    calls = []
+    monkeypatch.setattr(amadeus_api.transport, 'post', _fake_post(calls, 3600, delay=0.1))
+    manager = AmadeusTokenManager("https://test.api.amadeus.com")
+    monkeypatch.setattr(manager, 'start', lambda: None)
+
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(manager.get_token())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert set(tokens) == {'token-1'}
+
+
+def test_background_refresh_before_expiry(monkeypatch):
+    calls = []
+    # Tokens live 62s - 60s safety = 2s; refresh 1s before that
+    monkeypatch.setattr(amadeus_api.transport, 'post', _fake_post(calls, 62))
+    monkeypatch.setattr(amadeus_api.config, 'AMADEUS_TOKEN_REFRESH_MARGIN', 1)
+    manager = AmadeusTokenManager("https://test.api.amadeus.com")
+
+    manager.start()
+    deadline = time.time() + 5
+    while len(calls) < 2 and time.time() < deadline:
+        time.sleep(0.05)
+
+    assert len(calls) >= 2
+    assert manager.status()['has_token']
+    assert manager.status()['refresher_running']
+
+
+def test_refresh_margin_is_clamped_to_half_the_token_lifetime(monkeypatch, caplog):
+    from datetime import timedelta
+    calls = []
+    # Tokens live 64s - 60s safety = 4s, far below the configured margin
+    monkeypatch.setattr(amadeus_api.transport, 'post', _fake_post(calls, 64))
+    monkeypatch.setattr(amadeus_api.config, 'AMADEUS_TOKEN_REFRESH_MARGIN', 3600)
+    # Its own host, so refreshers left running by other tests are not counted
+    manager = AmadeusTokenManager("https://clamp.api.amadeus.com")
+    manager.refresh()
+
+    with caplog.at_level('WARNING'):
+        assert manager._refresh_margin() == timedelta(seconds=2)
+        assert manager._refresh_margin() == timedelta(seconds=2)
+    assert len([r for r in caplog.records if 'AMADEUS_TOKEN_REFRESH_MARGIN' in r.getMessage()]) == 1
+
+    # The refresher waits out the first half of the lifetime instead of polling OAuth every second
+    manager.start()
+    time.sleep(1)
+    assert calls.count(manager.token_url) == 1
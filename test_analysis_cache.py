@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Test that repeated deals are served from the analysis cache."""
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import analysis_cache
+from response_cache import ResponseCache
+
+
+def test_key_ignores_brief_id_and_volatile_fields():
+    deal = {'destination': 'ROM', 'departure_date': '2025-10-25', 'airline': 'BA', 'total_price': 412.0,
+            'id': 'A1', 'found_at': '2025-01-01T10:00:00'}
+    brief = {'Brief_ID': '1', 'Budget_Max': '2000', 'Travel_Dates': '2025-10-25'}
+
+    key = analysis_cache.analysis_cache_key(deal, brief)
+    assert key == analysis_cache.analysis_cache_key(dict(deal, id='B2', found_at='later'), dict(brief, Brief_ID='2'))
+    assert key != analysis_cache.analysis_cache_key(dict(deal, total_price=399.0), brief)
+    assert key != analysis_cache.analysis_cache_key(deal, dict(brief, Budget_Max='1500'))
+
+
+def test_hits_skip_the_llm(monkeypatch):
+    from travel_agent import TravelAgent
+
+    monkeypatch.setattr(analysis_cache, '_analysis_cache', ResponseCache('analysis', 60, 100))
+    calls = []
+
+    class FakeAnalyzer:
+        def analyze_deals(self, deals, brief):
+            calls.append(len(deals))
+            return [{'score': 9, 'value_assessment': 'Great'} for _ in deals]
+
+    agent = TravelAgent.__new__(TravelAgent)
+    agent.ai_analyzer = FakeAnalyzer()
+    agent.stats = {'analysis_cache_hits': 0, 'analysis_cache_misses': 0, 'analysis_cache_hit_ratio': 0.0}
+    agent.stats_lock = threading.Lock()
+
+    brief = {'Brief_ID': '1', 'Budget_Max': '2000'}
+    analyze = agent.build_deal_pipeline(brief).stages[2].func
+    deals = [{'destination': 'ROM', 'total_price': 400}, {'destination': 'PAR', 'total_price': 300}]
+
+    analyze([{'deal': deal} for deal in deals])
+    items = analyze([{'deal': deal} for deal in deals])
+
+    assert calls == [2]
+    assert [item['analysis']['score'] for item in items] == [9, 9]
+    assert agent.stats['analysis_cache_hit_ratio'] == 0.5
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Test the request-scoped and process-wide current-user caches."""
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from flask import session
+from sqlalchemy import event
+
+from auth import auth
+
+
+@pytest.fixture
+def app(tmp_path):
+    from travel_aigent import create_app
+    from travel_aigent.models import db, User
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'auth.db'}"})
+    with app.app_context():
+        db.session.add(User(username='family', email='family@example.com', password_hash='x', first_name='Ann'))
+        db.session.commit()
+    yield app
+    auth.user_cache.clear()
+
+
+def _user_queries(app):
+    from travel_aigent.models import db
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def count(conn, cursor, statement, *args):
+        if 'FROM users' in statement:
+            statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    return statements
+
+
+def _request(app):
+    context = app.test_request_context('/')
+    context.push()
+    session.update({'authenticated': True, 'username': 'family', 'login_time': time.time()})
+    return context
+
+
+def test_one_user_query_per_request(app):
+    queries = _user_queries(app)
+
+    context = _request(app)
+    user = auth.get_current_user()
+    assert auth.get_current_user() is user
+    assert session['user_id'] == user.id
+    context.pop()
+    assert len(queries) == 1
+
+
+def test_process_cache_and_invalidation(app, monkeypatch):
+    from travel_aigent.models import db
+    monkeypatch.setattr(auth, 'user_cache_ttl', 60)
+    queries = _user_queries(app)
+
+    context = _request(app)
+    user_id = auth.get_current_user().id
+    context.pop()
+
+    # A later request of the same session is served from the process cache
+    context = _request(app)
+    session['user_id'] = user_id
+    user = auth.get_current_user()
+    assert user.first_name == 'Ann'
+    assert len(queries) == 1
+
+    # Updating the profile drops the cached row
+    user.first_name = 'Anna'
+    db.session.commit()
+    context.pop()
+    assert user_id not in auth.user_cache
+
+    context = _request(app)
+    session['user_id'] = user_id
+    assert auth.get_current_user().first_name == 'Anna'
+    context.pop()
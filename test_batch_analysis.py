@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Test batched deal scoring and its per-deal fallback."""
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import config
+import claude_analyzer
+from claude_analyzer import ClaudeAnalyzer
+from llm_client import LLMError
+
+
+class FakeLLM:
+    def __init__(self, replies):
+        self.replies = replies
+        self.prompts = []
+        self.systems = []
+
+    def complete(self, prompt, system=None, **kwargs):
+        self.prompts.append(prompt)
+        self.systems.append(system)
+        if isinstance(self.replies[0], Exception):
+            raise self.replies.pop(0)
+        return {'text': self.replies.pop(0), 'provider': 'anthropic', 'input_tokens': 0, 'output_tokens': 0}
+
+
+def _analyzer(monkeypatch, replies):
+    llm = FakeLLM(replies)
+    monkeypatch.setattr(claude_analyzer, 'llm_client', llm)
+    monkeypatch.setattr(config, 'AI_BATCH_SIZE', 3)
+    return ClaudeAnalyzer(), llm
+
+
+def _item(index, score):
+    return {'deal_index': index, 'score': score, 'recommendation': 'WATCH',
+            'key_pros': ['ok'], 'key_cons': ['meh'], 'action_summary': 'fine'}
+
+
+def test_one_request_per_batch(monkeypatch):
+    deals = [{'destination': d, 'total_price': 400} for d in ('ROM', 'PAR', 'BCN', 'LIS')]
+    analyzer, llm = _analyzer(monkeypatch, [
+        json.dumps([_item(2, 7), _item(1, 9), _item(3, 4)]),
+        json.dumps(_item(1, 6)),
+    ])
+
+    analyses = analyzer.analyze_deals(deals, {'Brief_ID': '1'})
+
+    assert [a['score'] for a in analyses] == [9, 7, 4, 6]
+    assert len(llm.prompts) == 2
+    # Family and brief context go in the shared prefix, deals as one table row each
+    assert 'Family Profile' in llm.systems[0] and llm.systems[0] == llm.systems[1]
+    assert 'Family Profile' not in llm.prompts[0]
+    assert '\n1|flight|?-ROM|' in llm.prompts[0] and '\n3|flight|?-BCN|' in llm.prompts[0]
+
+
+def test_unparseable_batch_falls_back_per_deal(monkeypatch):
+    deals = [{'destination': 'ROM'}, {'destination': 'PAR'}]
+    analyzer, llm = _analyzer(monkeypatch, [
+        'Sorry, I cannot do that',
+        json.dumps(_item(1, 8)),
+        json.dumps(_item(1, 5)),
+    ])
+
+    analyses = analyzer.analyze_deals(deals, {'Brief_ID': '1'})
+
+    assert [a['score'] for a in analyses] == [8, 5]
+    assert len(llm.prompts) == 3
+
+
+def test_failed_batch_request_is_not_retried_per_deal(monkeypatch):
+    deals = [{'destination': 'ROM'}, {'destination': 'PAR'}, {'destination': 'BCN'}]
+    analyzer, llm = _analyzer(monkeypatch, [LLMError("All AI providers failed: 429")])
+
+    analyses = analyzer.analyze_deals(deals, {'Brief_ID': '1'})
+
+    assert [a['score'] for a in analyses] == [1, 1, 1]
+    assert len(llm.prompts) == 1
+
+
+def test_per_person_price_uses_brief_travelers():
+    table = ClaudeAnalyzer().build_deals_table([{'destination': 'ROM', 'total_price': 1000}],
+                                               {'Travelers': '2 adults, 3 children'})
+    row = dict(zip(table.split('\n')[0].split('|'), table.split('\n')[1].split('|')))
+    assert row['pp'] == '200'
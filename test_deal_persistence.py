@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Test bulk, idempotent deal persistence."""
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from deal_history import deal_fingerprint
+from travel_agent import TravelAgent
+
+
+def _deal(destination, price, **extra):
+    return {'type': 'flight', 'origin': 'LHR', 'destination': destination, 'departure_date': '2025-10-25',
+            'return_date': '2025-11-01', 'total_price': price, 'currency': 'GBP', 'airline': 'BA', **extra}
+
+
+def _setup(tmp_path):
+    from travel_aigent import create_app
+    from travel_aigent.models import db, User, TravelBrief
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'deals.db'}"})
+    with app.app_context():
+        user = User(username='family', email='family@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        brief = TravelBrief(user_id=user.id, destination='Rome', departure_date=datetime(2025, 10, 25),
+                            travelers='4', accommodation_type='hotel')
+        db.session.add(brief)
+        db.session.commit()
+        return app, {'Brief_ID': str(brief.id)}
+
+
+def test_fingerprint_ignores_volatile_fields():
+    assert deal_fingerprint(_deal('FCO', 400)) == deal_fingerprint(_deal('FCO', '400.0', id='X', found_at='now'))
+    assert deal_fingerprint(_deal('FCO', 400)) != deal_fingerprint(_deal('FCO', 401))
+
+
+def test_save_is_bulk_and_idempotent(tmp_path):
+    from travel_aigent.models import Deal
+    app, brief = _setup(tmp_path)
+    agent = TravelAgent.__new__(TravelAgent)
+    items = [(_deal('FCO', 400), {'score': 6}), (_deal('CDG', 300), None), (_deal('FCO', 400), {'score': 6})]
+
+    with app.app_context():
+        ids, inserted = agent.save_deals_to_database(items, brief)
+        assert ids[0] is not None and ids[0] == ids[2]
+        assert inserted == 2
+        assert Deal.query.count() == 2
+
+        # A retried batch returns the same rows instead of inserting new ones
+        assert agent.save_deals_to_database(items, brief) == (ids, 0)
+        assert agent.save_deal_to_database(_deal('CDG', 300), brief) == ids[1]
+        assert Deal.query.count() == 2
+
+        # One bad deal doesn't lose the rest of the batch
+        ids, inserted = agent.save_deals_to_database([(_deal('BCN', 'n/a'), None), (_deal('BCN', 250), None)], brief)
+        assert ids[0] is None and ids[1] is not None
+        assert inserted == 1
+
+
+def test_sheet_only_brief_is_not_saved(tmp_path):
+    app, _ = _setup(tmp_path)
+    agent = TravelAgent.__new__(TravelAgent)
+
+    with app.app_context():
+        assert agent.save_deals_to_database([(_deal('FCO', 400), None)], {'Brief_ID': 'MOCK_001'}) == ([None], 0)
+
+
+def test_search_activity_counts_only_new_deals(tmp_path, monkeypatch):
+    import types
+    import deal_history
+    from travel_aigent.models import SearchActivity
+    app, brief = _setup(tmp_path)
+    # Pipeline threads have no app context and borrow the global app
+    monkeypatch.setitem(sys.modules, 'app', types.SimpleNamespace(app=app))
+    agent = TravelAgent()
+    agent.amadeus = agent.ai_analyzer = agent.telegram = None
+    agent.sheets = type('NoSheets', (), {'update_brief_timestamp': lambda self, brief_id: None,
+                                         'flush': lambda self: None})()
+    # Let already saved offers reach the persist stage, as after a dedup window expires
+    monkeypatch.setattr(deal_history.deal_history, 'is_duplicate', lambda deal: False)
+    monkeypatch.setattr(agent, '_iter_deals', lambda brief, timings, prefetched, fetched: iter(
+        fetched.append(deal) or deal for deal in [_deal('FCO', 400), _deal('CDG', 300)]))
+
+    with app.app_context():
+        agent.process_travel_brief(brief)
+        agent.process_travel_brief(brief)
+        activities = SearchActivity.query.order_by(SearchActivity.id).all()
+
+    assert [activity.deals_created for activity in activities] == [2, 0]
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Test the staged deal pipeline."""
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from deal_pipeline import DealPipeline, Stage
+
+
+def test_stages_drop_and_survive_errors():
+    def dedup(n):
+        return None if n % 3 == 0 else n
+
+    def analyze(n):
+        if n == 4:
+            raise ValueError('bad deal')
+        return n * 10
+
+    pipeline = DealPipeline([Stage('dedup', dedup), Stage('analyze', analyze, workers=3)], queue_size=2)
+    results = pipeline.run(iter(range(1, 8)))
+
+    assert sorted(results) == [10, 20, 50, 70]
+    stats = pipeline.get_stats()
+    assert stats['dedup']['dropped'] == 2
+    assert stats['analyze']['errors'] == 1
+
+
+def test_slow_analysis_overlaps_and_applies_backpressure():
+    produced = []
+    active = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def source():
+        for n in range(8):
+            produced.append(n)
+            yield n
+
+    def analyze(n):
+        with lock:
+            active.append(n)
+            peak[0] = max(peak[0], len(active))
+        time.sleep(0.1)
+        with lock:
+            active.remove(n)
+        return n
+
+    pipeline = DealPipeline([Stage('analyze', analyze, workers=4)], queue_size=1)
+    started = time.monotonic()
+    results = pipeline.run(source())
+
+    assert sorted(results) == list(range(8))
+    assert peak[0] == 4
+    assert time.monotonic() - started < 0.5  # 8 x 0.1s sequentially
+
+
+def test_batched_stage_receives_lists():
+    batches = []
+
+    def analyze(items):
+        batches.append(len(items))
+        return [None if n == 2 else n for n in items]
+
+    pipeline = DealPipeline([Stage('analyze', analyze, batch_size=3, batch_wait=0.2)], queue_size=10)
+    results = pipeline.run(iter(range(7)))
+
+    assert sorted(results) == [0, 1, 3, 4, 5, 6]
+    assert sum(batches) == 7 and max(batches) <= 3
+    assert pipeline.get_stats()['analyze']['dropped'] == 1
+
+
+def test_prescore_barrier_only_with_a_top_k_cut(monkeypatch):
+    import config
+    from travel_agent import TravelAgent
+
+    agent = TravelAgent.__new__(TravelAgent)
+    agent.ai_analyzer = object()
+
+    monkeypatch.setattr(config, 'AI_PRESCORE_TOP_K', 5)
+    stages = agent.build_deal_pipeline({}).stages
+    assert [(stage.name, stage.gather) for stage in stages[:3]] == [
+        ('dedup', False), ('prescore', True), ('analyze', False)]
+
+    # Without a cut, deals stream from dedup straight into analysis
+    monkeypatch.setattr(config, 'AI_PRESCORE_TOP_K', 0)
+    stages = agent.build_deal_pipeline({}).stages
+    assert [stage.name for stage in stages] == ['dedup', 'analyze', 'persist', 'notify']
+
+
+def test_failed_batch_is_retried_item_by_item():
+    def analyze(items):
+        if 3 in items:
+            raise ValueError('bad deal')
+        return items
+
+    pipeline = DealPipeline([Stage('analyze', analyze, batch_size=5, batch_wait=0.2)], queue_size=10)
+    results = pipeline.run(iter(range(5)))
+
+    # Only the bad deal is lost, not its whole batch
+    assert sorted(results) == [0, 1, 2, 4]
+    assert pipeline.get_stats()['analyze']['errors'] == 1
+    assert pipeline.get_stats()['analyze']['processed'] == 4
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Test the rule-based pre-scoring that runs before the LLM stage."""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from deal_prefilter import prescore_deals, select_for_llm
+
+BRIEF = {'Brief_ID': '1', 'Budget_Max': '£2,000', 'Travel_Dates': 'October 25 - November 2 2025'}
+
+
+def _deal(price, stops=0, duration='PT2H30M', date='2025-10-25'):
+    return {'total_price': price, 'stops': stops, 'duration': duration, 'departure_date': date}
+
+
+def test_rules_and_ranking():
+    deals = [
+        _deal(1200),
+        _deal(2500),                   # over budget
+        _deal(900, stops=3),           # too many stops
+        _deal(800, date='2025-12-20'), # outside travel dates
+        _deal(1900, duration='PT14H'),
+    ]
+    frame = prescore_deals(deals, BRIEF)
+
+    assert frame['eligible'].tolist() == [True, False, False, False, True]
+    assert frame.loc[0, 'score'] > frame.loc[4, 'score']
+
+
+def test_only_top_k_reach_the_llm():
+    deals = [_deal(1000 + i * 100) for i in range(6)] + [_deal(3000)]
+    selected, analyses = select_for_llm(deals, BRIEF, top_k=2)
+
+    assert selected == [0, 1]
+    assert sorted(analyses) == [2, 3, 4, 5, 6]
+    assert analyses[6]['score'] == 1 and analyses[6]['recommendation'] == 'IGNORE'
+    assert set(analyses[2]) == {'score', 'recommendation', 'value_assessment', 'family_suitability',
+                                'key_pros', 'key_cons', 'action_summary'}
+
+    selected, analyses = select_for_llm(deals, BRIEF, top_k=0)
+    assert selected == list(range(7)) and analyses == {}
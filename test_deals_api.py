@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Test SQL filtering, cursor pagination and sparse fieldsets of the deals APIs."""
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+
+@pytest.fixture
+def client(tmp_path):
+    from travel_aigent import create_app
+    from travel_aigent.models import db, User, TravelBrief, Deal
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'deals.db'}"})
+
+    with app.app_context():
+        user = User(username='family', email='family@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        brief = TravelBrief(user_id=user.id, destination='Rome', departure_date=datetime(2025, 10, 25),
+                            travelers='4', accommodation_type='hotel')
+        db.session.add(brief)
+        db.session.commit()
+
+        for index, (destination, price, score) in enumerate([
+            ('Rome', 400, 80), ('Paris', 900, 90), ('Rome', 300, 40), ('Barcelona', 500, 70), ('Rome', 350, 85)
+        ]):
+            db.session.add(Deal(brief_id=brief.id, user_id=user.id, title=f'Deal {index}', price=price,
+                                destination=destination, departure_date=datetime(2025, 10, 25), match_score=score))
+        db.session.commit()
+
+    with app.test_client() as client:
+        yield client
+
+
+def test_filters_run_in_sql(client):
+    response = client.get('/api/deals?min_score=6&max_price=600&destination=rom')
+    deals = response.get_json()
+
+    assert response.status_code == 200
+    assert [(deal['destination'], deal['total_price'], deal['ai_score']) for deal in deals] == [
+        ('Rome', 350, 8.5), ('Rome', 400, 8.0)
+    ]
+    assert 'description' not in deals[0]
+
+
+def test_keyset_pages_cover_every_deal_once(client):
+    seen = []
+    url = '/api/deals?min_score=0&limit=2'
+    while True:
+        response = client.get(url)
+        seen.extend(deal['id'] for deal in response.get_json())
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+        url = f'/api/deals?min_score=0&limit=2&cursor={cursor}'
+
+    assert seen == [5, 4, 3, 2, 1]
+
+
+def test_invalid_cursor_is_rejected(client):
+    assert client.get('/api/deals?cursor=not-a-cursor').status_code == 400
+
+
+def test_empty_database_does_not_read_sheets(tmp_path, monkeypatch):
+    from travel_aigent import create_app
+    from travel_aigent.routes import briefs
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'empty.db'}"})
+
+    def no_agent():
+        raise AssertionError("deals are served from the database only")
+
+    monkeypatch.setattr(briefs, '_get_agent', no_agent)
+    with app.test_client() as client:
+        response = client.get('/api/deals')
+
+    assert response.status_code == 200
+    assert response.get_json() == []
+
+
+@pytest.fixture
+def user_client(tmp_path):
+    import time
+    from travel_aigent import create_app
+    from travel_aigent.models import db, User, TravelBrief, Deal
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'user_deals.db'}"})
+
+    with app.app_context():
+        user = User(username='family', email='family@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        brief = TravelBrief(user_id=user.id, destination='Rome', departure_date=datetime(2025, 10, 25),
+                            travelers='4', accommodation_type='hotel')
+        db.session.add(brief)
+        db.session.commit()
+        for index, score in enumerate([70, 90, 70, 80]):
+            db.session.add(Deal(brief_id=brief.id, user_id=user.id, title=f'Deal {index}', price=100 + index,
+                                destination='Rome', departure_date=datetime(2025, 10, 25), match_score=score,
+                                created_at=datetime(2025, 6, 1, 12, index)))
+        db.session.commit()
+
+    with app.test_client() as client:
+        with client.session_transaction() as session:
+            session.update({'authenticated': True, 'username': 'family', 'login_time': time.time()})
+        yield client
+
+
+def test_user_deals_cursor_fields_and_etag(user_client):
+    response = user_client.get('/api/deals/mine?limit=3&fields=id,match_score,total_price')
+    assert response.status_code == 200
+    assert response.get_json() == [
+        {'id': 2, 'match_score': 90.0, 'total_price': 101.0},
+        {'id': 4, 'match_score': 80.0, 'total_price': 103.0},
+        {'id': 3, 'match_score': 70.0, 'total_price': 102.0},
+    ]
+
+    cursor = response.headers['X-Next-Cursor']
+    next_page = user_client.get(f'/api/deals/mine?limit=3&fields=id&cursor={cursor}')
+    assert next_page.get_json() == [{'id': 1}]
+    assert 'X-Next-Cursor' not in next_page.headers
+
+    etag = response.headers['ETag']
+    cached = user_client.get('/api/deals/mine?limit=3&fields=id,match_score,total_price',
+                             headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+
+    assert user_client.get('/api/deals/mine?fields=password').status_code == 400
+    assert 'description' in user_client.get('/api/deals/mine?limit=1').get_json()[0]
+
+
+def test_user_deals_pages_include_unscored_deals(user_client):
+    from travel_aigent.models import db, User, Deal
+
+    with user_client.application.app_context():
+        user_id = User.query.filter_by(username='family').one().id
+        for index in range(2):
+            deal = Deal(brief_id=1, user_id=user_id, title=f'Unscored {index}', price=90, destination='Rome',
+                        departure_date=datetime(2025, 10, 25), match_score=None)
+            db.session.add(deal)
+            db.session.flush()
+            deal.created_at = None
+        db.session.commit()
+
+    seen = []
+    url = '/api/deals/mine?limit=2&fields=id'
+    while url:
+        response = user_client.get(url)
+        seen.extend(deal['id'] for deal in response.get_json())
+        cursor = response.headers.get('X-Next-Cursor')
+        url = f'/api/deals/mine?limit=2&fields=id&cursor={cursor}' if cursor else None
+
+    # NULL scores sort last instead of being dropped or repeated
+    assert seen == [2, 4, 3, 1, 6, 5]
+
+
+def test_only_the_deal_listing_is_mounted(user_client):
+    rules = {str(rule) for rule in user_client.application.url_map.iter_rules()}
+
+    assert '/api/deals/mine' in rules
+    # Unreviewed routes of routes/deals.py stay unmounted
+    for path in ('/api/deals/search', '/api/deals/recent', '/api/deals/<int:deal_id>',
+                 '/api/briefs/<int:brief_id>/search-activity'):
+        assert path not in rules
+    assert user_client.post('/api/deals', json={'title': 'Manual'}).status_code == 405
+
+    # GET /api/deals stays the briefs API; the user's list lives at /api/deals/mine
+    assert 'X-Next-Cursor' in user_client.get('/api/deals?min_score=0&limit=1').headers
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Test the cityCode -> hotel ID reference index."""
+import sys
+import os
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from hotel_index import HotelReferenceIndex
+
+
+def _hotels(*ids):
+    return [{'hotelId': hotel_id, 'name': f'Hotel {hotel_id}', 'geoCode': {'latitude': 1.0, 'longitude': 2.0}}
+            for hotel_id in ids]
+
+
+def test_lookup_only_on_miss_and_survives_restart(tmp_path):
+    from travel_aigent import create_app
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'index.db'}"})
+    calls = []
+
+    def lookup(city_code):
+        calls.append(city_code)
+        return _hotels('H1', 'H2')
+
+    with app.app_context():
+        index = HotelReferenceIndex()
+        assert index.get_hotel_ids('rom', lookup) == ['H1', 'H2']
+        assert index.get_hotel_ids('ROM', lookup) == ['H1', 'H2']
+
+        # A fresh instance reads the table instead of calling the API
+        restarted = HotelReferenceIndex()
+        assert restarted.get_hotel_ids('ROM', lookup) == ['H1', 'H2']
+
+    assert calls == ['ROM']
+
+
+def test_stale_entries_refresh_and_fallback(tmp_path):
+    from travel_aigent import create_app
+    from travel_aigent.models import db, HotelReference
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'index.db'}"})
+
+    with app.app_context():
+        index = HotelReferenceIndex()
+        index.get_hotel_ids('PAR', lambda city_code: _hotels('P1'))
+
+        HotelReference.query.update({'refreshed_at': datetime.utcnow() - timedelta(days=30)})
+        db.session.commit()
+
+        # A failed lookup falls back to the stale IDs
+        restarted = HotelReferenceIndex()
+        assert restarted.get_hotel_ids('PAR', lambda city_code: None) == ['P1']
+
+        assert restarted.refresh_stale(lambda city_code: _hotels('P2', 'P3')) == 1
+        assert [row.hotel_id for row in HotelReference.query.order_by(HotelReference.rank).all()] == ['P2', 'P3']
+
+
+def test_failed_write_keeps_previous_entries(tmp_path):
+    from travel_aigent import create_app
+    from travel_aigent.models import HotelReference
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'index.db'}"})
+
+    with app.app_context():
+        index = HotelReferenceIndex()
+        index.get_hotel_ids('LIS', lambda city_code: _hotels('L1'))
+
+        # The second hotel has no ID, so the write fails after the old rows were deleted
+        index._store('LIS', _hotels('L2') + [{'name': 'No ID'}], datetime.utcnow())
+
+        assert [row.hotel_id for row in HotelReference.query.filter_by(city_code='LIS').all()] == ['L1']
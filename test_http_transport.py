@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Test the pooled HTTP transport against a local keep-alive server."""
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import config
+from http_transport import HttpTransport
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    failures = {}
+
+    def _reply(self):
+        remaining = Handler.failures.get(self.path, (0, 200))
+        if remaining[0] > 0:
+            Handler.failures[self.path] = (remaining[0] - 1, remaining[1])
+            status = remaining[1]
+        else:
+            status = 200
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_connections_are_reused(monkeypatch):
+    monkeypatch.setattr(config, 'HTTP_RETRY_BACKOFF', 0)
+    server, base_url = _start_server()
+    try:
+        transport = HttpTransport()
+        for _ in range(5):
+            assert transport.get(f"{base_url}/ping").status_code == 200
+
+        metrics = transport.get_metrics()[f"127.0.0.1:{server.server_address[1]}"]
+        assert metrics['requests'] == 5
+        assert metrics['handshakes'] == 1
+        assert metrics['reused_connections'] == 4
+    finally:
+        server.shutdown()
+
+
+def test_retry_policy(monkeypatch):
+    monkeypatch.setattr(config, 'HTTP_RETRY_BACKOFF', 0)
+    server, base_url = _start_server()
+    try:
+        transport = HttpTransport()
+
+        # GET is retried on 5xx
+        Handler.failures['/flaky'] = (2, 503)
+        assert transport.get(f"{base_url}/flaky").status_code == 200
+
+        # POST is retried on 429 ...
+        Handler.failures['/limited'] = (1, 429)
+        assert transport.post(f"{base_url}/limited", json={}).status_code == 200
+
+        # ... but never on 5xx, since the provider may have acted on it
+        Handler.failures['/broken'] = (1, 500)
+        assert transport.post(f"{base_url}/broken", json={}).status_code == 500
+    finally:
+        Handler.failures.clear()
+        server.shutdown()
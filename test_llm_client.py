@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Test retry, failover and the shared concurrency cap of the LLM client."""
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import config
+from llm_client import LLMClient, LLMError
+
+
+class FakeStatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+def _client(monkeypatch, send, concurrency=4):
+    monkeypatch.setattr(config, 'ANTHROPIC_API_KEY', 'a-key')
+    monkeypatch.setattr(config, 'OPENAI_API_KEY', 'o-key')
+    monkeypatch.setattr(config, 'AI_REQUESTS_PER_MINUTE', 60000)
+    monkeypatch.setattr(config, 'AI_MAX_CONCURRENCY', concurrency)
+    monkeypatch.setattr(config, 'AI_MAX_RETRIES', 2)
+    monkeypatch.setattr(config, 'AI_RETRY_BACKOFF', 0.01)
+    client = LLMClient()
+    monkeypatch.setattr(client, '_send', send)
+    return client
+
+
+def _ok(provider):
+    return {'text': '{}', 'provider': provider, 'input_tokens': 10, 'output_tokens': 5}
+
+
+def test_retries_rate_limits_then_succeeds(monkeypatch):
+    errors = [FakeStatusError(429), FakeStatusError(529)]
+
+    def send(provider, *args):
+        if errors:
+            raise errors.pop(0)
+        return _ok(provider)
+
+    client = _client(monkeypatch, send)
+    assert client.complete('prompt')['provider'] == 'anthropic'
+    assert client.get_stats()['retries'] == 2
+
+
+def test_fails_over_to_other_provider(monkeypatch):
+    def send(provider, *args):
+        if provider == 'anthropic':
+            raise FakeStatusError(401)
+        return _ok(provider)
+
+    client = _client(monkeypatch, send)
+    assert client.complete('prompt', preferred='anthropic')['provider'] == 'openai'
+    assert client.get_stats()['failovers'] == 1
+
+    monkeypatch.setattr(config, 'OPENAI_API_KEY', '')
+    with pytest.raises(LLMError):
+        client.complete('prompt')
+
+
+def test_concurrency_is_capped_across_threads(monkeypatch):
+    active = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def send(provider, *args):
+        with lock:
+            active.append(1)
+            peak[0] = max(peak[0], len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        return _ok(provider)
+
+    client = _client(monkeypatch, send, concurrency=2)
+    threads = [threading.Thread(target=client.complete, args=('prompt',)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] == 2
+    assert client.get_stats()['requests'] == 6
+
+
+def test_async_callers_share_the_limits(monkeypatch):
+    import asyncio
+
+    client = _client(monkeypatch, lambda provider, *args: _ok(provider))
+
+    async def run():
+        return await asyncio.gather(*(client.acomplete('prompt') for _ in range(3)))
+
+    assert [r['provider'] for r in asyncio.run(run())] == ['anthropic'] * 3
+    assert client.get_stats()['requests'] == 3
+
+
+def test_system_prefix_is_cached_and_usage_reported(monkeypatch):
+    from types import SimpleNamespace
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        usage = SimpleNamespace(input_tokens=40, cache_read_input_tokens=1200, cache_creation_input_tokens=0,
+                                output_tokens=90)
+        return SimpleNamespace(content=[SimpleNamespace(text='{}')], usage=usage)
+
+    client = _client(monkeypatch, None)
+    monkeypatch.setattr(client, '_send', LLMClient._send.__get__(client))
+    client.clients['anthropic'] = SimpleNamespace(messages=SimpleNamespace(create=create))
+
+    result = client.complete('1|flight|LHR-ROM', system='Family Profile ...' * 400)
+
+    assert calls[0]['system'][0]['cache_control'] == {'type': 'ephemeral'}
+    assert (result['input_tokens'], result['cached_input_tokens'], result['output_tokens']) == (1240, 1200, 90)
+    assert client.get_stats()['cached_input_tokens'] == 1200
+
+
+def test_short_system_prefix_is_not_marked_for_caching(monkeypatch):
+    from types import SimpleNamespace
+    from deal_analyzer import DealAnalyzer
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        usage = SimpleNamespace(input_tokens=600, output_tokens=90)
+        return SimpleNamespace(content=[SimpleNamespace(text='{}')], usage=usage)
+
+    client = _client(monkeypatch, None)
+    monkeypatch.setattr(client, '_send', LLMClient._send.__get__(client))
+    client.clients['anthropic'] = SimpleNamespace(messages=SimpleNamespace(create=create))
+
+    # The analyzers' prefix is below the providers' caching minimum
+    system = DealAnalyzer().build_system_prompt({'Brief_ID': '1', 'Destinations': 'Rome'})
+    assert len(system) // 4 < config.AI_PROMPT_CACHE_MIN_TOKENS
+    client.complete('1|flight|LHR-ROM', system=system)
+
+    assert calls[0]['system'] == system
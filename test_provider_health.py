@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Test that status endpoints are served from the background health snapshot."""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import datetime
+
+import pytest
+
+from provider_health import ProviderHealth
+
+
+class StubSheets:
+    sheet = None
+    client = None
+
+
+class StubAgent:
+    amadeus = None
+    ai_analyzer = None
+    telegram = None
+    sheets = StubSheets()
+
+    def __init__(self):
+        self.brief_fetches = 0
+
+    def get_active_briefs_count(self):
+        self.brief_fetches += 1
+        return 3
+
+    def get_last_check_time(self):
+        return "Never"
+
+    def get_total_deals_count(self):
+        return 0
+
+    def get_notifications_count(self):
+        return 0
+
+
+@pytest.fixture
+def app(tmp_path):
+    from travel_aigent import create_app
+    return create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'health.db'}"})
+
+
+def test_probe_all_records_every_provider(app):
+    health = ProviderHealth()
+    health.agent = StubAgent()
+    health.app = app
+    assert health.is_healthy('database') is None
+
+    health.probe_all()
+    snapshot = health.snapshot()
+
+    assert set(snapshot['providers']) == set(ProviderHealth.PROVIDERS)
+    assert snapshot['providers']['database']['healthy'] is True
+    assert snapshot['providers']['amadeus'] == {**snapshot['providers']['amadeus'],
+                                                'healthy': False, 'detail': 'API not initialized'}
+    assert snapshot['active_briefs'] == 3
+    assert snapshot['checked_at'] is not None
+
+
+def test_status_endpoint_does_not_probe(app, monkeypatch):
+    from travel_aigent.routes import status
+    from provider_health import provider_health
+
+    agent = StubAgent()
+    monkeypatch.setattr(status, 'get_agent', lambda: agent)
+    monkeypatch.setattr(provider_health, 'start', lambda agent: None)
+    monkeypatch.setattr(provider_health, 'agent', agent)
+    monkeypatch.setattr(provider_health, 'app', app)
+    provider_health.probe_all()
+    fetches = agent.brief_fetches
+
+    with app.test_client() as client:
+        for _ in range(3):
+            body = client.get('/api/status').get_json()
+
+    assert agent.brief_fetches == fetches
+    assert body['active_briefs'] == 3
+    assert body['services']['database'] is True
+    assert body['services']['amadeus'] is False
+
+
+def test_fresh_app_health_reports_database(app, monkeypatch):
+    from provider_health import provider_health
+
+    # No probe has run yet in this process
+    monkeypatch.setattr(provider_health, 'results', {})
+
+    with app.test_client() as client:
+        body = client.get('/health').get_json()
+
+    assert body['database'] == 'healthy'
+    assert body['service'] == 'TravelAiGent'
+
+
+def test_probes_do_not_read_worksheets(app):
+    from travel_aigent.models import db, User, TravelBrief
+    from travel_agent import TravelAgent
+
+    calls = []
+
+    class FakeSpreadsheet:
+        def fetch_sheet_metadata(self, params=None):
+            calls.append('metadata')
+            return {'spreadsheetId': 'abc'}
+
+    class FakeSheets:
+        sheet = FakeSpreadsheet()
+
+        def get_active_briefs(self):
+            raise AssertionError("the prober must not read the briefs worksheet")
+
+    agent = TravelAgent()
+    agent.sheets = FakeSheets()
+    agent.amadeus = agent.ai_analyzer = agent.telegram = None
+
+    with app.app_context():
+        user = User(username='family', email='family@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        db.session.add(TravelBrief(user_id=user.id, destination='Rome', status='active', travelers='4',
+                                   departure_date=datetime(2025, 10, 25), accommodation_type='hotel'))
+        db.session.commit()
+
+    health = ProviderHealth()
+    health.agent = agent
+    health.app = app
+    for _ in range(2):
+        health.probe_all()
+
+    # The cached worksheet handle would stop checking Sheets after one probe
+    assert calls == ['metadata', 'metadata']
+    assert health.is_healthy('sheets') is True
+    assert health.snapshot()['active_briefs'] == 1
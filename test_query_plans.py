@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Query-plan regression check: the SQL the routes run must use an index, not a table scan."""
+import sys
+import os
+import re
+import time
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from sqlalchemy import event
+
+# (route, table of the hot query, index the plan must search)
+HOT_ROUTES = [
+    ('/api/deals/mine', 'deals', 'ix_deals_user_status_score'),
+    ('/api/deals/mine?fields=id,match_score', 'deals', 'ix_deals_user_status_score'),
+    ('/api/deals/mine?limit=1&cursor={mine_cursor}', 'deals', 'ix_deals_user_status_score'),
+    ('/api/briefs/{brief_id}/deals', 'deals', 'ix_deals_brief_created'),
+    ('/api/notifications/send-pending', 'deals', 'ix_deals_notify_status_score'),
+    ('/brief/{brief_id}', 'search_activities', 'ix_search_activities_brief_started'),
+    ('/', 'travel_briefs', 'ix_travel_briefs_user_created'),
+    ('/briefs', 'travel_briefs', 'ix_travel_briefs_user_created'),
+    ('/api/briefs', 'travel_briefs', 'ix_travel_briefs_user_created'),
+]
+
+
+@pytest.fixture
+def client(tmp_path):
+    from travel_aigent import create_app
+    from travel_aigent.models import db, User, TravelBrief, Deal
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'plans.db'}"})
+
+    with app.app_context():
+        user = User(username='family', email='family@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        brief = TravelBrief(user_id=user.id, destination='Rome', departure_date=datetime(2025, 10, 25),
+                            travelers='4', accommodation_type='hotel')
+        db.session.add(brief)
+        db.session.commit()
+        # Scores stay below the notification threshold so send-pending only queries
+        for index in range(3):
+            db.session.add(Deal(brief_id=brief.id, user_id=user.id, title=f'Deal {index}', price=100 + index,
+                                destination='Rome', departure_date=datetime(2025, 10, 25), match_score=50 + index))
+        db.session.commit()
+        app.config['PLAN_URL_VALUES'] = {'brief_id': brief.id}
+
+    with app.test_client() as client:
+        with client.session_transaction() as session:
+            session.update({'authenticated': True, 'username': 'family', 'login_time': time.time()})
+        with app.app_context():
+            yield client
+
+
+def _route_plans(client, url, table):
+    """Request url and return (sql, plan steps) for each SELECT it ran against table."""
+    from travel_aigent.models import db
+
+    captured = []
+    from_table = re.compile(rf'\bFROM {table}\b')
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and from_table.search(statement):
+            captured.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    assert response.status_code == 200, (url, response.status_code)
+
+    plans = []
+    with db.engine.connect() as conn:
+        for statement, parameters in captured:
+            plan = [row[-1] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+            plans.append((statement, plan))
+    return plans
+
+
+def _url(client, template):
+    values = dict(client.application.config['PLAN_URL_VALUES'])
+    if '{mine_cursor}' in template:
+        values['mine_cursor'] = client.get('/api/deals/mine?limit=1').headers['X-Next-Cursor']
+    return template.format(**values)
+
+
+@pytest.mark.parametrize('route,table,index_name', HOT_ROUTES, ids=[r[0] for r in HOT_ROUTES])
+def test_route_queries_use_index(client, route, table, index_name):
+    plans = _route_plans(client, _url(client, route), table)
+
+    # SQLite reports "SEARCH <table> USING INDEX ..." for index lookups and
+    # "SCAN <table>" for a sequential scan
+    assert any(step.startswith(f'SEARCH {table}') and index_name in step for _, plan in plans for step in plan), plans
+    assert not any(step.startswith(f'SCAN {table}') for _, plan in plans for step in plan), plans
+
+
+def test_deal_list_pages_walk_the_primary_key(client):
+    first = _route_plans(client, '/api/deals?min_score=0&limit=1', 'deals')
+    cursor = client.get('/api/deals?min_score=0&limit=1').headers['X-Next-Cursor']
+    following = _route_plans(client, f'/api/deals?min_score=0&limit=1&cursor={cursor}', 'deals')
+
+    # The id DESC order is read off the rowid, so LIMIT stops the walk early
+    # instead of sorting every matching deal
+    for _, plan in first + following:
+        assert not any('TEMP B-TREE' in step for step in plan), plan
+    assert any('USING INTEGER PRIMARY KEY' in step for _, plan in following for step in plan), following
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Test the Amadeus response cache tiers and counters."""
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import amadeus_api
+from amadeus_api import AmadeusAPI
+from rate_limiter import TokenBucket
+from response_cache import ResponseCache
+
+
+def test_ttl_and_lru_bounds():
+    cache = ResponseCache('test', ttl_seconds=0.2, max_entries=2)
+    cache.set('a', {'v': 1})
+    cache.set('b', {'v': 2})
+    assert cache.get('a') == {'v': 1}  # 'a' is now most recently used
+    cache.set('c', {'v': 3})           # evicts 'b'
+    assert cache.get('b') is None
+    assert cache.get('c') == {'v': 3}
+
+    time.sleep(0.25)
+    assert cache.get('a') is None
+
+    stats = cache.get_stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 2
+    assert stats['evictions'] == 1
+
+
+def test_persistent_tier_survives_restart(tmp_path):
+    from travel_aigent import create_app
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'cache.db'}"})
+
+    with app.app_context():
+        ResponseCache('flight-offers', 60, 10, persistent=True).set('key', {'data': [1, 2]})
+
+        # A fresh instance has an empty memory tier, as after a restart
+        restarted = ResponseCache('flight-offers', 60, 10, persistent=True)
+        assert restarted.get('key') == {'data': [1, 2]}
+        assert restarted.get_stats()['persistent_hits'] == 1
+        assert ResponseCache('hotel-offers', 60, 10, persistent=True).get('key') is None
+
+
+def test_duplicate_flight_searches_hit_cache(monkeypatch):
+    calls = []
+
+    class FakeResponse:
+        status_code = 200
+        text = ''
+
+        def json(self):
+            return {'data': []}
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        calls.append(params)
+        return FakeResponse()
+
+    monkeypatch.setattr(amadeus_api.config, 'AMADEUS_CLIENT_ID', 'test-id')
+    monkeypatch.setattr(amadeus_api.config, 'AMADEUS_CLIENT_SECRET', 'test-secret')
+    monkeypatch.setattr(amadeus_api.token_manager, 'start', lambda: None)
+    monkeypatch.setattr(amadeus_api.token_manager, 'get_token', lambda: 'test-token')
+    monkeypatch.setattr(amadeus_api.transport, 'get', fake_get)
+    monkeypatch.setattr(amadeus_api, '_rate_limiter', TokenBucket(60000, 100))
+    monkeypatch.setattr(amadeus_api, '_flight_cache', ResponseCache('flight-offers', 60, 100))
+
+    brief = {'Destinations': 'rome', 'Travel_Dates': '2025-10-25', 'Travelers': '2 adults'}
+    api = AmadeusAPI()
+    api.search_flights(dict(brief, Brief_ID='1'))
+    first_calls = len(calls)
+
+    timings = []
+    api.search_flights(dict(brief, Brief_ID='2'), timings)
+    assert len(calls) == first_calls
+    assert all(t['cached'] for t in timings)
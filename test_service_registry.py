@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Test lazy, shared construction of services in the registry."""
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from service_registry import ServiceRegistry, services
+from travel_agent import TravelAgent
+
+
+def test_service_built_once_across_threads():
+    registry = ServiceRegistry()
+    builds = []
+
+    def build():
+        builds.append(1)
+        time.sleep(0.05)
+        return object()
+
+    registry.register('client', build)
+    assert builds == []
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get('client'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert len({id(result) for result in results}) == 1
+    assert 'client' in registry.get_stats()
+
+
+def test_warmup_and_failed_build():
+    registry = ServiceRegistry()
+    registry.register('ok', lambda: 'ready')
+    registry.register('broken', lambda: 1 / 0)
+
+    registry.warmup(background=False)
+
+    assert registry.instances == {'ok': 'ready'}
+
+
+def test_agent_clients_are_shared_and_overridable(monkeypatch):
+    shared = object()
+    monkeypatch.setitem(services.instances, 'amadeus', shared)
+
+    first, second = TravelAgent(), TravelAgent()
+    assert first.amadeus is shared and second.amadeus is shared
+
+    # Assigning on an instance overrides the shared client for that agent only
+    first.amadeus = None
+    assert first.amadeus is None
+    assert second.amadeus is shared
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Test the database deal history and the background Sheets mirror."""
+import sys
+import os
+import json
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import config
+from deal_history import DealHistory
+from sheets_handler import SheetsHandler
+from sheets_mirror import SheetsMirror
+
+
+class FakeSheets:
+    """Stands in for SheetsHandler; fails appends while ``down`` is set"""
+
+    build_deal_row = staticmethod(SheetsHandler.build_deal_row)
+
+    def __init__(self):
+        self.sheet = object()
+        self.rows = []
+        self.down = False
+
+    def append_deal_rows(self, rows):
+        if self.down:
+            raise Exception("429 quota exceeded")
+        self.rows.extend(rows)
+
+
+@pytest.fixture(autouse=True)
+def no_settle_window(monkeypatch):
+    # Export deals as soon as they are saved unless a test says otherwise
+    monkeypatch.setattr(config, 'SHEETS_MIRROR_SETTLE_SECONDS', 0)
+
+
+def _setup(tmp_path):
+    from travel_aigent import create_app
+    from travel_aigent.models import db, User, TravelBrief
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'mirror.db'}"})
+    with app.app_context():
+        user = User(username='family', email='family@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        brief = TravelBrief(user_id=user.id, destination='Rome', departure_date=datetime(2025, 10, 25),
+                            travelers='4', accommodation_type='hotel')
+        db.session.add(brief)
+        db.session.commit()
+        return app, user.id, brief.id
+
+
+def _add_deal(user_id, brief_id, destination, price):
+    from travel_aigent.models import db, Deal
+    deal = Deal(brief_id=brief_id, user_id=user_id, title=f'Flight to {destination}', price=price,
+                destination=destination, departure_date=datetime(2025, 10, 25), type='flight',
+                analysis=json.dumps({'score': 8, 'recommendation': 'BOOK_NOW'}))
+    db.session.add(deal)
+    db.session.commit()
+    return deal.id
+
+
+def test_mirror_catches_up_after_outage(tmp_path):
+    app, user_id, brief_id = _setup(tmp_path)
+    sheets = FakeSheets()
+    mirror = SheetsMirror()
+    mirror.sheets = sheets
+
+    with app.app_context():
+        _add_deal(user_id, brief_id, 'CDG', 300)
+        sheets.down = True
+        assert mirror.sync_once() == 0
+        assert mirror.get_stats()['failures'] == 1
+
+        last_id = _add_deal(user_id, brief_id, 'BCN', 350)
+        sheets.down = False
+        assert mirror.sync_once() == 2
+
+    assert [row[4] for row in sheets.rows] == ['CDG', 'BCN']
+    assert sheets.rows[0][10] == 8
+    assert mirror.get_stats()['last_id'] == last_id
+
+
+def test_deals_saved_before_first_sync_are_mirrored(tmp_path):
+    # create_app seeds the checkpoint before any search runs
+    app, user_id, brief_id = _setup(tmp_path)
+    sheets = FakeSheets()
+    mirror = SheetsMirror()
+    mirror.sheets = sheets
+
+    with app.app_context():
+        # The first search cycle saves its deals before the mirror's first sync
+        _add_deal(user_id, brief_id, 'FCO', 400)
+        _add_deal(user_id, brief_id, 'CDG', 300)
+        assert mirror.sync_once() == 2
+
+    assert [row[4] for row in sheets.rows] == ['FCO', 'CDG']
+
+
+def test_existing_deals_are_not_reexported(tmp_path):
+    from travel_aigent.models import db, SyncCheckpoint
+    app, user_id, brief_id = _setup(tmp_path)
+    sheets = FakeSheets()
+    mirror = SheetsMirror()
+    mirror.sheets = sheets
+
+    with app.app_context():
+        _add_deal(user_id, brief_id, 'FCO', 400)
+        # A database that predates the mirror gets its checkpoint at the current max id
+        SyncCheckpoint.query.delete()
+        db.session.commit()
+        mirror.ensure_checkpoint()
+        new_id = _add_deal(user_id, brief_id, 'CDG', 300)
+        assert mirror.sync_once() == 1
+
+    assert [row[4] for row in sheets.rows] == ['CDG']
+    assert mirror.get_stats()['last_id'] == new_id
+
+
+def test_deal_history_dedup_from_database(tmp_path):
+    app, user_id, brief_id = _setup(tmp_path)
+
+    with app.app_context():
+        _add_deal(user_id, brief_id, 'FCO', 400)
+        history = DealHistory()
+        history.load()
+
+    assert history.is_duplicate({'destination': 'FCO', 'departure_date': '2025-10-25', 'total_price': '400.0'})
+    assert not history.is_duplicate({'destination': 'FCO', 'departure_date': '2025-10-25', 'total_price': 399})
+
+    history.record({'destination': 'CDG', 'departure_date': '2025-10-25', 'total_price': 300})
+    assert history.is_duplicate({'destination': 'CDG', 'departure_date': '2025-10-25', 'total_price': 300.0})
+
+
+def test_deal_history_loads_lazily_and_keeps_sheet_only_deals(tmp_path):
+    app, user_id, brief_id = _setup(tmp_path)
+
+    with app.app_context():
+        _add_deal(user_id, brief_id, 'FCO', 400)
+
+        # No explicit load(), as for a search started from the web
+        history = DealHistory()
+        assert history.is_duplicate({'destination': 'FCO', 'departure_date': '2025-10-25', 'total_price': 400})
+
+        # A sheet-only brief's deal has no Deal row; the next cycle's reload keeps it
+        history.record({'destination': 'LIS', 'departure_date': '2025-10-25', 'total_price': 250})
+        history.load()
+
+    assert history.is_duplicate({'destination': 'LIS', 'departure_date': '2025-10-25', 'total_price': 250})
+    assert history.is_duplicate({'destination': 'FCO', 'departure_date': '2025-10-25', 'total_price': 400})
+
+
+def test_unsettled_deals_hold_back_the_checkpoint(tmp_path, monkeypatch):
+    from travel_aigent.models import db, Deal
+    app, user_id, brief_id = _setup(tmp_path)
+    sheets = FakeSheets()
+    mirror = SheetsMirror()
+    mirror.sheets = sheets
+    monkeypatch.setattr(config, 'SHEETS_MIRROR_SETTLE_SECONDS', 60)
+
+    with app.app_context():
+        old_id = _add_deal(user_id, brief_id, 'FCO', 400)
+        Deal.query.filter_by(id=old_id).update({'created_at': datetime.utcnow() - timedelta(minutes=5)})
+        db.session.commit()
+        # A lower id from a concurrent save may still be committing behind this one
+        _add_deal(user_id, brief_id, 'CDG', 300)
+
+        assert mirror.sync_once() == 1
+        assert mirror.get_stats()['last_id'] == old_id
+
+        monkeypatch.setattr(config, 'SHEETS_MIRROR_SETTLE_SECONDS', 0)
+        assert mirror.sync_once() == 1
+
+    assert [row[4] for row in sheets.rows] == ['FCO', 'CDG']
+
+
+def test_app_startup_starts_the_mirror(tmp_path):
+    from sheets_mirror import sheets_mirror
+    _setup(tmp_path)
+
+    # Web-only processes mirror deals too, without waiting for a search cycle
+    assert sheets_mirror.thread is not None and sheets_mirror.thread.is_alive()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Test that sheet writes are buffered and flushed in batches."""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import gspread
+import requests
+
+import config
+from sheets_handler import SheetsHandler
+
+
+class FakeWorksheet:
+    def __init__(self, fail_times=0):
+        self.calls = []
+        self.fail_times = fail_times
+
+    def append_rows(self, rows, value_input_option=None):
+        if self.fail_times:
+            self.fail_times -= 1
+            response = requests.Response()
+            response.status_code = 429
+            response._content = b'{"error": {"code": 429, "message": "Quota exceeded", "status": "RESOURCE_EXHAUSTED"}}'
+            raise gspread.exceptions.APIError(response)
+        self.calls.append(('append_rows', len(rows)))
+
+    def row_values(self, row):
+        self.calls.append(('row_values', row))
+        return ['Brief_ID', 'Status', 'Last_Checked']
+
+    def col_values(self, col):
+        self.calls.append(('col_values', col))
+        return ['Brief_ID', '1', '2', '3']
+
+    def batch_update(self, updates):
+        self.calls.append(('batch_update', [u['range'] for u in updates]))
+
+
+class FakeSheet:
+    def __init__(self, worksheet):
+        self.ws = worksheet
+
+    def worksheet(self, title):
+        return self.ws
+
+
+def _handler(monkeypatch, worksheet):
+    monkeypatch.setattr(config, 'SHEETS_FLUSH_ROWS', 100)
+    monkeypatch.setattr(config, 'SHEETS_FLUSH_SECONDS', 3600)
+    monkeypatch.setattr(config, 'SHEETS_RETRY_BACKOFF', 0)
+    handler = SheetsHandler()
+    handler.sheet = FakeSheet(worksheet)
+    return handler
+
+
+def test_cycle_flushes_in_a_handful_of_calls(monkeypatch):
+    worksheet = FakeWorksheet()
+    handler = _handler(monkeypatch, worksheet)
+
+    for n in range(20):
+        handler.log_deal({'destination': f'D{n}', 'total_price': n}, {'score': 5}, {'Brief_ID': '1'})
+    for brief_id in ('1', '3'):
+        handler.update_brief_timestamp(brief_id)
+    assert worksheet.calls == []
+
+    handler.flush()
+    assert worksheet.calls == [('append_rows', 20), ('row_values', 1), ('col_values', 1),
+                               ('batch_update', ['C2', 'C4'])]
+
+
+def test_size_threshold_and_quota_retry(monkeypatch):
+    worksheet = FakeWorksheet(fail_times=1)
+    handler = _handler(monkeypatch, worksheet)
+    monkeypatch.setattr(config, 'SHEETS_FLUSH_ROWS', 3)
+
+    for n in range(3):
+        handler.log_deal({'destination': f'D{n}', 'total_price': n}, {'score': 5}, {'Brief_ID': '1'})
+
+    assert worksheet.calls == [('append_rows', 3)]
+    assert handler.pending_rows == []
+
+
+def test_metadata_is_cached_across_flushes(monkeypatch):
+    worksheet = FakeWorksheet()
+    handler = _handler(monkeypatch, worksheet)
+    lookups = []
+    handler.sheet.worksheet = lambda title: lookups.append(title) or worksheet
+
+    for cycle in range(3):
+        handler.update_brief_timestamp('2')
+        handler.flush()
+
+    assert worksheet.calls.count(('row_values', 1)) == 1
+    assert worksheet.calls.count(('col_values', 1)) == 1
+    assert worksheet.calls.count(('batch_update', ['C3'])) == 3
+    assert lookups == ['ACTIVE TRAVEL BRIEFS']
+
+    # Once the TTL has passed, metadata is resolved again
+    handler.metadata_loaded_at -= config.SHEETS_METADATA_TTL_SECONDS
+    handler.update_brief_timestamp('2')
+    handler.flush()
+    assert lookups == ['ACTIVE TRAVEL BRIEFS'] * 2
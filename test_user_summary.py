@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Test that incrementally maintained user summaries match a full recount."""
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+
+@pytest.fixture
+def app(tmp_path):
+    from travel_aigent import create_app
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'summary.db'}"})
+    with app.app_context():
+        yield app
+
+
+def _snapshot(summary):
+    return (summary.brief_count, summary.active_deals, summary.best_score, summary.last_search_at)
+
+
+def test_incremental_updates_match_rebuild(app):
+    from travel_aigent.models import db, User, TravelBrief, Deal, UserSummary
+    from travel_aigent.summaries import (get_user_summary, rebuild_user_summary, record_brief_added,
+                                         record_deals_saved, record_search)
+
+    user = User(username='family', email='family@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+
+    # First write creates the row from the tables
+    brief = TravelBrief(user_id=user.id, destination='Rome', departure_date=datetime(2025, 10, 25),
+                        travelers='4', accommodation_type='hotel')
+    db.session.add(brief)
+    record_brief_added(user.id)
+    db.session.commit()
+    assert _snapshot(get_user_summary(user.id)) == (1, 0, None, None)
+
+    for score in (70, 85):
+        db.session.add(Deal(brief_id=brief.id, user_id=user.id, title='Deal', price=100,
+                            destination='Rome', departure_date=datetime(2025, 10, 25), match_score=score))
+    record_deals_saved(user.id, [7.0, 8.5])
+    db.session.add(Deal(brief_id=brief.id, user_id=user.id, title='Deal', price=100,
+                        destination='Rome', departure_date=datetime(2025, 10, 25), match_score=60))
+    record_deals_saved(user.id, [6.0])
+    record_search(user.id, datetime(2025, 6, 1, 9, 30))
+    db.session.commit()
+    db.session.expire_all()
+
+    incremental = _snapshot(db.session.get(UserSummary, user.id))
+    assert incremental == (1, 3, 8.5, datetime(2025, 6, 1, 9, 30))
+
+    # last_search_at is only derived from SearchActivity rows on a rebuild
+    rebuilt = _snapshot(rebuild_user_summary(user.id))
+    assert incremental[:3] == rebuilt[:3]
+
+
+def test_dashboard_reads_summary(app):
+    import time
+    from travel_aigent.models import db, User, UserSummary
+
+    user = User(username='family', email='family@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    db.session.add(UserSummary(user_id=user.id, brief_count=4, active_deals=12))
+    db.session.commit()
+
+    with app.test_client() as client:
+        with client.session_transaction() as session:
+            session.update({'authenticated': True, 'username': 'family', 'login_time': time.time()})
+        page = client.get('/').get_data(as_text=True)
+
+    assert 'id="active-briefs">4<' in page
+    assert 'id="recommendations">12<' in page
+
+
+def test_brief_detail_shows_its_own_searches(app):
+    import time
+    from travel_aigent.models import db, User, TravelBrief, SearchActivity
+
+    user = User(username='family', email='family@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    briefs = [TravelBrief(user_id=user.id, destination=destination, departure_date=datetime(2025, 10, 25),
+                          travelers='4', accommodation_type='hotel') for destination in ('Rome', 'Paris')]
+    db.session.add_all(briefs)
+    db.session.commit()
+    for brief, started_at in ((briefs[0], datetime(2025, 6, 1, 9, 30)), (briefs[0], datetime(2025, 6, 2, 9, 30)),
+                              (briefs[1], datetime(2025, 6, 3, 18, 0))):
+        db.session.add(SearchActivity(brief_id=brief.id, user_id=user.id, status='success', started_at=started_at))
+    db.session.commit()
+
+    with app.test_client() as client:
+        with client.session_transaction() as session:
+            session.update({'authenticated': True, 'username': 'family', 'login_time': time.time()})
+        page = client.get(f'/brief/{briefs[0].id}').get_data(as_text=True)
+
+    # The other brief's later search doesn't show up here
+    assert 'Last search 02 Jun 09:30 UTC' in page
+    assert '<div class="activity-stat-number">2</div>' in page
+
+
+def test_concurrent_summary_insert_keeps_the_callers_transaction(app, monkeypatch):
+    from travel_aigent import summaries
+    from travel_aigent.models import db, User, TravelBrief, UserSummary
+
+    user = User(username='family', email='family@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+
+    # Another writer creates the row between our UPDATE and our INSERT; it
+    # can't see our uncommitted brief
+    insert_summary = summaries._insert_summary
+
+    def racing_insert(user_id):
+        db.session.execute(UserSummary.__table__.insert().values(user_id=user_id, brief_count=0, active_deals=0))
+        return insert_summary(user_id)
+
+    monkeypatch.setattr(summaries, '_insert_summary', racing_insert)
+    brief = TravelBrief(user_id=user.id, destination='Rome', departure_date=datetime(2025, 10, 25),
+                        travelers='4', accommodation_type='hotel')
+    db.session.add(brief)
+    summaries.record_brief_added(user.id)
+    db.session.commit()
+
+    assert TravelBrief.query.count() == 1
+    assert db.session.get(UserSummary, user.id).brief_count == 1
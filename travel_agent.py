@@ -1,53 +1,39 @@
+import json
 import logging
-import time
+import threading
 from datetime import datetime, timedelta
-from sheets_handler import SheetsHandler
-from amadeus_api import AmadeusAPI
-try:
-    from claude_analyzer import ClaudeAnalyzer
-except ImportError:
-    from openai_analyzer import OpenAIAnalyzer
-from telegram_notifier import TelegramNotifier
+from sqlalchemy.exc import IntegrityError
+from deal_pipeline import DealPipeline, Stage
+from analysis_cache import get_cached_analysis, store_analysis
+from deal_prefilter import select_for_llm
+from deal_history import deal_history, deal_fingerprint
+from db_context import app_context
+from sheets_mirror import sheets_mirror
+from service_registry import SharedService
 import config
 
 class TravelAgent:
+    # Clients are shared process-wide and built on first use
+    sheets = SharedService('sheets')
+    amadeus = SharedService('amadeus')
+    ai_analyzer = SharedService('ai_analyzer')
+    telegram = SharedService('telegram')
+    
     def __init__(self):
-        """Initialize the Travel Agent with all required services"""
-        self.sheets = SheetsHandler()
-        
-        # Initialize services with error handling
-        try:
-            self.amadeus = AmadeusAPI()
-        except Exception as e:
-            logging.warning(f"Amadeus API initialization failed: {e}. Will use mock data.")
-            self.amadeus = None
-            
-        try:
-            # Try Claude first, fall back to OpenAI if needed
-            if config.ANTHROPIC_API_KEY:
-                self.ai_analyzer = ClaudeAnalyzer()
-                logging.info("Using Claude for AI analysis")
-            elif config.OPENAI_API_KEY:
-                self.ai_analyzer = OpenAIAnalyzer()
-                logging.info("Using OpenAI for AI analysis")
-            else:
-                raise Exception("No AI API key configured")
-        except Exception as e:
-            logging.warning(f"AI analyzer initialization failed: {e}. Will use mock analysis.")
-            self.ai_analyzer = None
-            
-        try:
-            self.telegram = TelegramNotifier()
-        except Exception as e:
-            logging.warning(f"Telegram notifier initialization failed: {e}. Will log notifications.")
-            self.telegram = None
-            
+        """Initialize the Travel Agent; service clients are resolved lazily"""
         self.last_check_time = None
+        self.active_briefs_count = None  # Set by each search cycle
         self.stats = {
             'total_deals_found': 0,
             'notifications_sent': 0,
-            'searches_completed': 0
+            'searches_completed': 0,
+            'unique_queries_planned': 0,
+            'analysis_cache_hits': 0,
+            'analysis_cache_misses': 0,
+            'analysis_cache_hit_ratio': 0.0,
+            'deals_prescored_out': 0
         }
+        self.stats_lock = threading.Lock()
         
     def run_initial_check(self):
         """Run initial check and remove the one-time schedule"""
@@ -65,6 +51,7 @@ class TravelAgent:
             
             # Get active travel briefs
             active_briefs = self.sheets.get_active_briefs()
+            self.active_briefs_count = len(active_briefs)
             
             if not active_briefs:
                 logging.info("No active travel briefs found")
@@ -72,13 +59,22 @@ class TravelAgent:
                 
             logging.info(f"Processing {len(active_briefs)} active travel briefs")
             
+            # Deal history lives in the database; Sheets gets a background copy
+            deal_history.load()
+            
+            # Planning stage: run each unique route/date query once for all briefs
+            prefetched = self.prefetch_searches(active_briefs)
+            
             for brief in active_briefs:
                 try:
-                    self.process_travel_brief(brief)
-                    time.sleep(2)  # Rate limiting between briefs
+                    self.process_travel_brief(brief, prefetched, flush_sheets=False)
                 except Exception as e:
                     logging.error(f"Error processing brief {brief.get('Brief_ID', 'Unknown')}: {e}")
                     continue
+            
+            # One batched write for the cycle's brief timestamps, then mirror new deals
+            self.sheets.flush()
+            sheets_mirror.wake()
                     
             self.stats['searches_completed'] += 1
             logging.info(f"Deal search cycle completed. Total searches: {self.stats['searches_completed']}")
@@ -86,232 +82,444 @@ class TravelAgent:
         except Exception as e:
             logging.error(f"Error in deal search cycle: {e}")
     
+    def prefetch_searches(self, briefs):
+        """Coalesce the Amadeus queries of every brief into one unique set
+        
+        Returns the prefetched responses to fan out to each matching brief, or
+        None when searches can't be planned (e.g. mock mode).
+        """
+        if not self.amadeus:
+            return None
+        
+        try:
+            prefetched = self.amadeus.prefetch_flight_queries(briefs)
+            self.stats['unique_queries_planned'] += len(prefetched)
+            return prefetched
+        except Exception as e:
+            logging.error(f"Error planning searches, briefs will search individually: {e}")
+            return None
+    
+    def refresh_reference_data(self):
+        """Refresh stale cityCode -> hotel ID entries outside the search path"""
+        if not self.amadeus:
+            return
+        
+        try:
+            refreshed = self.amadeus.refresh_hotel_index()
+            logging.info(f"Reference data refresh completed: {refreshed} cities updated")
+        except Exception as e:
+            logging.error(f"Error refreshing reference data: {e}")
+    
     def save_deal_to_database(self, deal_data, brief_dict, analysis=None):
-        """Save a deal to the database"""
+        """Save a deal to the database; returns the new deal ID, or None if not saved"""
+        ids, _ = self.save_deals_to_database([(deal_data, analysis)], brief_dict)
+        return ids[0]
+    
+    def save_deals_to_database(self, items, brief_dict):
+        """Save a brief's deals in one transaction
+        
+        ``items`` is a list of ``(deal_data, analysis)`` pairs. Returns
+        ``(ids, inserted)``: the deal IDs in the same order, with None for
+        deals that weren't saved (e.g. the brief only exists in Google
+        Sheets), and the number of new rows. Deals are keyed on their
+        fingerprint, so saving a batch again returns the existing IDs.
+        """
+        ids = [None] * len(items)
+        brief_id = brief_dict.get('Brief_ID')
+        if not items:
+            return ids, 0
+        if not brief_id:
+            logging.error("No brief ID provided")
+            return ids, 0
+        
         try:
-            from travel_aigent.models import db, Deal, TravelBrief, SearchActivity
-            from datetime import datetime
-            import app
+            from travel_aigent.models import db, TravelBrief
             
-            with app.app.app_context():
-                # Get the brief from database
-                brief_id = brief_dict.get('Brief_ID')
-                if not brief_id:
-                    logging.error("No brief ID provided")
-                    return
+            with app_context():
+                try:
+                    brief = db.session.get(TravelBrief, int(brief_id)) if str(brief_id).isdigit() else None
+                    if not brief:
+                        logging.info(f"Brief {brief_id} not found in database")
+                        return ids, 0
                     
-                brief = TravelBrief.query.get(int(brief_id))
-                if not brief:
-                    logging.error(f"Brief {brief_id} not found in database")
-                    return
-                
-                # Parse deal data based on type
-                deal_type = deal_data.get('type', 'package')
-                
-                if 'flight' in deal_type:
-                    deal = Deal(
-                        brief_id=brief.id,
-                        user_id=brief.user_id,
-                        title=f"Flight to {deal_data.get('destination', 'Unknown')}",
-                        description=f"{deal_data.get('airline', 'Airline')} flight from {deal_data.get('origin')} to {deal_data.get('destination')}",
-                        price=float(deal_data.get('total_price', 0)),
-                        original_price=float(deal_data.get('total_price', 0)) * 1.2,
-                        currency=deal_data.get('currency', 'GBP'),
-                        provider=deal_data.get('airline', 'Amadeus'),
-                        booking_url=deal_data.get('booking_url', '#'),
-                        destination=deal_data.get('destination', ''),
-                        departure_location=deal_data.get('origin', deal_data.get('departure_location', brief.departure_location)),
-                        departure_date=datetime.strptime(deal_data.get('departure_date'), '%Y-%m-%d') if deal_data.get('departure_date') else None,
-                        return_date=datetime.strptime(deal_data.get('return_date'), '%Y-%m-%d') if deal_data.get('return_date') else None,
-                        airline=deal_data.get('airline'),
-                        type='flight',
-                        match_score=int(analysis.get('score', 7) * 10) if analysis else 70,
-                        status='active'
-                    )
-                elif 'hotel' in deal_type:
-                    deal = Deal(
-                        brief_id=brief.id,
-                        user_id=brief.user_id,
-                        title=deal_data.get('hotel_name', 'Hotel Deal'),
-                        description=deal_data.get('description', 'Hotel accommodation'),
-                        price=float(deal_data.get('total_price', 0)),
-                        original_price=float(deal_data.get('total_price', 0)) * 1.15,
-                        currency=deal_data.get('currency', 'GBP'),
-                        provider=deal_data.get('provider', 'Amadeus'),
-                        booking_url=deal_data.get('booking_url', '#'),
-                        destination=deal_data.get('destination', ''),
-                        departure_location=deal_data.get('departure_location', brief.departure_location),
-                        departure_date=brief.departure_date,  # Use brief's dates for hotels
-                        return_date=brief.return_date,
-                        hotel_name=deal_data.get('hotel_name'),
-                        hotel_rating=deal_data.get('rating'),
-                        type='hotel',
-                        match_score=int(analysis.get('score', 7) * 10) if analysis else 70,
-                        status='active'
-                    )
-                else:  # Package or other
-                    deal = Deal(
-                        brief_id=brief.id,
-                        user_id=brief.user_id,
-                        title=deal_data.get('title', f"Travel Package to {deal_data.get('destination', 'Unknown')}"),
-                        description=deal_data.get('description', 'Complete travel package with flights and hotel'),
-                        price=float(deal_data.get('total_price', 0)),
-                        original_price=float(deal_data.get('original_price', deal_data.get('total_price', 0)) * 1.1),
-                        currency=deal_data.get('currency', 'GBP'),
-                        provider=deal_data.get('provider', 'Amadeus'),
-                        booking_url=deal_data.get('booking_url', '#'),
-                        destination=deal_data.get('destination', ''),
-                        departure_location=deal_data.get('departure_location', brief.departure_location),
-                        departure_date=datetime.strptime(deal_data.get('departure_date'), '%Y-%m-%d') if deal_data.get('departure_date') else None,
-                        return_date=datetime.strptime(deal_data.get('return_date'), '%Y-%m-%d') if deal_data.get('return_date') else None,
-                        type='package',
-                        match_score=int(analysis.get('score', 7) * 10) if analysis else 70,
-                        status='active'
-                    )
-                
-                # Add discount percentage
-                if deal.original_price > 0:
-                    deal.discount_percentage = int(((deal.original_price - deal.price) / deal.original_price) * 100)
-                
-                # Save to database
-                db.session.add(deal)
-                db.session.commit()
-                
-                logging.info(f"Saved deal to database: {deal.title} (ID: {deal.id})")
+                    fingerprints = [deal_fingerprint(deal_data) for deal_data, _ in items]
+                    saved = self._insert_deals(brief, items, fingerprints)
+                    
+                    by_fingerprint = self._existing_deal_ids(brief.id, fingerprints)
+                    ids = [by_fingerprint.get(fingerprint) for fingerprint in fingerprints]
+                    
+                    # Send notifications for new high-score deals
+                    if brief.user:
+                        for deal, analysis in saved:
+                            if analysis and analysis.get('score', 0) >= 8:
+                                try:
+                                    from travel_aigent.services.notifications import notification_service
+                                    notification_service.send_deal_notification(brief.user, deal, brief)
+                                    logging.info(f"Sent notification for high-score deal {deal.id}")
+                                except Exception as e:
+                                    logging.error(f"Failed to send notification: {e}")
+                    
+                    return ids, len(saved)
+                except Exception:
+                    # Roll back while the session's app context is still active
+                    db.session.rollback()
+                    raise
                 
-                # Send notification if high score
-                if brief.user and analysis and analysis.get('score', 0) >= 8:
-                    try:
-                        from travel_aigent.services.notifications import notification_service
-                        notification_service.send_deal_notification(brief.user, deal, brief)
-                        logging.info(f"Sent notification for high-score deal {deal.id}")
-                    except Exception as e:
-                        logging.error(f"Failed to send notification: {e}")
-                        
         except Exception as e:
-            logging.error(f"Error saving deal to database: {e}")
+            logging.error(f"Error saving deals to database: {e}")
+            return ids, 0
+    
+    def _insert_deals(self, brief, items, fingerprints):
+        """Insert the deals not saved yet; returns the new ``(deal, analysis)`` pairs"""
+        from travel_aigent.models import db
+        from travel_aigent.summaries import record_deals_saved
+        
+        existing = self._existing_deal_ids(brief.id, fingerprints)
+        new_deals = {}
+        for (deal_data, analysis), fingerprint in zip(items, fingerprints):
+            if fingerprint in existing or fingerprint in new_deals:
+                continue
+            try:
+                deal = self._build_deal(deal_data, brief, analysis)
+            except (TypeError, ValueError) as e:
+                logging.error(f"Skipping deal to {deal_data.get('destination', 'Unknown')} with invalid data: {e}")
+                continue
+            deal.fingerprint = fingerprint
+            new_deals[fingerprint] = (deal, analysis)
+        
+        if not new_deals:
+            return []
+        
+        try:
+            db.session.add_all([deal for deal, _ in new_deals.values()])
+            record_deals_saved(brief.user_id, [deal.match_score / 10 for deal, _ in new_deals.values()])
+            db.session.commit()
+            logging.info(f"Saved {len(new_deals)} deals to database for brief {brief.id}")
+            return list(new_deals.values())
+        except IntegrityError as e:
+            # A concurrent save of the same offer or one bad row; retry row by row
+            db.session.rollback()
+            logging.warning(f"Bulk deal insert failed for brief {brief.id}, saving deals individually: {e}")
+        
+        existing = self._existing_deal_ids(brief.id, fingerprints)
+        saved = []
+        for (deal_data, analysis), fingerprint in zip(items, fingerprints):
+            if fingerprint in existing or fingerprint not in new_deals:
+                continue
+            deal = self._build_deal(deal_data, brief, analysis)
+            deal.fingerprint = fingerprint
             try:
+                db.session.add(deal)
+                record_deals_saved(brief.user_id, [deal.match_score / 10])
+                db.session.commit()
+                saved.append((deal, analysis))
+            except IntegrityError as e:
                 db.session.rollback()
-            except:
-                pass
+                logging.error(f"Error saving deal to database: {e}")
+        return saved
+    
+    @staticmethod
+    def _existing_deal_ids(brief_id, fingerprints):
+        """Map fingerprint -> deal ID for the brief's already saved deals"""
+        from travel_aigent.models import Deal
+        
+        rows = Deal.query.with_entities(Deal.fingerprint, Deal.id).filter(
+            Deal.brief_id == brief_id, Deal.fingerprint.in_(set(fingerprints))
+        ).all()
+        return dict(rows)
     
-    def process_travel_brief(self, brief):
-        """Process individual travel brief"""
+    @staticmethod
+    def _build_deal(deal_data, brief, analysis):
+        """Deal row for an offer found for ``brief``"""
+        from travel_aigent.models import Deal
+        
+        # Parse deal data based on type
+        deal_type = deal_data.get('type', 'package')
+
+        if 'flight' in deal_type:
+            deal = Deal(
+                brief_id=brief.id,
+                user_id=brief.user_id,
+                title=f"Flight to {deal_data.get('destination', 'Unknown')}",
+                description=f"{deal_data.get('airline', 'Airline')} flight from {deal_data.get('origin')} to {deal_data.get('destination')}",
+                price=float(deal_data.get('total_price', 0)),
+                original_price=float(deal_data.get('total_price', 0)) * 1.2,
+                currency=deal_data.get('currency', 'GBP'),
+                provider=deal_data.get('airline', 'Amadeus'),
+                booking_url=deal_data.get('booking_url', '#'),
+                destination=deal_data.get('destination', ''),
+                departure_location=deal_data.get('origin', deal_data.get('departure_location', brief.departure_location)),
+                departure_date=datetime.strptime(deal_data.get('departure_date'), '%Y-%m-%d') if deal_data.get('departure_date') else None,
+                return_date=datetime.strptime(deal_data.get('return_date'), '%Y-%m-%d') if deal_data.get('return_date') else None,
+                airline=deal_data.get('airline'),
+                type='flight',
+                match_score=int(analysis.get('score', 7) * 10) if analysis else 70,
+                status='active'
+            )
+        elif 'hotel' in deal_type:
+            deal = Deal(
+                brief_id=brief.id,
+                user_id=brief.user_id,
+                title=deal_data.get('hotel_name', 'Hotel Deal'),
+                description=deal_data.get('description', 'Hotel accommodation'),
+                price=float(deal_data.get('total_price', 0)),
+                original_price=float(deal_data.get('total_price', 0)) * 1.15,
+                currency=deal_data.get('currency', 'GBP'),
+                provider=deal_data.get('provider', 'Amadeus'),
+                booking_url=deal_data.get('booking_url', '#'),
+                destination=deal_data.get('destination', ''),
+                departure_location=deal_data.get('departure_location', brief.departure_location),
+                departure_date=brief.departure_date,  # Use brief's dates for hotels
+                return_date=brief.return_date,
+                hotel_name=deal_data.get('hotel_name'),
+                hotel_rating=deal_data.get('rating'),
+                type='hotel',
+                match_score=int(analysis.get('score', 7) * 10) if analysis else 70,
+                status='active'
+            )
+        else:  # Package or other
+            deal = Deal(
+                brief_id=brief.id,
+                user_id=brief.user_id,
+                title=deal_data.get('title', f"Travel Package to {deal_data.get('destination', 'Unknown')}"),
+                description=deal_data.get('description', 'Complete travel package with flights and hotel'),
+                price=float(deal_data.get('total_price', 0)),
+                original_price=float(deal_data.get('original_price', deal_data.get('total_price', 0)) * 1.1),
+                currency=deal_data.get('currency', 'GBP'),
+                provider=deal_data.get('provider', 'Amadeus'),
+                booking_url=deal_data.get('booking_url', '#'),
+                destination=deal_data.get('destination', ''),
+                departure_location=deal_data.get('departure_location', brief.departure_location),
+                departure_date=datetime.strptime(deal_data.get('departure_date'), '%Y-%m-%d') if deal_data.get('departure_date') else None,
+                return_date=datetime.strptime(deal_data.get('return_date'), '%Y-%m-%d') if deal_data.get('return_date') else None,
+                type='package',
+                match_score=int(analysis.get('score', 7) * 10) if analysis else 70,
+                status='active'
+            )
+
+        # Add discount percentage
+        if deal.original_price > 0:
+            deal.discount_percentage = int(((deal.original_price - deal.price) / deal.original_price) * 100)
+
+        if analysis:
+            deal.analysis = json.dumps(analysis)
+        
+        return deal
+    
+    def process_travel_brief(self, brief, prefetched=None, flush_sheets=True):
+        """Process individual travel brief
+        
+        ``prefetched`` holds flight responses already fetched by the planning
+        stage of run_deal_search; only queries missing from it are sent.
+        Sheet writes are buffered; run_deal_search passes ``flush_sheets=False``
+        and flushes once at the end of the cycle instead.
+        """
         brief_id = brief.get('Brief_ID', 'Unknown')
         logging.info(f"Processing travel brief: {brief_id}")
         
-        # Track search activity
-        search_activity = None
         start_time = datetime.now()
-        deals_before = self.stats.get('total_deals_found', 0)
+        route_timings = []
+        
+        # One app context for the brief's search activity; the persist stage
+        # saves all of its deals in a single transaction
+        with app_context():
+            search_activity = self._start_search_activity(brief_id)
+            
+            try:
+                # Deals stream from the searches straight into the pipeline, so
+                # dedup overlaps the slower searches. With a top-K cut the
+                # prescore stage holds analysis until the last search returns
+                fetched = []
+                outcome = {'deals_created': 0}
+                pipeline = self.build_deal_pipeline(brief, outcome)
+                pipeline.run(self._iter_deals(brief, route_timings, prefetched, fetched))
+                travel_packages = fetched
+                
+                logging.info(f"Found {len(travel_packages)} travel packages for brief {brief_id}")
+                logging.info(f"Deal pipeline for brief {brief_id}: {pipeline.get_stats()}")
+                
+                # Update last checked timestamp for this brief
+                self.sheets.update_brief_timestamp(brief_id)
+                if flush_sheets:
+                    self.sheets.flush()
+                
+                # Update search activity with results
+                self._finish_search_activity(
+                    search_activity, start_time, route_timings,
+                    destinations_searched=len({t['destination'] for t in route_timings}) or len(travel_packages),
+                    results_found=len(travel_packages),
+                    status='success' if len(travel_packages) > 0 else 'no_results',
+                    api_calls_made=sum(1 for t in route_timings if not t.get('cached') and not t.get('coalesced')),
+                    deals_created=outcome['deals_created']
+                )
+                        
+            except Exception as e:
+                logging.error(f"Error processing brief {brief_id}: {e}")
+                
+                # Update search activity with error
+                self._finish_search_activity(search_activity, start_time, route_timings,
+                                             status='failed', error_message=str(e))
+    
+    def _start_search_activity(self, brief_id):
+        """Create the SearchActivity row for a brief, or None for sheet-only briefs"""
+        from travel_aigent.models import db, SearchActivity, TravelBrief
+        from travel_aigent.summaries import record_search
         
         try:
-            # Create search activity record
-            from travel_aigent.models import db, SearchActivity, TravelBrief
-            import app
+            brief_obj = db.session.get(TravelBrief, int(brief_id)) if str(brief_id).isdigit() else None
+            if not brief_obj:
+                return None
             
-            with app.app.app_context():
-                brief_obj = TravelBrief.query.get(int(brief_id)) if brief_id != 'Unknown' else None
-                if brief_obj:
-                    search_activity = SearchActivity(
-                        brief_id=brief_obj.id,
-                        user_id=brief_obj.user_id,
-                        search_type='package',
-                        api_provider='amadeus' if self.amadeus else 'mock',
-                        status='started'
-                    )
-                    db.session.add(search_activity)
-                    db.session.commit()
+            search_activity = SearchActivity(
+                brief_id=brief_obj.id,
+                user_id=brief_obj.user_id,
+                search_type='package',
+                api_provider='amadeus' if self.amadeus else 'mock',
+                status='started'
+            )
+            db.session.add(search_activity)
+            record_search(brief_obj.user_id)
+            db.session.commit()
+            return search_activity
         except Exception as e:
             logging.error(f"Error creating search activity: {e}")
+            db.session.rollback()
+            return None
+    
+    def _finish_search_activity(self, search_activity, start_time, route_timings, **fields):
+        """Record the outcome and timings of a brief's search"""
+        from travel_aigent.models import db
+        
+        if not search_activity:
+            return
         
         try:
-            # Search for complete travel packages (flights + hotels)
-            travel_packages = []
-            if self.amadeus:
-                travel_packages = self.amadeus.create_travel_packages(brief)
-                if not travel_packages:
-                    # Fallback to flight-only search if package creation fails
-                    flight_deals = self.amadeus.search_flights(brief)
-                    travel_packages = [{'type': 'flight_only', **deal} for deal in flight_deals]
-            else:
-                # Mock data when Amadeus is unavailable
-                travel_packages = self._get_mock_flight_deals(brief)
-                
-            logging.info(f"Found {len(travel_packages)} travel packages for brief {brief_id}")
+            search_activity.completed_at = datetime.now()
+            search_activity.api_response_time = (datetime.now() - start_time).total_seconds()
+            search_activity.route_timings = json.dumps(route_timings)
+            for name, value in fields.items():
+                setattr(search_activity, name, value)
+            db.session.commit()
+        except Exception as e:
+            logging.error(f"Error updating search activity: {e}")
+            db.session.rollback()
+    
+    def _iter_deals(self, brief, route_timings, prefetched, fetched):
+        """Fetch stage: yield deals for a brief as the searches complete"""
+        if self.amadeus:
+            for package in self.amadeus.iter_travel_packages(brief, route_timings, prefetched):
+                fetched.append(package)
+                yield package
             
-            # Process each package/deal
-            for deal in travel_packages:
-                try:
-                    # Check if we've already processed this deal recently
-                    if self.sheets.is_duplicate_deal(deal):
-                        continue
-                        
-                    # Analyze deal with AI
-                    if self.ai_analyzer:
-                        analysis = self.ai_analyzer.analyze_deal(deal, brief)
-                    else:
-                        analysis = self._get_mock_analysis(deal)
-                    
-                    # Log the deal regardless of score
-                    self.sheets.log_deal(deal, analysis, brief)
-                    self.stats['total_deals_found'] += 1
-                    
-                    # Save deal to database
-                    self.save_deal_to_database(deal, brief, analysis)
-                    
-                    # Send alert if score is high enough
-                    if analysis.get('score', 0) >= config.MIN_SCORE_FOR_ALERT:
-                        if self.telegram:
-                            self.telegram.send_alert(deal, analysis, brief)
-                        else:
-                            logging.info(f"Mock notification: High-score deal for {deal.get('destination', 'Unknown')}")
-                        self.stats['notifications_sent'] += 1
-                        logging.info(f"High-score deal alert sent for {deal.get('destination', 'Unknown')}")
-                    
-                    time.sleep(1)  # Rate limiting between deal analyses
-                    
-                except Exception as e:
-                    logging.error(f"Error processing deal: {e}")
-                    continue
+            if not fetched:
+                # Fallback to flight-only search if package creation fails
+                for deal in self.amadeus.search_flights(brief, route_timings, prefetched):
+                    deal = {'type': 'flight_only', **deal}
+                    fetched.append(deal)
+                    yield deal
+        else:
+            # Mock data when Amadeus is unavailable
+            for deal in self._get_mock_flight_deals(brief):
+                fetched.append(deal)
+                yield deal
+    
+    def build_deal_pipeline(self, brief, outcome=None):
+        """Wire the dedup -> prescore -> analyze -> persist -> notify stages for one brief
+        
+        The persist stage adds the number of new Deal rows to
+        ``outcome['deals_created']``; saved duplicates aren't counted.
+        """
+        seen = set()
+        outcome = outcome if outcome is not None else {}
+        
+        def dedup(deal):
+            # Also drops repeats within this run, which aren't saved yet
+            key = deal_history.deal_key(deal)
+            if key in seen or deal_history.is_duplicate(deal):
+                return None
+            seen.add(key)
+            return {'deal': deal}
+        
+        def prescore(items):
+            # Ranks every candidate of the brief, so this stage is a barrier
+            selected, analyses = select_for_llm([item['deal'] for item in items], brief)
+            for index, analysis in analyses.items():
+                items[index]['analysis'] = analysis
+            self._increment_stat('deals_prescored_out', len(analyses))
+            return items
+        
+        def analyze(items):
+            if not self.ai_analyzer:
+                for item in items:
+                    item['analysis'] = self._get_mock_analysis(item['deal'])
+                return items
             
-            # Update last checked timestamp for this brief
-            self.sheets.update_brief_timestamp(brief_id)
+            # Offers already scored for this brief context skip the LLM
+            pending = []
+            lookups = 0
+            for item in items:
+                if item.get('analysis'):
+                    continue  # Heuristic analysis from the prescore stage
+                lookups += 1
+                item['analysis'] = get_cached_analysis(item['deal'], brief)
+                if item['analysis'] is None:
+                    pending.append(item)
+            self._record_analysis_cache(lookups - len(pending), len(pending))
             
-            # Update search activity with results
-            if search_activity:
-                try:
-                    with app.app.app_context():
-                        # Refresh the activity object
-                        search_activity = SearchActivity.query.get(search_activity.id)
-                        if search_activity:
-                            search_activity.completed_at = datetime.now()
-                            search_activity.destinations_searched = len(travel_packages)
-                            search_activity.results_found = len(travel_packages)
-                            search_activity.status = 'success' if len(travel_packages) > 0 else 'no_results'
-                            search_activity.api_response_time = (datetime.now() - start_time).total_seconds()
-                            search_activity.api_calls_made = len(travel_packages) if self.amadeus else 0
-                            search_activity.deals_created = self.stats.get('total_deals_found', 0) - deals_before
-                            db.session.commit()
-                except Exception as e:
-                    logging.error(f"Error updating search activity: {e}")
-                    
-        except Exception as e:
-            logging.error(f"Error processing brief {brief_id}: {e}")
+            # One LLM request scores the whole batch
+            if pending:
+                analyses = self.ai_analyzer.analyze_deals([item['deal'] for item in pending], brief)
+                for item, analysis in zip(pending, analyses):
+                    item['analysis'] = analysis
+                    store_analysis(item['deal'], brief, analysis)
+            return items
+        
+        def persist(items):
+            # One transaction per brief; the Sheets mirror copies the rows later
+            deal_ids, inserted = self.save_deals_to_database([(item['deal'], item['analysis']) for item in items], brief)
+            outcome['deals_created'] = outcome.get('deals_created', 0) + inserted
+            for item, deal_id in zip(items, deal_ids):
+                if deal_id is None:
+                    # Sheet-only briefs have no database row; log those to the sheet directly
+                    self.sheets.log_deal(item['deal'], item['analysis'], brief)
+                deal_history.record(item['deal'])
+            self._increment_stat('total_deals_found', len(items))
+            return items
+        
+        def notify(item):
+            deal, analysis = item['deal'], item['analysis']
             
-            # Update search activity with error
-            if search_activity:
-                try:
-                    with app.app.app_context():
-                        search_activity = SearchActivity.query.get(search_activity.id)
-                        if search_activity:
-                            search_activity.completed_at = datetime.now()
-                            search_activity.status = 'failed'
-                            search_activity.error_message = str(e)
-                            search_activity.api_response_time = (datetime.now() - start_time).total_seconds()
-                            db.session.commit()
-                except Exception as e2:
-                    logging.error(f"Error updating failed search activity: {e2}")
+            # Send alert if score is high enough
+            if analysis.get('score', 0) >= config.MIN_SCORE_FOR_ALERT:
+                if self.telegram:
+                    self.telegram.send_alert(deal, analysis, brief)
+                else:
+                    logging.info(f"Mock notification: High-score deal for {deal.get('destination', 'Unknown')}")
+                self._increment_stat('notifications_sent')
+                logging.info(f"High-score deal alert sent for {deal.get('destination', 'Unknown')}")
+            return item
+        
+        stages = [Stage('dedup', dedup)]
+        if self.ai_analyzer and config.AI_PRESCORE_TOP_K > 0:
+            # The top-K cut needs the whole set; without it deals stream on to analysis
+            stages.append(Stage('prescore', prescore, gather=True))
+        stages += [
+            Stage('analyze', analyze, workers=config.PIPELINE_ANALYZE_WORKERS, batch_size=config.AI_BATCH_SIZE),
+            Stage('persist', persist, gather=True),
+            Stage('notify', notify, workers=config.PIPELINE_NOTIFY_WORKERS)
+        ]
+        return DealPipeline(stages, queue_size=config.PIPELINE_QUEUE_SIZE)
+    
+    def _increment_stat(self, name, count=1):
+        with self.stats_lock:
+            self.stats[name] += count
+    
+    def _record_analysis_cache(self, hits, misses):
+        with self.stats_lock:
+            self.stats['analysis_cache_hits'] += hits
+            self.stats['analysis_cache_misses'] += misses
+            lookups = self.stats['analysis_cache_hits'] + self.stats['analysis_cache_misses']
+            self.stats['analysis_cache_hit_ratio'] = round(self.stats['analysis_cache_hits'] / lookups, 3) if lookups else 0.0
     
     def _get_mock_flight_deals(self, brief):
         """Generate mock flight deals for testing"""
@@ -369,11 +577,20 @@ class TravelAgent:
         return "Never"
     
     def get_active_briefs_count(self):
-        """Get count of active briefs"""
+        """Count of active briefs from the last search cycle, or the database before one has run
+
+        Never reads Sheets, so status polls and the health prober stay cheap.
+        """
+        if self.active_briefs_count is not None:
+            return self.active_briefs_count
+        
         try:
-            briefs = self.sheets.get_active_briefs()
-            return len(briefs)
-        except:
+            from travel_aigent.models import TravelBrief
+            
+            with app_context():
+                return TravelBrief.query.filter_by(status='active').count()
+        except Exception as e:
+            logging.error(f"Error counting active briefs: {e}")
             return 0
     
     def get_total_deals_count(self):
@@ -150,6 +150,16 @@ def create_app(config_overrides=None):
         # Ensure admin user exists
         _ensure_admin_user()
         
+        # Seed the Sheets export checkpoint before any search saves deals, and
+        # mirror deals saved by web-triggered searches too
+        try:
+            from sheets_mirror import sheets_mirror
+            sheets_mirror.ensure_checkpoint()
+            sheets_mirror.start(app=app)
+        except Exception as e:
+            logging.error(f"Error starting Sheets mirror: {e}")
+            db.session.rollback()
+        
     # Make version available to all templates
     @app.context_processor
     def inject_version():
@@ -167,15 +177,7 @@ def create_app(config_overrides=None):
         return response
 
     # ---------------------------------------------------------------------
-    # Simple health check route
-    @app.route('/health')
-    def health_check():
-        from flask import jsonify
-        return jsonify({
-            'status': 'healthy', 
-            'app': 'TravelAiGent',
-            'version': VERSION_FULL
-        }), 200
+    # /health is served by the status blueprint (includes database status)
     
     # Debug route to check deployment
     @app.route('/version')
@@ -215,6 +217,7 @@ def create_app(config_overrides=None):
     # ---------------------------------------------------------------------
     from .routes.status import bp as status_bp  # pylint: disable=import-outside-toplevel
     from .routes.briefs import bp as briefs_bp  # pylint: disable=import-outside-toplevel
+    from .routes.deals import listing_bp as deal_listing_bp  # pylint: disable=import-outside-toplevel
     from .routes.auth import bp as auth_bp  # pylint: disable=import-outside-toplevel
     from .routes.profile import bp as profile_bp  # pylint: disable=import-outside-toplevel
     from .routes.groups import groups_bp  # pylint: disable=import-outside-toplevel
@@ -236,6 +239,10 @@ def create_app(config_overrides=None):
     app.register_blueprint(briefs_bp)
     logging.info("Registered briefs blueprint")
     
+    # Only the paginated deal listing; the rest of routes/deals.py is unmounted
+    app.register_blueprint(deal_listing_bp)
+    logging.info("Registered deal listing blueprint")
+    
     app.register_blueprint(profile_bp)
     logging.info(f"Registered profile blueprint - routes: {[str(rule) for rule in app.url_map.iter_rules() if 'profile' in str(rule)]}")
     
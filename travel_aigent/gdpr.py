@@ -4,7 +4,7 @@ import logging
 from datetime import datetime
 from typing import Dict, Any
 from flask import jsonify
-from .models import db, User, TravelBrief, TravelGroup, UserSchool, Deal
+from .models import db, User, TravelBrief, TravelGroup, UserSchool, Deal, UserSummary
 
 
 class GDPRCompliance:
@@ -120,6 +120,9 @@ class GDPRCompliance:
                 db.session.delete(school)
                 deleted_counts["schools"] += 1
             
+            # Drop the precomputed dashboard summary; it is rebuilt on next access
+            UserSummary.query.filter_by(user_id=user_id).delete()
+            
             if delete_account:
                 # Anonymize user data instead of hard delete
                 user.username = f"deleted_user_{user.id}"
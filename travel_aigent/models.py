@@ -1,4 +1,5 @@
 """Database models for Travel AiGent system"""
+import json
 import os
 import secrets
 from datetime import datetime, timedelta
@@ -75,6 +76,10 @@ class User(db.Model):
 class TravelBrief(db.Model):
     """Travel brief model for storing search criteria"""
     __tablename__ = 'travel_briefs'
+    __table_args__ = (
+        # A user's briefs, newest first (dashboard and brief lists)
+        db.Index('ix_travel_briefs_user_created', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
@@ -139,6 +144,16 @@ class TravelBrief(db.Model):
 class Deal(db.Model):
     """Deal model for tracking matched travel deals"""
     __tablename__ = 'deals'
+    __table_args__ = (
+        # Saving the same offer for a brief twice is a no-op (see deal_fingerprint)
+        db.UniqueConstraint('brief_id', 'fingerprint', name='uq_deals_brief_fingerprint'),
+        # Hot read paths: a user's deals by status and score, a brief's deals
+        # by date, pending notifications, and recent active deals
+        db.Index('ix_deals_user_status_score', 'user_id', 'status', 'match_score', 'created_at'),
+        db.Index('ix_deals_brief_created', 'brief_id', 'created_at'),
+        db.Index('ix_deals_notify_status_score', 'notification_sent', 'status', 'match_score'),
+        db.Index('ix_deals_status_created', 'status', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     brief_id = db.Column(db.Integer, db.ForeignKey('travel_briefs.id'), nullable=False)
@@ -171,6 +186,8 @@ class Deal(db.Model):
     # Deal Status
     status = db.Column(db.String(20), default='active')  # active, expired, booked, hidden
     match_score = db.Column(db.Float, default=0.0)  # How well it matches the brief
+    analysis = db.Column(db.Text)  # JSON AI analysis (score, recommendation, pros/cons)
+    fingerprint = db.Column(db.String(40))  # SHA-1 of route, dates, carrier/hotel and price
     notification_sent = db.Column(db.Boolean, default=False)
     expires_at = db.Column(db.DateTime)
     
@@ -208,6 +225,7 @@ class Deal(db.Model):
             'type': self.type,
             'status': self.status,
             'match_score': self.match_score,
+            'analysis': json.loads(self.analysis) if self.analysis else None,
             'notification_sent': self.notification_sent,
             'expires_at': self.expires_at.isoformat() if self.expires_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
@@ -443,6 +461,10 @@ class UserSchool(db.Model):
 class SearchActivity(db.Model):
     """Track all search activities and API calls for briefs"""
     __tablename__ = 'search_activities'
+    __table_args__ = (
+        # A brief's search history, newest first
+        db.Index('ix_search_activities_brief_started', 'brief_id', 'started_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     brief_id = db.Column(db.Integer, db.ForeignKey('travel_briefs.id'), nullable=False)
@@ -457,6 +479,7 @@ class SearchActivity(db.Model):
     destinations_searched = db.Column(db.Integer, default=0)
     api_calls_made = db.Column(db.Integer, default=0)
     api_response_time = db.Column(db.Float)  # in seconds
+    route_timings = db.Column(db.Text)  # JSON array of per-route latency records
     error_message = db.Column(db.Text)
     
     # Results
@@ -487,6 +510,7 @@ class SearchActivity(db.Model):
             'destinations_searched': self.destinations_searched,
             'api_calls_made': self.api_calls_made,
             'api_response_time': self.api_response_time,
+            'route_timings': json.loads(self.route_timings) if self.route_timings else [],
             'error_message': self.error_message,
             'results_found': self.results_found,
             'deals_created': self.deals_created,
@@ -532,4 +556,95 @@ class PasswordResetToken(db.Model):
     
     def is_valid(self):
         """Check if token is still valid"""
-        return not self.used and datetime.utcnow() < self.expires_at
\ No newline at end of file
+        return not self.used and datetime.utcnow() < self.expires_at
+
+
+class CacheEntry(db.Model):
+    """Persistent tier for API response caches, survives restarts"""
+    __tablename__ = 'cache_entries'
+    __table_args__ = (
+        db.UniqueConstraint('namespace', 'cache_key', name='uq_cache_entries_namespace_key'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    namespace = db.Column(db.String(50), nullable=False)  # flight-offers, hotel-offers, ...
+    cache_key = db.Column(db.String(64), nullable=False)  # sha256 of the normalized request
+    payload = db.Column(db.Text, nullable=False)  # JSON response body
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class HotelReference(db.Model):
+    """Amadeus hotel reference data per city, so hotel search can skip the by-city lookup"""
+    __tablename__ = 'hotel_references'
+    __table_args__ = (
+        db.UniqueConstraint('city_code', 'hotel_id', name='uq_hotel_references_city_hotel'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    city_code = db.Column(db.String(10), nullable=False, index=True)
+    hotel_id = db.Column(db.String(20), nullable=False)
+    rank = db.Column(db.Integer, default=0)  # Position in the by-city result
+    
+    # Hotel metadata
+    name = db.Column(db.String(200))
+    chain_code = db.Column(db.String(10))
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    distance_km = db.Column(db.Float)
+    
+    # Timestamps
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'city_code': self.city_code,
+            'hotel_id': self.hotel_id,
+            'rank': self.rank,
+            'name': self.name,
+            'chain_code': self.chain_code,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'distance_km': self.distance_km,
+            'refreshed_at': self.refreshed_at.isoformat() if self.refreshed_at else None
+        }
+
+
+class SyncCheckpoint(db.Model):
+    """Progress marker for background exports (e.g. the Sheets deal mirror)"""
+    __tablename__ = 'sync_checkpoints'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    last_id = db.Column(db.Integer, default=0, nullable=False)  # Highest exported row id
+    
+    # Timestamps
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class UserSummary(db.Model):
+    """Per-user dashboard counters, kept up to date as briefs, deals and searches are written"""
+    __tablename__ = 'user_summaries'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    brief_count = db.Column(db.Integer, default=0, nullable=False)
+    active_deals = db.Column(db.Integer, default=0, nullable=False)
+    best_score = db.Column(db.Float)  # Highest AI score (1-10) among active deals
+    last_search_at = db.Column(db.DateTime)
+    
+    # Timestamps
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'user_id': self.user_id,
+            'brief_count': self.brief_count,
+            'active_deals': self.active_deals,
+            'best_score': self.best_score,
+            'last_search_at': self.last_search_at.isoformat() if self.last_search_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
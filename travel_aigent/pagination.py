@@ -0,0 +1,88 @@
+"""Keyset (cursor) pagination helpers for the JSON APIs"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import and_, func, literal, or_, DateTime, Float, Integer
+
+
+def _sort_keys(columns: List[Any]) -> List[Tuple[Any, Any]]:
+    """``(column, null_default)`` pairs; plain columns have no default"""
+    return [column if isinstance(column, tuple) else (column, None) for column in columns]
+
+
+def sort_columns(columns: List[Any]) -> List[Any]:
+    """The table columns behind a sort key list, e.g. to add them to a projection"""
+    return [column for column, _ in _sort_keys(columns)]
+
+
+def _sort_expression(column: Any, default: Any) -> Any:
+    """The SQL sort expression; NULLs sort as ``default`` when one is given"""
+    if default is None:
+        return column
+    return func.coalesce(column, literal(default, type_=column.type))
+
+
+def encode_cursor(row: Any, columns: List[Any]) -> str:
+    """Opaque cursor holding the sort key of the last row on a page"""
+    values = []
+    for column, default in _sort_keys(columns):
+        value = getattr(row, column.key)
+        if value is None:
+            value = default
+        values.append(value.isoformat() if isinstance(value, datetime) else value)
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, columns: List[Any]) -> List[Any]:
+    """Sort key values from a cursor; raises ValueError if it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("Invalid cursor")
+
+    decoded = []
+    try:
+        for (column, _), value in zip(_sort_keys(columns), values):
+            if isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column.type, Integer):
+                value = int(value)
+            elif isinstance(column.type, Float):
+                value = float(value)
+            decoded.append(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    return decoded
+
+
+def paginate(query: Any, columns: List[Any], cursor: Optional[str], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Return one page of ``query`` ordered by ``columns`` descending
+
+    The sort columns must end with a unique column (the primary key) so the
+    order is total. A nullable column is passed as a ``(column, default)``
+    pair and sorted with COALESCE, since a NULL never matches the keyset
+    condition and would drop out of every page. Rows after the cursor are selected
+    with a keyset condition instead of OFFSET, so every page costs the same
+    however deep the client pages. Returns ``(rows, next_cursor)``, with a
+    None cursor on the last page.
+    """
+    keys = [_sort_expression(column, default) for column, default in _sort_keys(columns)]
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        # (a, b, c) < (x, y, z) spelled out so it works on every backend
+        query = query.filter(or_(*[
+            and_(*[keys[j] == values[j] for j in range(i)], keys[i] < values[i])
+            for i in range(len(keys))
+        ]))
+
+    rows = query.order_by(*[key.desc() for key in keys]).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1], columns)
@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for
 from argon2 import PasswordHasher
 
@@ -385,13 +384,3 @@ def reset_password():  # type: ignore[return-value]
     except Exception as exc:  # noqa: BLE001
         logging.exception("Password reset error: %s", exc)
         return jsonify({"error": "Failed to reset password"}), 500
-
-
-@bp.route("/health")
-def health_check():  # type: ignore[return-value]
-    """Health check endpoint for debugging."""
-    return jsonify({
-        "status": "ok",
-        "message": "TravelAiGent is running",
-        "timestamp": str(datetime.now())
-    })
\ No newline at end of file
@@ -3,30 +3,30 @@ from __future__ import annotations
 
 import logging
 import threading
-from typing import Any, TypedDict
+from typing import Any
 
 from flask import Blueprint, render_template, jsonify, request
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
+from provider_health import provider_health
+from service_registry import get_agent
 from travel_agent import TravelAgent
 from validation import validate_and_sanitize_brief, validate_query_params, validate_brief_id
-from auth import require_auth
-from ..models import db, TravelBrief, Deal, User
+from auth import auth, require_auth
+from ..models import db, TravelBrief, Deal, SearchActivity
+from ..pagination import paginate
+from ..summaries import get_user_summary, rebuild_user_summary, record_brief_added
 
 # Rate limiter instance (will be initialized by app factory)
 limiter = Limiter(key_func=get_remote_address)
 
 bp = Blueprint("briefs", __name__)
 
-_agent: TravelAgent | None = None
-
-
 def _get_agent() -> TravelAgent:
-    global _agent  # noqa: PLW0603
-    if _agent is None:
-        _agent = TravelAgent()
-    return _agent
+    agent = get_agent()
+    provider_health.start(agent)
+    return agent
 
 
 # ---------------------------------------------------------------------------
@@ -46,9 +46,11 @@ def index():  # type: ignore[return-value]
             user = auth.get_current_user()
             
             # Get stats for dashboard - filter by user
+            summary = None
             if user and hasattr(user, 'id') and user.id > 0:
-                # Regular user - filter by user_id
-                briefs_count = TravelBrief.query.filter_by(user_id=user.id).count()
+                # Regular user - counters come from the precomputed summary row
+                summary = get_user_summary(user.id)
+                briefs_count = summary.brief_count if summary else TravelBrief.query.filter_by(user_id=user.id).count()
                 recent_briefs = TravelBrief.query.filter_by(user_id=user.id).order_by(TravelBrief.created_at.desc()).limit(3).all()
             else:
                 # Admin user or no valid user - show all briefs for now
@@ -61,7 +63,6 @@ def index():  # type: ignore[return-value]
             amadeus_info = {}
             try:
                 import os
-                from amadeus_api import AmadeusAPI
                 
                 amadeus_info = {
                     'client_id_set': bool(os.environ.get("AMADEUS_CLIENT_ID")),
@@ -69,22 +70,20 @@ def index():  # type: ignore[return-value]
                     'client_id_length': len(os.environ.get("AMADEUS_CLIENT_ID", "")),
                 }
                 
-                agent = _get_agent()
-                if agent and hasattr(agent, 'amadeus') and agent.amadeus:
+                # Last background probe; never calls Amadeus from the request
+                _get_agent()
+                amadeus = provider_health.snapshot()['providers'].get('amadeus')
+                if amadeus is None:
+                    api_status = "Unknown"
+                elif amadeus['healthy']:
                     api_status = "Active"
                     amadeus_info['api_initialized'] = True
+                    amadeus_info['checked_at'] = amadeus['checked_at']
                 else:
                     api_status = "Limited - Using Mock Data"
                     amadeus_info['api_initialized'] = False
-                    
-                    # Try to initialize directly
-                    try:
-                        test_amadeus = AmadeusAPI()
-                        if test_amadeus.access_token:
-                            api_status = "API Available - Agent Issue"
-                            amadeus_info['direct_test'] = True
-                    except Exception as e:
-                        amadeus_info['direct_test_error'] = str(e)
+                    amadeus_info['direct_test_error'] = amadeus['detail']
+                    amadeus_info['checked_at'] = amadeus['checked_at']
                         
             except Exception as e:
                 api_status = f"Error: {str(e)}"
@@ -93,6 +92,8 @@ def index():  # type: ignore[return-value]
             from version import VERSION
             return render_template("index.html", 
                                  briefs_count=briefs_count,
+                                 active_deals=summary.active_deals if summary else 0,
+                                 best_score=summary.best_score if summary else None,
                                  recent_briefs=recent_briefs,
                                  user=user,
                                  api_status=api_status,
@@ -131,33 +132,34 @@ def brief_detail(brief_id: str):  # type: ignore[return-value]
         hours_active = max(1, int(time_delta.total_seconds() / 3600))
         days_active = max(1, time_delta.days)
         
-        # Estimated scans (assuming scans every 30 minutes)
-        estimated_scans = max(1, int(time_delta.total_seconds() / 1800))
-        
         # Search activity status
         search_status = "Active" if time_delta.days < 30 else "Archived"
         
         # Check API health
         api_status = "Unknown"
         try:
-            agent = _get_agent()
-            if agent:
-                if hasattr(agent, 'amadeus') and agent.amadeus:
-                    api_status = "Active"
-                elif hasattr(agent, 'sheets') and agent.sheets:
-                    api_status = "Sheets Connected"
-                else:
-                    api_status = "Limited"
-            else:
-                api_status = "Offline"
+            _get_agent()
+            amadeus_healthy = provider_health.is_healthy('amadeus')
+            if amadeus_healthy:
+                api_status = "Active"
+            elif provider_health.is_healthy('sheets'):
+                api_status = "Sheets Connected"
+            elif amadeus_healthy is not None:
+                api_status = "Limited"
         except Exception as e:
             logging.error(f"Error checking API status: {e}")
             api_status = "Error"
 
+        # This brief's own searches, from one aggregate over ix_search_activities_brief_started
+        search_count, last_search_at = db.session.query(
+            db.func.count(SearchActivity.id), db.func.max(SearchActivity.started_at)
+        ).filter(SearchActivity.brief_id == brief.id).one()
+
         activity_stats = {
+            'last_search_at': last_search_at,
             'hours_active': hours_active,
             'days_active': days_active,
-            'estimated_scans': estimated_scans,
+            'search_count': search_count,
             'search_status': search_status,
             'created_at': created_at,
             'api_status': api_status
@@ -209,10 +211,8 @@ def briefs_list():  # type: ignore[return-value]
 @require_auth
 def deals_list():  # type: ignore[return-value]
     """List travel deals."""
-    from flask import session
     try:
-        username = session.get('username', 'user')
-        user = User.query.filter_by(username=username).first()
+        user = auth.get_current_user()
         from version import VERSION
         return render_template("deals_list.html", user=user, version=VERSION)
     except Exception as exc:  # noqa: BLE001
@@ -224,10 +224,8 @@ def deals_list():  # type: ignore[return-value]
 @require_auth
 def edit_brief(brief_id: str):  # type: ignore[return-value]
     """Edit an existing travel brief."""
-    from flask import session
     try:
-        username = session.get('username', 'user')
-        user = User.query.filter_by(username=username).first()
+        user = auth.get_current_user()
         # Get brief from database, not Google Sheets
         brief = TravelBrief.query.get_or_404(brief_id)
         from version import VERSION
@@ -262,8 +260,30 @@ def get_briefs():  # type: ignore[return-value]
         return jsonify([]), 200
 
 
-class _Deal(TypedDict):
-    ai_score: int | float | str | None
+# Columns rendered by the deal cards; the rest of the row is never loaded
+_DEAL_LIST_COLUMNS = (
+    Deal.id, Deal.destination, Deal.departure_date, Deal.return_date, Deal.airline,
+    Deal.hotel_name, Deal.hotel_rating, Deal.match_score, Deal.booking_url, Deal.provider, Deal.type,
+)
+
+
+def _deal_list_item(row: Any) -> dict[str, Any]:
+    """Convert a projected deal row to the dict format expected by the frontend."""
+    return {
+        'id': row.id,
+        'destination': row.destination,
+        'destination_name': row.destination,
+        'total_price': row.list_price,
+        'departure_date': row.departure_date.isoformat() if row.departure_date else None,
+        'return_date': row.return_date.isoformat() if row.return_date else None,
+        'airline': row.airline,
+        'hotel_name': row.hotel_name,
+        'hotel_rating': row.hotel_rating,
+        'ai_score': round(row.match_score / 10, 1) if row.match_score is not None else None,
+        'booking_url': row.booking_url,
+        'provider': row.provider,
+        'type': row.type,
+    }
 
 
 @bp.route("/api/deals")
@@ -279,85 +299,29 @@ def get_recent_deals():  # type: ignore[return-value]
         max_price = validated_params["max_price"] 
         destination = validated_params["destination"].lower()
         limit = validated_params["limit"]
+        cursor = validated_params["cursor"]
+        
+        # First try to get deals from database; filters, order and limit run
+        # in SQL and only the columns the frontend renders are loaded
+        price = db.func.coalesce(Deal.total_price, Deal.price)
+        query = Deal.query.with_entities(*_DEAL_LIST_COLUMNS, price.label('list_price')).filter(
+            price <= max_price,
+            Deal.match_score >= min_score * 10  # match_score is the AI score x 10
+        )
+        if destination:
+            query = query.filter(db.func.lower(Deal.destination).contains(destination, autoescape=True))
         
-        # First try to get deals from database
-        from ..models import Deal
-        db_deals = Deal.query.all()
-        
-        if db_deals:
-            # Use database deals
-            qualified = []
-            for deal in db_deals:
-                # Apply filters
-                if deal.total_price and deal.total_price > max_price:
-                    continue
-                if destination and destination not in deal.destination.lower():
-                    continue
-                
-                # Convert to dict format expected by frontend
-                deal_dict = {
-                    'id': deal.id,
-                    'destination': deal.destination,
-                    'destination_name': deal.destination,
-                    'total_price': deal.total_price or deal.price,
-                    'departure_date': deal.departure_date.isoformat() if deal.departure_date else None,
-                    'return_date': deal.return_date.isoformat() if deal.return_date else None,
-                    'airline': deal.airline,
-                    'hotel_name': deal.hotel_name,
-                    'hotel_rating': deal.hotel_rating,
-                    'ai_score': 8.5,  # Default score
-                    'booking_url': deal.booking_url,
-                    'provider': deal.provider,
-                    'type': deal.type
-                }
-                qualified.append(deal_dict)
-            
-            return jsonify(qualified[:limit])
-        
-        # Fallback to sheets if available
-        agent = _get_agent()
-        if agent and hasattr(agent, 'sheets') and agent.sheets:
-            all_deals: list[_Deal] = agent.sheets.get_recent_deals(limit=50)
-            qualified: list[_Deal] = []
+        try:
+            # Newest first; the primary key makes the keyset order total
+            rows, next_cursor = paginate(query, [Deal.id], cursor, limit)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        for deal in all_deals:
-            try:
-                # Score filtering
-                score_raw = deal.get("ai_score", 0)
-                if isinstance(score_raw, str):
-                    if "/" in score_raw:
-                        score_raw = score_raw.split("/")[0]
-                    if score_raw in {"N/A", "NaN", "", "None"}:
-                        continue
-                score_val = float(score_raw or 0)
-                if score_val < min_score:
-                    continue
-                    
-                # Price filtering
-                price_raw = deal.get("total_price") or deal.get("Total_Price", 0)
-                price_val = float(price_raw or 0)
-                if price_val > max_price:
-                    continue
-                    
-                # Destination filtering
-                if destination:
-                    deal_dest = (deal.get("destination") or deal.get("Destination", "")).lower()
-                    if destination not in deal_dest:
-                        continue
-                
-                # Add booking URL if not present
-                if not deal.get("booking_url"):
-                    dest_code = deal.get("destination") or deal.get("Destination", "")
-                    deal["booking_url"] = f"https://www.skyscanner.com/transport/flights/lon/{dest_code.lower()[:3]}/"
-                    deal["provider"] = "Skyscanner"
-                
-                qualified.append(deal)
-            except (ValueError, TypeError):
-                continue
-                
-        # Sort by AI score (highest first)
-        qualified.sort(key=lambda x: float(x.get("ai_score", 0) or 0), reverse=True)
-        return jsonify(qualified[:limit])
+        # Deals are only served from the database; Sheets holds a mirrored copy
+        response = jsonify([_deal_list_item(row) for row in rows])
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
     except Exception as exc:  # noqa: BLE001
         logging.exception("Error fetching deals: %s", exc)
         return jsonify({"error": "Unable to fetch deals"}), 500
@@ -456,7 +420,7 @@ def test_notification():  # type: ignore[return-value]
 def debug_amadeus_status():  # type: ignore[return-value]
     """Debug endpoint to check Amadeus API status and environment variables"""
     import os
-    from amadeus_api import AmadeusAPI
+    from amadeus_api import token_manager
     
     debug_info = {}
     
@@ -469,20 +433,16 @@ def debug_amadeus_status():  # type: ignore[return-value]
         'amadeus_client_id_prefix': os.environ.get("AMADEUS_CLIENT_ID", "")[:4] if os.environ.get("AMADEUS_CLIENT_ID") else "",
     }
     
-    # Try to initialize Amadeus API
-    try:
-        amadeus = AmadeusAPI()
-        debug_info['amadeus_init'] = {
-            'success': True,
-            'has_access_token': bool(amadeus.access_token),
-            'token_expires_at': str(amadeus.token_expires_at) if amadeus.token_expires_at else None
-        }
-    except Exception as e:
-        debug_info['amadeus_init'] = {
-            'success': False,
-            'error': str(e),
-            'error_type': type(e).__name__
-        }
+    # Report the shared token cache (refreshed in the background)
+    token_status = token_manager.status()
+    debug_info['amadeus_init'] = {
+        'success': token_status['has_token'],
+        'has_access_token': token_status['has_token'],
+        'token_expires_at': token_status['token_expires_at'],
+        'refreshed_at': token_status['refreshed_at'],
+        'refresher_running': token_status['refresher_running'],
+        'error': token_status['last_error']
+    }
     
     # Check Travel Agent
     try:
@@ -563,6 +523,7 @@ def create_brief():  # type: ignore[return-value]
         
         # Save to database
         db.session.add(new_brief)
+        record_brief_added(new_brief.user_id)
         db.session.commit()
         
         logging.info(f"Successfully created travel brief with ID: {new_brief.id}")
@@ -705,6 +666,9 @@ def delete_brief(brief_id: str):  # type: ignore[return-value]
         
         # Delete from database
         db.session.delete(brief)
+        if brief.user_id:
+            # Deletes are rare; recount rather than work out what the brief contributed
+            rebuild_user_summary(brief.user_id)
         db.session.commit()
         
         logging.info(f"Successfully deleted travel brief with ID: {brief_id}")
@@ -2,13 +2,43 @@
 from flask import Blueprint, request, jsonify, session, render_template
 from sqlalchemy import or_, and_
 from datetime import datetime, timedelta
+import json
 import logging
 
-from ..models import db, Deal, User, TravelBrief, SearchActivity
-from auth import require_auth
+from ..models import db, Deal, TravelBrief, SearchActivity
+from ..pagination import paginate, sort_columns
+from ..summaries import rebuild_user_summary, record_deals_saved
+from auth import auth, require_auth
 
 bp = Blueprint("deals", __name__)
 
+# Only the paginated listing is mounted by create_app; the other routes in
+# this module still need an auth and side-effect review before they are
+listing_bp = Blueprint("deal_listing", __name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+# Keyset order of the deals list; match_score and created_at are nullable, so
+# unscored or undated deals sort last instead of dropping out of the pages
+DEAL_SORT_COLUMNS = [(Deal.match_score, -1.0), (Deal.created_at, datetime(1970, 1, 1)), Deal.id]
+
+# Fields selectable with ?fields=, named as in Deal.to_dict()
+DEAL_FIELDS = {
+    column.key: column for column in Deal.__table__.columns
+    if column.key not in ('total_price', 'fingerprint')
+}
+DEAL_FIELDS['total_price'] = db.func.coalesce(Deal.total_price, Deal.price).label('total_price')
+
+
+def _serialize_field(name, value):
+    """Format a projected column the same way Deal.to_dict() does"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if name == 'analysis':
+        return json.loads(value) if value else None
+    return value
+
 
 @bp.route("/deals")
 @require_auth
@@ -19,13 +49,16 @@ def deals_list():
     return render_template("deals_list.html", user=user)
 
 
-@bp.route("/api/deals")
+@listing_bp.route("/api/deals/mine")
 @require_auth
 def get_deals():
-    """Get deals for the current user with filtering"""
+    """Get deals for the current user with filtering
+    
+    Returns one page ordered by (match_score, created_at, id), best score
+    first; the next page's cursor is in the X-Next-Cursor header.
+    """
     try:
-        username = session.get('username', 'user')
-        user = User.query.filter_by(username=username).first()
+        user = auth.get_current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -52,10 +85,35 @@ def get_deals():
         if deal_type:
             query = query.filter_by(type=deal_type)
         
-        # Order by match score and date
-        deals = query.order_by(Deal.match_score.desc(), Deal.created_at.desc()).all()
+        # Sparse fieldsets: ?fields=id,destination,price loads only those columns
+        fields = [name.strip() for name in request.args.get('fields', '').split(',') if name.strip()]
+        unknown = [name for name in fields if name not in DEAL_FIELDS]
+        if unknown:
+            return jsonify({"error": f"Unknown fields: {', '.join(unknown)}"}), 400
+        if fields:
+            entities = {column.key: column for column in sort_columns(DEAL_SORT_COLUMNS)}
+            entities.update((name, DEAL_FIELDS[name]) for name in fields)
+            query = query.with_entities(*entities.values())
+        
+        limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+        try:
+            # Order by match score and date
+            deals, next_cursor = paginate(query, DEAL_SORT_COLUMNS, request.args.get('cursor'), limit)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        if fields:
+            payload = [{name: _serialize_field(name, getattr(row, name)) for name in fields} for row in deals]
+        else:
+            payload = [deal.to_dict() for deal in deals]
+        
+        response = jsonify(payload)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
         
-        return jsonify([deal.to_dict() for deal in deals])
+        # Clients revalidating an unchanged page get a bodyless 304
+        response.add_etag()
+        return response.make_conditional(request)
         
     except Exception as e:
         logging.error(f"Error fetching deals: {e}")
@@ -142,25 +200,28 @@ def search_deals():
                 "deals_found": 0
             })
         
-        # Import and use the travel agent to search for deals
-        from travel_agent import TravelAgent
-        agent = TravelAgent()
+        # Use the shared travel agent to search for deals
+        from service_registry import get_agent
+        agent = get_agent()
         
         total_deals = 0
         for brief in active_briefs:
             try:
                 # Convert brief to dict format expected by travel agent
+                # Same format as the briefs blueprint's manual_search
                 brief_dict = {
-                    'Brief_ID': brief.id,
-                    'Destination': brief.destination,
-                    'Travel_Dates': f"{brief.departure_date.strftime('%Y-%m-%d')} to {brief.return_date.strftime('%Y-%m-%d')}",
-                    'Budget': brief.budget,
-                    'Travelers': brief.travelers_count,
-                    'Accommodation_Type': brief.accommodation_preferences
+                    'Brief_ID': str(brief.id),
+                    'Destinations': brief.destination,
+                    'Departure_Location': brief.departure_location,
+                    'Travel_Dates': f"{brief.departure_date.strftime('%Y-%m-%d')} to {brief.return_date.strftime('%Y-%m-%d') if brief.return_date else ''}",
+                    'Budget_Max': brief.budget_max,
+                    'Travelers': brief.travelers,
+                    'Trip_Duration': brief.trip_length,
+                    'AI_Instructions': brief.interests
                 }
                 
                 # Process the brief
-                agent.process_brief(brief_dict)
+                agent.process_travel_brief(brief_dict)
                 
                 # Check for new deals in the database
                 new_deals = Deal.query.filter_by(
@@ -191,8 +252,7 @@ def search_deals():
 def update_deal(deal_id):
     """Update deal status (e.g., mark as viewed, hidden, etc.)"""
     try:
-        username = session.get('username', 'user')
-        user = User.query.filter_by(username=username).first()
+        user = auth.get_current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -204,10 +264,14 @@ def update_deal(deal_id):
         data = request.get_json()
         
         # Update allowed fields
+        status_changed = 'status' in data and data['status'] != deal.status
         if 'status' in data:
             deal.status = data['status']
         if 'notification_sent' in data:
             deal.notification_sent = data['notification_sent']
+        if status_changed:
+            # Active deal count and best score depend on status
+            rebuild_user_summary(user.id)
         
         db.session.commit()
         return jsonify(deal.to_dict())
@@ -248,8 +312,7 @@ def recent_deals():
 def create_deal():
     """Manually create a deal (for testing or manual additions)"""
     try:
-        username = session.get('username', 'user')
-        user = User.query.filter_by(username=username).first()
+        user = auth.get_current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -281,6 +344,7 @@ def create_deal():
         )
         
         db.session.add(deal)
+        record_deals_saved(user.id, [None])
         db.session.commit()
         
         return jsonify(deal.to_dict()), 201
@@ -298,7 +362,7 @@ def get_search_activity(brief_id):
     try:
         # Get username from session
         username = session.get('username', 'user')
-        user = User.query.filter_by(username=username).first()
+        user = auth.get_current_user()
         
         logging.info(f"Fetching search activity for brief {brief_id}, username: {username}, user: {user}")
         
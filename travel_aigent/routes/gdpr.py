@@ -1,7 +1,7 @@
 """GDPR compliance routes for TravelAiGent"""
 from flask import Blueprint, request, jsonify, session, send_file
-from auth import require_auth
-from ..models import db, User
+from auth import auth, require_auth
+from ..models import db
 from ..gdpr import GDPRCompliance
 import json
 import io
@@ -15,8 +15,7 @@ bp = Blueprint("gdpr", __name__)
 def export_user_data():
     """Export all user data in JSON format (GDPR Article 20 - Data Portability)"""
     try:
-        username = session.get('username', 'admin')
-        user = User.query.filter_by(username=username).first()
+        user = auth.get_current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -30,7 +29,7 @@ def export_user_data():
         buffer.write(json_data.encode('utf-8'))
         buffer.seek(0)
         
-        filename = f"travelaigent_data_export_{username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        filename = f"travelaigent_data_export_{user.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
         return send_file(
             buffer,
@@ -48,8 +47,7 @@ def export_user_data():
 def delete_user_data():
     """Delete user data (GDPR Article 17 - Right to Erasure)"""
     try:
-        username = session.get('username', 'admin')
-        user = User.query.filter_by(username=username).first()
+        user = auth.get_current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -63,8 +61,7 @@ def delete_user_data():
             return jsonify({"error": "Password required for data deletion"}), 400
         
         # Verify password
-        from auth import auth
-        if not auth.authenticate(username, password):
+        if not auth.authenticate(user.username, password):
             return jsonify({"error": "Invalid password"}), 401
         
         # Delete user data
@@ -87,8 +84,7 @@ def delete_user_data():
 def manage_consent():
     """Get or update consent preferences"""
     try:
-        username = session.get('username', 'admin')
-        user = User.query.filter_by(username=username).first()
+        user = auth.get_current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
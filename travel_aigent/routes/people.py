@@ -1,10 +1,10 @@
 """Routes for managing people profiles"""
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 
-from ..models import db, Person, User
-from auth import require_auth
+from ..models import db, Person
+from auth import auth, require_auth
 
 bp = Blueprint("people", __name__)
 
@@ -14,8 +14,7 @@ bp = Blueprint("people", __name__)
 def get_people():
     """Get all people profiles for the current user"""
     try:
-        username = session.get('username', 'user')
-        user = User.query.filter_by(username=username).first()
+        user = auth.get_current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -33,8 +32,7 @@ def get_people():
 def create_person():
     """Create a new person profile"""
     try:
-        username = session.get('username', 'user')
-        user = User.query.filter_by(username=username).first()
+        user = auth.get_current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -91,8 +89,7 @@ def create_person():
 def update_person(person_id):
     """Update a person profile"""
     try:
-        username = session.get('username', 'user')
-        user = User.query.filter_by(username=username).first()
+        user = auth.get_current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -153,8 +150,7 @@ def update_person(person_id):
 def delete_person(person_id):
     """Delete a person profile"""
     try:
-        username = session.get('username', 'user')
-        user = User.query.filter_by(username=username).first()
+        user = auth.get_current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -7,20 +7,23 @@ from typing import TypedDict
 
 from flask import Blueprint, jsonify, current_app
 
+from amadeus_api import AmadeusAPI
+from analysis_cache import get_analysis_cache_stats
+from http_transport import transport
+from llm_client import llm_client
+from provider_health import provider_health
+from service_registry import get_agent, services
+from sheets_mirror import sheets_mirror
 from travel_agent import TravelAgent
 from version import get_version_info, get_version_string, VERSION_FULL
 
 bp = Blueprint("status", __name__)
 
-# Singleton-ish agent instance reused across requests
-_agent: TravelAgent | None = None
-
-
 def _get_agent() -> TravelAgent:
-    global _agent  # noqa: PLW0603
-    if _agent is None:
-        _agent = TravelAgent()
-    return _agent
+    # Process-wide agent shared with the scheduler and other blueprints
+    agent = get_agent()
+    provider_health.start(agent)
+    return agent
 
 
 class _Status(TypedDict):
@@ -30,6 +33,12 @@ class _Status(TypedDict):
     total_deals_found: int
     notifications_sent: int
     services: dict[str, bool]
+    health: dict[str, dict]
+    transport: dict[str, dict]
+    caches: dict[str, dict]
+    llm: dict[str, int]
+    sheets_mirror: dict[str, int]
+    service_build_seconds: dict[str, float]
     error: str | None
 
 
@@ -38,18 +47,29 @@ def get_status():  # type: ignore[return-value]
     """Return a snapshot of system status as JSON."""
     try:
         agent = _get_agent()
+        # Provider checks come from the background prober's last snapshot
+        health = provider_health.snapshot()
+        providers = health["providers"]
         status: _Status = {
             "system": "running",
             "last_check": agent.get_last_check_time(),
-            "active_briefs": agent.get_active_briefs_count(),
+            "active_briefs": health["active_briefs"],
             "total_deals_found": agent.get_total_deals_count(),
             "notifications_sent": agent.get_notifications_count(),
             "services": {
-                "amadeus": agent.amadeus is not None,
-                "openai": agent.ai_analyzer is not None,
-                "telegram": agent.telegram is not None,
-                "sheets": agent.sheets.client is not None,  # type: ignore[attr-defined]
+                "amadeus": providers.get("amadeus", {}).get("healthy", False),
+                "openai": providers.get("analyzer", {}).get("healthy", False),
+                "telegram": providers.get("telegram", {}).get("healthy", False),
+                "sheets": providers.get("sheets", {}).get("healthy", False),
+                "smtp": providers.get("smtp", {}).get("healthy", False),
+                "database": providers.get("database", {}).get("healthy", False),
             },
+            "health": health,
+            "transport": transport.get_metrics(),
+            "caches": {**AmadeusAPI.get_cache_stats(), "analysis": get_analysis_cache_stats()},
+            "llm": llm_client.get_stats(),
+            "sheets_mirror": sheets_mirror.get_stats(),
+            "service_build_seconds": services.get_stats(),
             "error": None,
         }
         return jsonify(status)
@@ -72,13 +92,12 @@ def get_status():  # type: ignore[return-value]
 @bp.route("/health")
 def health_check():  # type: ignore[return-value]
     """Health check endpoint for AWS load balancer."""
-    try:
-        # Basic database connectivity check
-        from ..models import db
-        db.session.execute("SELECT 1")
-        db_status = "healthy"
-    except Exception:
-        db_status = "unhealthy"
+    # Database connectivity from the last background probe; checked inline
+    # only until the prober's first run has finished
+    db_healthy = provider_health.is_healthy("database")
+    if db_healthy is None:
+        db_healthy = provider_health.check_database()
+    db_status = "healthy" if db_healthy else "unhealthy"
     
     return jsonify({
         "status": "healthy",
@@ -1,9 +1,10 @@
 """UK Holidays and School Term integration service."""
-import requests
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
+from http_transport import transport
+
 class UKHolidaysService:
     """Service to fetch UK bank holidays and manage school term data."""
     
@@ -23,7 +24,7 @@ class UKHolidaysService:
                 return self.bank_holidays_cache
             
             # Fetch fresh data
-            response = requests.get(self.BANK_HOLIDAYS_API, timeout=10)
+            response = transport.get(self.BANK_HOLIDAYS_API)
             response.raise_for_status()
             
             data = response.json()
@@ -0,0 +1,116 @@
+"""Incrementally maintained per-user summaries for the dashboard and brief pages"""
+import logging
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import case
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+
+from .models import db, Deal, TravelBrief, SearchActivity, UserSummary
+
+# Recorders run inside the caller's transaction (before its commit), so a
+# summary never counts a write that was rolled back.
+
+
+def get_user_summary(user_id: int) -> Optional[UserSummary]:
+    """The user's summary row, built from the tables on first access"""
+    try:
+        summary = db.session.get(UserSummary, user_id)
+        if summary is None:
+            _insert_summary(user_id)
+            db.session.commit()
+            summary = db.session.get(UserSummary, user_id)
+        return summary
+    except Exception as e:
+        logging.error(f"Error loading summary for user {user_id}: {e}")
+        db.session.rollback()
+        return None
+
+
+def _summary_values(user_id: int) -> dict:
+    """A user's counters recomputed with aggregate queries"""
+    brief_count = TravelBrief.query.filter_by(user_id=user_id).count()
+    active_deals, best_match = db.session.query(db.func.count(Deal.id), db.func.max(Deal.match_score)).filter(
+        Deal.user_id == user_id, Deal.status == 'active'
+    ).one()
+    last_search_at = db.session.query(db.func.max(SearchActivity.started_at)).filter(
+        SearchActivity.user_id == user_id
+    ).scalar()
+
+    return {
+        'brief_count': brief_count,
+        'active_deals': active_deals,
+        'best_score': best_match / 10 if best_match is not None else None,  # match_score is score x 10
+        'last_search_at': last_search_at
+    }
+
+
+def _insert_summary(user_id: int) -> bool:
+    """Insert a rebuilt row; False if a concurrent writer created it first
+
+    A plain INSERT would fail on the primary key in that race and its
+    IntegrityError would roll back the caller's whole transaction, so the
+    conflict is skipped instead (in a savepoint on other backends).
+    """
+    values = dict(_summary_values(user_id), user_id=user_id, updated_at=datetime.utcnow())
+    insert = {'postgresql': postgresql_insert, 'sqlite': sqlite_insert}.get(db.session.get_bind().dialect.name)
+    if insert:
+        statement = insert(UserSummary).values(**values).on_conflict_do_nothing(index_elements=['user_id'])
+        return db.session.execute(statement).rowcount == 1
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(UserSummary(**values))
+        return True
+    except IntegrityError:
+        return False
+
+
+def rebuild_user_summary(user_id: int) -> UserSummary:
+    """Recompute a user's summary with aggregate queries (backfill and rare writes)"""
+    summary = db.session.get(UserSummary, user_id)
+    if summary is None and _insert_summary(user_id):
+        return db.session.get(UserSummary, user_id)
+
+    summary = summary or db.session.get(UserSummary, user_id)
+    for name, value in _summary_values(user_id).items():
+        setattr(summary, name, value)
+    return summary
+
+
+def _update(user_id: Optional[int], values: dict) -> None:
+    """Apply an incremental UPDATE, or build the row if the user has none yet"""
+    if not user_id:
+        return
+
+    updated = UserSummary.query.filter_by(user_id=user_id).update(values, synchronize_session=False)
+    if not updated and not _insert_summary(user_id):
+        # A concurrent writer built the row without our uncommitted change
+        UserSummary.query.filter_by(user_id=user_id).update(values, synchronize_session=False)
+
+
+def record_brief_added(user_id: Optional[int]) -> None:
+    _update(user_id, {'brief_count': UserSummary.brief_count + 1})
+
+
+def record_deals_saved(user_id: Optional[int], scores: Iterable[Optional[float]]) -> None:
+    """Count newly saved active deals and raise the best score if one beats it"""
+    scores = list(scores)
+    if not scores:
+        return
+
+    values = {'active_deals': UserSummary.active_deals + len(scores)}
+    best = max((score for score in scores if score is not None), default=None)
+    if best is not None:
+        values['best_score'] = case(
+            (UserSummary.best_score.is_(None), best),
+            (UserSummary.best_score < best, best),
+            else_=UserSummary.best_score
+        )
+    _update(user_id, values)
+
+
+def record_search(user_id: Optional[int], searched_at: Optional[datetime] = None) -> None:
+    _update(user_id, {'last_search_at': searched_at or datetime.utcnow()})
@@ -155,6 +155,11 @@ class QueryParamsSchema(Schema):
         validate=validate.Range(min=1, max=50),
         load_default=10
     )
+    
+    cursor = fields.Str(
+        validate=validate.Length(max=200),
+        load_default=None
+    )
 
 
 def validate_brief_id(brief_id: str) -> bool: